@@ -1,11 +1,56 @@
+import os
+import http.cookiejar
+
 import requests
+from requests.adapters import HTTPAdapter
 
-from flask import Flask, render_template, request, redirect, url_for, flash, session
+from flask import Flask, render_template, request, redirect, url_for, flash, session, Response, stream_with_context
 
 app = Flask(__name__)
 app.secret_key = 'your_secret_key'  # session 需要這個金鑰
 
 API_BASE_URL = "http://127.0.0.1:8000/api/v1"
+API_TIMEOUT = float(os.getenv("API_TIMEOUT", "5"))       # 一般 API 呼叫的逾時秒數
+AI_API_TIMEOUT = float(os.getenv("AI_API_TIMEOUT", "30"))  # AI 查詢需要比較久
+API_POOL_SIZE = int(os.getenv("API_POOL_SIZE", "20"))     # 與後端保持的 keep-alive 連線數
+
+
+class ApiSession(requests.Session):
+    """共用的後端 HTTP Session: 重複使用 keep-alive 連線，沒有指定 timeout 時套用 API_TIMEOUT"""
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", API_TIMEOUT)
+        return super().request(method, url, **kwargs)
+
+
+api = ApiSession()
+api.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=API_POOL_SIZE))
+api.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=API_POOL_SIZE))
+# 所有使用者共用同一個 Session，不保存後端回傳的 cookie
+api.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+
+# 表單選單資料: 後端 /lookups 一次回傳所有主檔，依 ETag 快取在前端 process 中
+# {"etag": ..., "data": {...}}，主檔沒有變動時後端回 304，不需重新傳輸與解析
+_lookups_cache = {"etag": None, "data": None}
+# 模板使用的變數名稱 -> /lookups 回應中的欄位
+LOOKUP_FIELDS = {"products": "products", "suppliers": "suppliers", "warehouses": "warehouses", "staff_list": "staff"}
+
+
+def fetch_lookups(*names):
+    """取得表單下拉選單資料 (一次請求)，連線失敗時沿用上次取得的資料"""
+    cached = _lookups_cache
+    headers = {"If-None-Match": cached["etag"]} if cached["etag"] else {}
+    try:
+        response = api.get(f"{API_BASE_URL}/lookups", headers=headers)
+        if response.status_code == 200:
+            cached = {"etag": response.headers.get("ETag"), "data": response.json()}
+            _lookups_cache.update(cached)
+        elif response.status_code != 304:
+            cached = {"etag": None, "data": None}
+    except Exception:
+        pass
+    data = cached["data"] or {}
+    return {name: data.get(LOOKUP_FIELDS[name], []) for name in names}
 
 
 # ==========================================
@@ -26,7 +71,7 @@ def check_login():
 @app.route('/dashboard')
 def dashboard():
     try:
-        response = requests.get(f"{API_BASE_URL}/dashboard/", timeout=5)
+        response = api.get(f"{API_BASE_URL}/dashboard/")
         data = response.json() if response.status_code == 200 else {}
     except:
         data = {}
@@ -55,7 +100,7 @@ def login():
 
         try:
             # Call Backend Auth API
-            resp = requests.post(f"{API_BASE_URL}/auth/login", json={"username": username, "password": password}, timeout=5)
+            resp = api.post(f"{API_BASE_URL}/auth/login", json={"username": username, "password": password})
             
             if resp.status_code == 200:
                 data = resp.json()
@@ -89,7 +134,7 @@ def logout():
 @app.route('/product')
 def product_page():
     try:
-        response = requests.get(f"{API_BASE_URL}/products/", timeout=5)
+        response = api.get(f"{API_BASE_URL}/products/")
         products = response.json() if response.status_code == 200 else []
     except:
         products = []
@@ -102,10 +147,11 @@ def add_product():
         payload = {
             "prName": request.form['prName'],
             "prCategory": request.form['prCategory'],
-            "prSpec": request.form['prSpec'] if request.form['prSpec'] else None
+            "prSpec": request.form['prSpec'] if request.form['prSpec'] else None,
+            "prReorderLevel": int(request.form.get('prReorderLevel') or 10)
         }
         try:
-            requests.post(f"{API_BASE_URL}/products/", json=payload, timeout=5)
+            api.post(f"{API_BASE_URL}/products/", json=payload)
             return redirect(url_for('product_page'))
         except Exception as e:
             flash(f'錯誤：{str(e)}', 'danger')
@@ -114,7 +160,7 @@ def add_product():
 @app.route('/product/delete/<int:product_id>', methods=['POST'])
 def delete_product(product_id):
     try:
-        requests.delete(f"{API_BASE_URL}/products/{product_id}", timeout=5)
+        api.delete(f"{API_BASE_URL}/products/{product_id}")
     except:
         flash('刪除失敗', 'danger')
     return redirect(url_for('product_page'))
@@ -126,7 +172,7 @@ def delete_product(product_id):
 @app.route('/supplier')
 def supplier_page():
     try:
-        response = requests.get(f"{API_BASE_URL}/suppliers/", timeout=5)
+        response = api.get(f"{API_BASE_URL}/suppliers/")
         suppliers = response.json() if response.status_code == 200 else []
     except:
         suppliers = []
@@ -141,7 +187,7 @@ def add_supplier():
             "suAddress": request.form['suAddress']
         }
         try:
-            requests.post(f"{API_BASE_URL}/suppliers/", json=payload, timeout=5)
+            api.post(f"{API_BASE_URL}/suppliers/", json=payload)
             return redirect(url_for('supplier_page'))
         except:
             flash('新增失敗', 'danger')
@@ -150,7 +196,7 @@ def add_supplier():
 @app.route('/supplier/delete/<int:supplier_id>', methods=['POST'])
 def delete_supplier(supplier_id):
     try:
-        requests.delete(f"{API_BASE_URL}/suppliers/{supplier_id}", timeout=5)
+        api.delete(f"{API_BASE_URL}/suppliers/{supplier_id}")
     except:
         pass
     return redirect(url_for('supplier_page'))
@@ -162,7 +208,7 @@ def delete_supplier(supplier_id):
 @app.route('/warehouse')
 def warehouse_page():
     try:
-        response = requests.get(f"{API_BASE_URL}/warehouse/", timeout=5)
+        response = api.get(f"{API_BASE_URL}/warehouse/")
         warehouses = response.json() if response.status_code == 200 else []
     except:
         warehouses = []
@@ -175,14 +221,14 @@ def add_warehouse():
             "waName": request.form['waName'],
             "waLocation": request.form['waLocation']
         }
-        requests.post(f"{API_BASE_URL}/warehouse/", json=payload)
+        api.post(f"{API_BASE_URL}/warehouse/", json=payload)
         return redirect(url_for('warehouse_page'))
     return render_template('add_warehouse.html')
 
 @app.route('/warehouse/delete/<int:warehouse_id>', methods=['POST'])
 def delete_warehouse(warehouse_id):
     try:
-        requests.delete(f"{API_BASE_URL}/warehouse/{warehouse_id}")
+        api.delete(f"{API_BASE_URL}/warehouse/{warehouse_id}")
     except:
         pass
     return redirect(url_for('warehouse_page'))
@@ -198,7 +244,7 @@ def staff_page():
          return redirect(url_for('dashboard'))
 
     try:
-        response = requests.get(f"{API_BASE_URL}/staff/", timeout=5)
+        response = api.get(f"{API_BASE_URL}/staff/")
         staff_list = response.json() if response.status_code == 200 else []
         
         # 非Admin用戶無法看到Admin帳號
@@ -229,7 +275,7 @@ def add_staff():
             "password": request.form['password'],
             "is_manager": is_manager
         }
-        requests.post(f"{API_BASE_URL}/staff/", json=payload)
+        api.post(f"{API_BASE_URL}/staff/", json=payload)
         flash('員工新增成功！', 'success')
         return redirect(url_for('staff_page'))
     return render_template('add_staff.html')
@@ -253,7 +299,7 @@ def edit_staff(staff_id):
             "is_manager": request.form.get('is_manager') == '1'
         }
         try:
-            response = requests.put(f"{API_BASE_URL}/staff/{staff_id}", json=payload)
+            response = api.put(f"{API_BASE_URL}/staff/{staff_id}", json=payload)
             if response.status_code == 200:
                 flash('員工資料更新成功！', 'success')
             elif response.status_code == 403:
@@ -266,7 +312,7 @@ def edit_staff(staff_id):
     
     # GET: 顯示編輯表單
     try:
-        response = requests.get(f"{API_BASE_URL}/staff/{staff_id}")
+        response = api.get(f"{API_BASE_URL}/staff/{staff_id}")
         if response.status_code == 200:
             staff = response.json()
             return render_template('edit_staff.html', staff=staff)
@@ -286,7 +332,7 @@ def delete_staff(staff_id):
         return redirect(url_for('staff_page'))
     
     try:
-        requests.delete(f"{API_BASE_URL}/staff/{staff_id}")
+        api.delete(f"{API_BASE_URL}/staff/{staff_id}")
     except:
         pass
     return redirect(url_for('staff_page'))
@@ -298,7 +344,7 @@ def delete_staff(staff_id):
 @app.route('/inbound')
 def inbound_page():
     try:
-        response = requests.get(f"{API_BASE_URL}/inbound/")
+        response = api.get(f"{API_BASE_URL}/inbound/")
         if response.status_code == 200:
             inbound_list = response.json()
         else:
@@ -332,7 +378,7 @@ def add_inbound():
         }
 
         try:
-            response = requests.post(f"{API_BASE_URL}/inbound/", json=payload)
+            response = api.post(f"{API_BASE_URL}/inbound/", json=payload)
             if response.status_code == 201:
                 flash('進貨單建立成功！', 'success')
                 return redirect(url_for('inbound_page'))
@@ -342,25 +388,13 @@ def add_inbound():
             flash(f'連線錯誤：{str(e)}', 'danger')
 
     # GET: 準備選單資料
-    products, suppliers, warehouses, staff_list = [], [], [], []
-    try:
-        products = requests.get(f"{API_BASE_URL}/products/", timeout=5).json()
-        suppliers = requests.get(f"{API_BASE_URL}/suppliers/", timeout=5).json()
-        warehouses = requests.get(f"{API_BASE_URL}/warehouse/", timeout=5).json()
-        staff_list = requests.get(f"{API_BASE_URL}/staff/").json()
-    except:
-        pass
-
-    return render_template('add_inbound.html', 
-                         products=products, 
-                         suppliers=suppliers, 
-                         warehouses=warehouses, 
-                         staff_list=staff_list)
+    lookups = fetch_lookups("products", "suppliers", "warehouses", "staff_list")
+    return render_template('add_inbound.html', **lookups)
 
 @app.route('/inbound/delete/<int:inbound_id>', methods=['POST'])
 def delete_inbound(inbound_id):
     try:
-        requests.delete(f"{API_BASE_URL}/inbound/{inbound_id}")
+        api.delete(f"{API_BASE_URL}/inbound/{inbound_id}")
     except:
         flash('刪除失敗', 'danger')
     return redirect(url_for('inbound_page'))
@@ -372,7 +406,7 @@ def delete_inbound(inbound_id):
 @app.route('/requisitions')  # <--- 網址改成有 s
 def requisition_page():
     try:
-        response = requests.get(f"{API_BASE_URL}/requisitions/")
+        response = api.get(f"{API_BASE_URL}/requisitions/")
         if response.status_code == 200:
             req_list = response.json()
         else:
@@ -411,7 +445,7 @@ def add_requisition():
         }
         
         try:
-            response = requests.post(f"{API_BASE_URL}/requisitions/", json=payload)
+            response = api.post(f"{API_BASE_URL}/requisitions/", json=payload)
             if response.status_code == 201:
                 flash(f'領料單建立成功！共包含 {len(details_payload)} 筆商品。', 'success')
                 return redirect(url_for('requisition_page'))
@@ -420,24 +454,14 @@ def add_requisition():
         except Exception as e:
             flash(f'連線錯誤：{str(e)}', 'danger')
 
-    # GET: 準備選單資料 (保持不變)
-    products, warehouses, staff_list = [], [], []
-    try:
-        products = requests.get(f"{API_BASE_URL}/products/", timeout=5).json()
-        warehouses = requests.get(f"{API_BASE_URL}/warehouse/", timeout=5).json()
-        staff_list = requests.get(f"{API_BASE_URL}/staff/").json()
-    except:
-        pass
-
-    return render_template('add_requisitions.html', 
-                         products=products, 
-                         warehouses=warehouses, 
-                         staff_list=staff_list)
+    # GET: 準備選單資料
+    lookups = fetch_lookups("products", "warehouses", "staff_list")
+    return render_template('add_requisitions.html', **lookups)
 
 @app.route('/requisitions/delete/<int:req_id>', methods=['POST']) # <--- 網址改成有 s
 def delete_requisition(req_id):
     try:
-        requests.delete(f"{API_BASE_URL}/requisitions/{req_id}")
+        api.delete(f"{API_BASE_URL}/requisitions/{req_id}")
         flash('領料單已刪除', 'success')
     except:
         flash('刪除失敗', 'danger')
@@ -453,10 +477,11 @@ def edit_product(product_id):
         payload = {
             "prName": request.form['prName'],
             "prCategory": request.form['prCategory'],
-            "prSpec": request.form.get('prSpec', '')
+            "prSpec": request.form.get('prSpec', ''),
+            "prReorderLevel": int(request.form.get('prReorderLevel') or 10)
         }
         try:
-            response = requests.put(f"{API_BASE_URL}/products/{product_id}", json=payload)
+            response = api.put(f"{API_BASE_URL}/products/{product_id}", json=payload)
             if response.status_code == 200:
                 flash('商品資料更新成功！', 'success')
             else:
@@ -467,7 +492,7 @@ def edit_product(product_id):
     
     # GET: 顯示編輯表單
     try:
-        response = requests.get(f"{API_BASE_URL}/products/{product_id}")
+        response = api.get(f"{API_BASE_URL}/products/{product_id}")
         if response.status_code == 200:
             product = response.json()
             return render_template('edit_product.html', product=product)
@@ -490,7 +515,7 @@ def edit_warehouse(warehouse_id):
             "waLocation": request.form.get('waLocation', '')
         }
         try:
-            response = requests.put(f"{API_BASE_URL}/warehouse/{warehouse_id}", json=payload)
+            response = api.put(f"{API_BASE_URL}/warehouse/{warehouse_id}", json=payload)
             if response.status_code == 200:
                 flash('倉庫資料更新成功！', 'success')
             else:
@@ -501,7 +526,7 @@ def edit_warehouse(warehouse_id):
     
     # GET: 顯示編輯表單
     try:
-        response = requests.get(f"{API_BASE_URL}/warehouse/{warehouse_id}")
+        response = api.get(f"{API_BASE_URL}/warehouse/{warehouse_id}")
         if response.status_code == 200:
             warehouse = response.json()
             return render_template('edit_warehouse.html', warehouse=warehouse)
@@ -524,7 +549,7 @@ def edit_supplier(supplier_id):
             "suAddress": request.form.get('suAddress', '')
         }
         try:
-            response = requests.put(f"{API_BASE_URL}/suppliers/{supplier_id}", json=payload)
+            response = api.put(f"{API_BASE_URL}/suppliers/{supplier_id}", json=payload)
             if response.status_code == 200:
                 flash('供應商資料更新成功！', 'success')
             else:
@@ -535,7 +560,7 @@ def edit_supplier(supplier_id):
     
     # GET: 顯示編輯表單
     try:
-        response = requests.get(f"{API_BASE_URL}/suppliers/{supplier_id}")
+        response = api.get(f"{API_BASE_URL}/suppliers/{supplier_id}")
         if response.status_code == 200:
             supplier = response.json()
             return render_template('edit_supplier.html', supplier=supplier)
@@ -565,11 +590,52 @@ def ai_agent_ask():
     try:
         # Call FastAPI Backend
         # Note: API_BASE_URL ends with /api/v1
-        response = requests.post(f"{API_BASE_URL}/ai/query", json={"question": question}, timeout=30)
+        response = api.post(f"{API_BASE_URL}/ai/query", json={"question": question}, timeout=AI_API_TIMEOUT)
         return response.json(), response.status_code
     except Exception as e:
         return {"error": str(e)}, 500
 
+@app.route('/ai-agent/ask/stream', methods=['POST'])
+def ai_agent_ask_stream():
+    """串流版本: 後端每送出一行 (NDJSON 事件) 就轉給瀏覽器，不等整個查詢完成"""
+    data = request.get_json()
+    question = data.get('question')
+
+    if not question:
+        return {"error": "No question provided"}, 400
+
+    try:
+        # timeout=(連線, 兩次收到資料之間的最長間隔)，不限制整個串流的總時間
+        upstream = api.post(
+            f"{API_BASE_URL}/ai/query/stream",
+            json={"question": question},
+            # requests 預設送 Accept-Encoding: gzip，串流要逐行轉送，不要壓縮
+            headers={"Accept": "application/x-ndjson", "Accept-Encoding": "identity"},
+            stream=True,
+            timeout=(API_TIMEOUT, AI_API_TIMEOUT),
+        )
+    except Exception as e:
+        return {"error": str(e)}, 500
+
+    if upstream.status_code != 200:
+        upstream.close()
+        return {"error": f"API error {upstream.status_code}"}, upstream.status_code
+
+    def relay():
+        try:
+            for line in upstream.iter_lines():
+                if line:
+                    yield line + b"\n"
+        finally:
+            # 瀏覽器中斷時也釋放連線回連線池
+            upstream.close()
+
+    return Response(
+        stream_with_context(relay()),
+        mimetype="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 # ==========================================
 # 啟動伺服器
 # ==========================================
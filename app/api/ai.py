@@ -1,8 +1,13 @@
-
-from fastapi import APIRouter
+import json
+from fastapi import APIRouter, Request, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
-from app.services.ai_service import generate_sql_query, execute_safe_query
+from typing import List, Dict, Any, Optional, Tuple
+from app.services.ai_service import (
+    generate_sql_query, execute_safe_query, stream_safe_query, describe_query_error, UnsafeQueryError,
+)
+from app.services.ai_query_cache import question_cache
 
 router = APIRouter(prefix="/ai", tags=["AI"])
 
@@ -13,20 +18,117 @@ class QueryResponse(BaseModel):
     sql: str
     results: Optional[List[Dict[str, Any]]] = None
     error: Optional[str] = None
+    cached: bool = False
+
+
+def _is_generation_error(sql: str) -> bool:
+    return sql.startswith("Error") or "INVALID_QUERY" in sql
+
+
+async def _get_sql(question: str) -> Tuple[str, bool]:
+    """回傳 (SQL, 是否來自快取)；相同問題直接使用快取的 SQL，不呼叫 LLM"""
+    sql = await question_cache.get(question)
+    if sql is not None:
+        return sql, True
+    # 在 thread pool 中呼叫 LLM，不阻塞其他請求
+    return await generate_sql_query(question), False
+
 
 @router.post("/query", response_model=QueryResponse)
 async def ask_ai(request: QuestionRequest):
     # 1. Generate SQL
-    sql = generate_sql_query(request.question)
+    sql, cached = await _get_sql(request.question)
     
     # Check for generation errors
-    if sql.startswith("Error") or "INVALID_QUERY" in sql:
+    if _is_generation_error(sql):
         return QueryResponse(sql=sql, error="Generation failed or invalid query: " + sql)
     
     # 2. Execute SQL
     results_or_error = await execute_safe_query(sql)
     
     if isinstance(results_or_error, dict) and "error" in results_or_error:
-        return QueryResponse(sql=sql, error=results_or_error["error"])
-        
-    return QueryResponse(sql=sql, results=results_or_error)
+        if cached:
+            # 快取的 SQL 已經不能用 (例如 schema 變更)，下次重新產生
+            await question_cache.discard(request.question)
+        return QueryResponse(sql=sql, error=results_or_error["error"], cached=cached)
+
+    # 只快取執行成功的 SQL
+    if not cached:
+        await question_cache.set(request.question, sql)
+    return QueryResponse(sql=sql, results=results_or_error, cached=cached)
+
+
+# --- 串流版本 ---
+# 事件依序為:
+#   {"type": "sql", "sql": ..., "cached": bool}     產生 SQL 後立即送出
+#   {"type": "rows", "rows": [...]}                 資料庫每取回一批就送出
+#   {"type": "done", "row_count": n, "truncated": bool}
+#   {"type": "error", "error": ...}                 任何階段失敗時送出並結束
+
+SSE_MEDIA_TYPE = "text/event-stream"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def _encode_event(event: dict, sse: bool) -> str:
+    data = json.dumps(jsonable_encoder(event), ensure_ascii=False)
+    if sse:
+        return f"event: {event['type']}\ndata: {data}\n\n"
+    return data + "\n"
+
+
+async def _query_events(question: str):
+    sql, cached = await _get_sql(question)
+    if _is_generation_error(sql):
+        yield {"type": "error", "sql": sql, "error": "Generation failed or invalid query: " + sql}
+        return
+    yield {"type": "sql", "sql": sql, "cached": cached}
+
+    try:
+        async for chunk in stream_safe_query(sql):
+            if isinstance(chunk, list):
+                yield {"type": "rows", "rows": chunk}
+            else:
+                if not cached:
+                    await question_cache.set(question, sql)
+                yield {"type": "done", **chunk}
+    except Exception as e:
+        if cached:
+            await question_cache.discard(question)
+        if not isinstance(e, UnsafeQueryError):
+            print(f"Database Execution Error: {e}")
+        yield {"type": "error", "error": str(e) if isinstance(e, UnsafeQueryError) else describe_query_error(e)}
+
+
+@router.post(
+    "/query/stream",
+    response_class=StreamingResponse,
+    responses={200: {"content": {NDJSON_MEDIA_TYPE: {}, SSE_MEDIA_TYPE: {}}}},
+)
+async def ask_ai_stream(body: QuestionRequest, request: Request):
+    """
+    與 /query 相同，但以串流回傳: 先送出產生的 SQL，再隨資料庫取回逐批送出資料列。
+    預設為 NDJSON (每行一個事件)；Accept: text/event-stream 時改用 SSE 格式。
+    """
+    sse = SSE_MEDIA_TYPE in request.headers.get("accept", "")
+
+    async def body_iterator():
+        async for event in _query_events(body.question):
+            yield _encode_event(event, sse)
+
+    return StreamingResponse(
+        body_iterator(),
+        media_type=SSE_MEDIA_TYPE if sse else NDJSON_MEDIA_TYPE,
+        # 避免反向代理 (nginx) 緩衝整個回應
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/cache")
+async def get_cache_stats():
+    """問題 → SQL 快取的命中 / 未命中次數 (每個 worker 各自計算)"""
+    return question_cache.stats()
+
+@router.delete("/cache", status_code=status.HTTP_204_NO_CONTENT)
+async def clear_cache():
+    await question_cache.clear()
+    return None
@@ -0,0 +1,51 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from typing import Literal, Optional
+from datetime import date, timedelta
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.database import get_db
+from app.core.conditional import check_not_modified
+from app.models.movement_rollup import MovementRollup
+from app.models.stock_movement import StockMovement
+from app.services.movement_rollups import get_movement_series
+
+router = APIRouter(prefix="/analytics", tags=["Analytics"])
+
+# 單一序列最多的點數 (例如 day 最多約 3 年)
+MAX_POINTS = 1100
+
+
+@router.get("/movements")
+async def get_movements(
+    request: Request,
+    response: Response,
+    bucket: Literal["day", "week", "month"] = Query("day", description="分組週期 (week 以週一開始)"),
+    start: Optional[date] = Query(None, description="起始日 (含)，預設為 end 往前 90 天"),
+    end: Optional[date] = Query(None, description="結束日 (含)，預設為今天"),
+    product_id: Optional[int] = Query(None),
+    warehouse_id: Optional[int] = Query(None),
+    group_by: Optional[Literal["product", "warehouse"]] = Query(None, description="每個商品 / 倉庫各一條序列"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    進貨量 (in) / 領料量 (out) 的時間序列，直接讀每日彙總表 (movementrollup)。
+    數量依單據日期計入；單據修改或刪除後已反映在彙總中。
+    """
+    end = end or date.today()
+    start = start or end - timedelta(days=90)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must be on or before end")
+    days = (end - start).days + 1
+    points = {"day": days, "week": days // 7 + 1, "month": days // 28 + 1}[bucket]
+    if points > MAX_POINTS:
+        raise HTTPException(status_code=400, detail=f"Range too large for bucket={bucket} (max {MAX_POINTS} points)")
+
+    # 彙總只會隨追加異動 (stockmovement 版本) 或重建 (movementrollup 版本) 而改變
+    cached = await check_not_modified(
+        request, response, db, [StockMovement.__tablename__, MovementRollup.__tablename__], request.url.query, start, end,
+    )
+    if cached:
+        return cached
+
+    series = await get_movement_series(db, bucket, start, end, product_id, warehouse_id, group_by)
+    return {"bucket": bucket, "start": start, "end": end, "series": series}
@@ -1,21 +1,45 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Query
 from sqlalchemy import func, case, text, select
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 from datetime import date, datetime
 from typing import List, Dict, Any
 
-from app.core.database import get_db
+from app.core.database import get_db_session_context
+from app.core.cache import dashboard_cache
 from app.models.product import Product
-from app.models.inbound_order import InboundOrder, InboundDetail
-from app.models.requisition import Requisition, ReqDetail
+from app.models.inbound_order import InboundOrder
+from app.models.requisition import Requisition
+from app.models.stock_level import StockLevel
 from app.models.staff import Staff
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
+def monthly_inbound_statement(month_start: date):
+    """本月進貨單數 (Filter by ioDate >= first day of month)"""
+    return select(func.count(InboundOrder.InboundID)).where(InboundOrder.ioDate >= month_start)
+
+def monthly_requisition_statement(month_start: date):
+    """本月領料單數"""
+    return select(func.count(Requisition.ReqID)).where(Requisition.reDate >= month_start)
+
 @router.get("/")
-async def get_dashboard_stats(db: AsyncSession = Depends(get_db)):
+async def get_dashboard_stats(
+    low_stock_limit: int = Query(20, ge=1, le=100, description="庫存警示最多回傳 N 筆"),
+):
+    # 快取 key 含日期 (月份 KPI 依今天計算)；進貨單 / 領料單 / 商品寫入時整組失效
     today = date.today()
+    return await dashboard_cache.get_or_load(
+        f"{today.isoformat()}:{low_stock_limit}",
+        lambda: _load_dashboard_stats(today, low_stock_limit),
+    )
+
+async def _load_dashboard_stats(today: date, low_stock_limit: int):
+    # 使用獨立 Session: 這個計算可能被多個併發請求共用 (single-flight)，不能綁在某個請求的 Session 上
+    async with get_db_session_context() as db:
+        return await _compute_dashboard_stats(db, today, low_stock_limit)
+
+async def _compute_dashboard_stats(db: AsyncSession, today: date, low_stock_limit: int):
     current_month_start = date(today.year, today.month, 1)
 
     # 1. KPIs
@@ -24,50 +48,38 @@ async def get_dashboard_stats(db: AsyncSession = Depends(get_db)):
     total_sku = sku_result.one()
 
     # Monthly Inbound (Filter by ioDate >= first day of month)
-    inbound_result = await db.exec(select(func.count(InboundOrder.InboundID)).where(InboundOrder.ioDate >= current_month_start))
+    inbound_result = await db.exec(monthly_inbound_statement(current_month_start))
     monthly_inbound = inbound_result.one()
 
     # Monthly Requisition
-    req_result = await db.exec(select(func.count(Requisition.ReqID)).where(Requisition.reDate >= current_month_start))
+    req_result = await db.exec(monthly_requisition_statement(current_month_start))
     monthly_req = req_result.one()
 
-    # 2. Low Stock Alerts (< 10)
-    # Strategy: Fetch all Product IDs, then Aggregate In/Out separately to avoid complex massive joins/group-by issues in simple SQL
-    
-    # Get all products
-    products = (await db.exec(select(Product))).all()
-    
-    # Aggregate Inbound by Product
-    in_stmt = select(InboundDetail.ProductID, func.sum(InboundDetail.idQuantity))\
-              .join(InboundOrder)\
-              .where(InboundOrder.Status == 'Completed')\
-              .group_by(InboundDetail.ProductID)
-    in_data = (await db.exec(in_stmt)).all()
-    in_map = {row[0]: row[1] for row in in_data} # {ProductID: TotalIn}
-
-    # Aggregate Outbound by Product
-    out_stmt = select(ReqDetail.ProductID, func.sum(ReqDetail.rdQuantity))\
-               .join(Requisition)\
-               .where(Requisition.Status == 'Completed')\
-               .group_by(ReqDetail.ProductID)
-    out_data = (await db.exec(out_stmt)).all()
-    out_map = {row[0]: row[1] for row in out_data} # {ProductID: TotalOut}
-
-    low_stock_items = []
-    
-    # Calculate Stock
-    for p in products:
-        total_in = in_map.get(p.ProductID, 0)
-        total_out = out_map.get(p.ProductID, 0)
-        current_stock = total_in - total_out
-        
-        if current_stock < 10:
-            low_stock_items.append({
-                "ProductID": p.ProductID,
-                "prName": p.prName,
-                "current_stock": current_stock,
-                "warehouse_hint": "多倉堆放" # Simplified for dashboard view
-            })
+    # 2. Low Stock Alerts (current stock < Product.prReorderLevel)
+    # Single query: products LEFT JOIN per-product stock totals, filtered/ordered/limited in SQL,
+    # so cost scales with the number of alerts instead of the catalog size
+    stock_sq = select(StockLevel.ProductID, func.sum(StockLevel.slQuantity).label("qty"))\
+               .group_by(StockLevel.ProductID)\
+               .subquery()
+    current_stock = func.coalesce(stock_sq.c.qty, 0)
+
+    low_stock_stmt = select(Product.ProductID, Product.prName, current_stock.label("current_stock"), Product.prReorderLevel)\
+                     .outerjoin(stock_sq, stock_sq.c.ProductID == Product.ProductID)\
+                     .where(current_stock < Product.prReorderLevel)\
+                     .order_by(current_stock, Product.ProductID)\
+                     .limit(low_stock_limit)
+    low_stock_rows = (await db.exec(low_stock_stmt)).all()
+
+    low_stock_items = [
+        {
+            "ProductID": row.ProductID,
+            "prName": row.prName,
+            "current_stock": row.current_stock,
+            "reorder_level": row.prReorderLevel,
+            "warehouse_hint": "多倉堆放" # Simplified for dashboard view
+        }
+        for row in low_stock_rows
+    ]
 
     # 3. Recent Activities (Top 5 Mixed)
     # Fetch Top 5 Inbound
@@ -0,0 +1,9 @@
+from fastapi import APIRouter
+from app.core.database import get_pool_status
+
+router = APIRouter(prefix="/health", tags=["Health"])
+
+@router.get("/db")
+async def get_db_health():
+    """資料庫連線池狀態: 目前使用中 / 閒置 / 溢出連線數，以及取得連線的平均與最大等待時間"""
+    return {"status": "ok", "pool": get_pool_status()}
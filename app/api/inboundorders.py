@@ -1,23 +1,28 @@
-from fastapi import APIRouter, HTTPException, Query, status, Depends
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status, Depends
 from typing import List, Optional
 from datetime import date
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy.orm import selectinload
+from sqlalchemy.exc import IntegrityError
 
-from app.schemas.inboundorder import InboundOrder as InboundOrderSchema, InboundOrderCreate, InboundOrderRead
+from app.schemas.inboundorder import (
+    InboundOrder as InboundOrderSchema, InboundOrderCreate, InboundOrderRead, InboundImportResult,
+    InboundDetail as InboundDetailSchema, InboundDetailBase, InboundDetailUpdate,
+)
 from app.models.inbound_order import InboundOrder, InboundDetail
+from app.models.warehouse import Warehouse
 from app.core.database import get_db
+from app.core.cache import dashboard_cache
+from app.core.pagination import paginate, set_next_cursor
+from app.services.inbound_import import import_inbound_orders, DEFAULT_CHUNK_SIZE
+from app.services.stock_service import collect_inbound_changes, apply_stock_changes
+from app.services.order_details import merge_details, find_duplicate_products, DuplicateDetailError
 
 router = APIRouter(prefix="/inbound", tags=["Inbound Orders"])
 
-@router.get("/", response_model=List[InboundOrderRead])
-async def get_inbound_orders(
-    io_date: Optional[date] = Query(None, description="篩選進貨日期"),
-    skip: int = Query(0, ge=0),
-    limit: int = Query(10, le=100),
-    db: AsyncSession = Depends(get_db)
-):
+def inbound_orders_statement(io_date: Optional[date], cursor: Optional[str], skip: int, limit: int):
+    """進貨單列表查詢 (scripts/check_query_plans.py 也用這個檢查索引)"""
     statement = select(InboundOrder).options(
         selectinload(InboundOrder.details).options(
             selectinload(InboundDetail.product),
@@ -30,13 +35,24 @@ async def get_inbound_orders(
     if io_date:
         statement = statement.where(InboundOrder.ioDate == io_date)
     
-    # 排序：新單在後 (或依 ID 倒序)
-    statement = statement.order_by(InboundOrder.InboundID.desc())
-    if limit > 0:
-        statement = statement.offset(skip).limit(limit)
+    # 排序：依進貨日期、ID 倒序 (新單在前)；有 cursor 時使用 Keyset 分頁
+    return paginate(statement, [InboundOrder.ioDate, InboundOrder.InboundID], cursor, skip, limit, descending=True)
+
+@router.get("/", response_model=List[InboundOrderRead])
+async def get_inbound_orders(
+    response: Response,
+    io_date: Optional[date] = Query(None, description="篩選進貨日期"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, le=100),
+    cursor: Optional[str] = Query(None, description="分頁游標 (取自上一頁回應的 X-Next-Cursor Header)，有值時忽略 skip"),
+    db: AsyncSession = Depends(get_db)
+):
+    statement = inbound_orders_statement(io_date, cursor, skip, limit)
     
     result = await db.exec(statement)
-    return result.all()
+    orders = result.all()
+    set_next_cursor(response, orders, limit, lambda o: (o.ioDate, o.InboundID))
+    return orders
 
 @router.get("/{inbound_id}", response_model=InboundOrderRead)
 async def get_inbound_order(inbound_id: int, db: AsyncSession = Depends(get_db)):
@@ -58,6 +74,11 @@ async def get_inbound_order(inbound_id: int, db: AsyncSession = Depends(get_db))
 
 @router.post("/", response_model=InboundOrderSchema, status_code=status.HTTP_201_CREATED)
 async def create_inbound_order(order_data: InboundOrderCreate, db: AsyncSession = Depends(get_db)):
+    # 明細主鍵含 ProductID，同一張單重複的商品會在寫入時違反主鍵
+    duplicates = find_duplicate_products(order_data.details)
+    if duplicates:
+        raise HTTPException(status_code=400, detail=f"Duplicate ProductID in details: {duplicates}")
+
     # 1. 建立主單物件
     # 注意：exclude={'details'} 因為 schema 裡的 details 是 List[BaseModel]，
     # 但 model 裡的 details 是 Relationship，我們需要手動處理
@@ -83,12 +104,38 @@ async def create_inbound_order(order_data: InboundOrderCreate, db: AsyncSession
         )
         db.add(new_detail)
     
+    # 3. 同步庫存 (與單據同一個交易)
+    await apply_stock_changes(db, collect_inbound_changes(
+        new_order.Status, order_data.details, source_id=new_order.InboundID, on=new_order.ioDate
+    ))
+
     await db.commit()
+    await dashboard_cache.invalidate()
     # 重新讀取以包含 details
     statement = select(InboundOrder).where(InboundOrder.InboundID == new_order.InboundID).options(selectinload(InboundOrder.details))
     result = await db.exec(statement)
     return result.first()
 
+@router.post("/import", response_model=InboundImportResult)
+async def import_inbound(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$", description="檔案格式，未指定時依 Content-Type 判斷"),
+    chunk_size: int = Query(DEFAULT_CHUNK_SIZE, ge=1, le=5000, description="每個交易寫入的單據數"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    大量匯入進貨單 (Request Body 直接放 CSV 或 NDJSON 檔案內容)。
+    格式說明見 app/services/inbound_import.py；個別單據錯誤會列在 errors，不影響其他單據。
+    """
+    if format is None:
+        content_type = request.headers.get("content-type", "")
+        format = "ndjson" if "json" in content_type else "csv"
+
+    result = await import_inbound_orders(db, request.stream(), fmt=format, chunk_size=chunk_size)
+    if result.orders_created:
+        await dashboard_cache.invalidate()
+    return result
+
 @router.put("/{inbound_id}", response_model=InboundOrderSchema)
 async def update_inbound_order(inbound_id: int, order_data: InboundOrderCreate, db: AsyncSession = Depends(get_db)):
     # 1. 撈取舊資料 (含明細)
@@ -99,38 +146,84 @@ async def update_inbound_order(inbound_id: int, order_data: InboundOrderCreate,
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     
+    # 先沖銷舊單據對庫存的影響 (依舊的 Status、日期與明細)
+    stock_changes = collect_inbound_changes(order.Status, order.details, sign=-1, source_id=inbound_id, on=order.ioDate)
+
     # 2. 更新主單
     order.ioDate = order_data.ioDate
     order.SupplierID = order_data.SupplierID
     order.StaffID = order_data.StaffID
+    order.Status = order_data.Status
     db.add(order)
     
-    # 3. 更新明細 (策略: 刪除舊的 -> 加入新的)
-    # 找出目前所有明細並刪除
-    for detail in order.details:
-        await db.delete(detail)
-        
-    # 加入新明細
-    for d in order_data.details:
-        new_detail = InboundDetail(
+    # 3. 更新明細 (依 ProductID 比對，只新增 / 更新 / 刪除有變動的明細)
+    try:
+        merge_details(order.details, order_data.details, ("idQuantity", "WarehouseID"), lambda d: InboundDetail(
             InboundID=inbound_id,
             ProductID=d.ProductID,
             idQuantity=d.idQuantity,
             WarehouseID=d.WarehouseID
-        )
-        db.add(new_detail)
-        
+        ))
+    except DuplicateDetailError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # 4. 再計入新單據的影響，兩者合併後一次寫入 (異動帳只記錄差額，日期有變時各記一筆)
+    collect_inbound_changes(order.Status, order_data.details, changes=stock_changes, source_id=inbound_id, on=order.ioDate)
+    await apply_stock_changes(db, stock_changes)
+
     await db.commit()
+    await dashboard_cache.invalidate()
     await db.refresh(order)
     return order
 
+@router.patch("/{inbound_id}/details/{product_id}", response_model=InboundDetailSchema)
+async def update_inbound_detail(inbound_id: int, product_id: int, detail_data: InboundDetailUpdate, db: AsyncSession = Depends(get_db)):
+    """只修改單據中的一筆明細 (數量或倉庫)，其他明細與主單不動"""
+    order = await db.get(InboundOrder, inbound_id)
+    detail = await db.get(InboundDetail, (inbound_id, product_id))
+    if not order or not detail:
+        raise HTTPException(status_code=404, detail="Order detail not found")
+
+    # 沖銷舊的明細、計入新的明細 (數量不變且倉庫不變時兩者相抵，不產生異動)
+    changes = detail_data.model_dump(exclude_unset=True, exclude_none=True)
+    if changes.get("idQuantity", detail.idQuantity) <= 0:
+        raise HTTPException(status_code=400, detail="idQuantity must be positive")
+    if "WarehouseID" in changes and not await db.get(Warehouse, changes["WarehouseID"]):
+        raise HTTPException(status_code=400, detail=f"WarehouseID {changes['WarehouseID']} not found")
+
+    old = InboundDetailBase(ProductID=detail.ProductID, idQuantity=detail.idQuantity, WarehouseID=detail.WarehouseID)
+    for key, value in changes.items():
+        setattr(detail, key, value)
+    db.add(detail)
+
+    stock_changes = collect_inbound_changes(order.Status, [old], sign=-1, source_id=inbound_id, on=order.ioDate)
+    collect_inbound_changes(order.Status, [detail], changes=stock_changes, source_id=inbound_id, on=order.ioDate)
+    try:
+        await apply_stock_changes(db, stock_changes)
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="修改失敗：明細資料違反資料庫約束 (如倉庫不存在)。"
+        )
+    await dashboard_cache.invalidate()
+    return detail
+
 @router.delete("/{inbound_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_inbound_order(inbound_id: int, db: AsyncSession = Depends(get_db)):
-    result = await db.get(InboundOrder, inbound_id)
+    statement = select(InboundOrder).where(InboundOrder.InboundID == inbound_id).options(selectinload(InboundOrder.details))
+    result = (await db.exec(statement)).first()
     if not result:
         raise HTTPException(status_code=404, detail="Order not found")
     
+    # 沖銷庫存
+    await apply_stock_changes(db, collect_inbound_changes(
+        result.Status, result.details, sign=-1, source_id=inbound_id, on=result.ioDate
+    ))
+
     # 由於設定了 cascade="all, delete-orphan"，刪除主單會自動刪除明細
     await db.delete(result)
     await db.commit()
+    await dashboard_cache.invalidate()
     return None
\ No newline at end of file
@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Depends, Request, Response
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.schemas.lookups import Lookups
+from app.models.product import Product
+from app.models.supplier import Supplier
+from app.models.warehouse import Warehouse
+from app.models.staff import Staff
+from app.core.database import get_db, get_db_session_context
+from app.core.cache import lookups_cache
+from app.core.conditional import check_not_modified
+
+router = APIRouter(prefix="/lookups", tags=["Lookups"])
+
+MASTER_TABLES = [m.__tablename__ for m in (Product, Supplier, Warehouse, Staff)]
+
+
+@router.get("", response_model=Lookups, responses={304: {"description": "Not Modified (If-None-Match 與目前 ETag 相同)"}})
+async def get_lookups(request: Request, response: Response, db: AsyncSession = Depends(get_db)):
+    """
+    表單下拉選單需要的所有主檔 (商品、供應商、倉庫、員工)，只包含 ID 與名稱。
+    ETag 由主檔的寫入版本組成，帶 If-None-Match 且沒有變動時回 304 (只查一次版本表)。
+    """
+    # 先讀版本再讀資料: 讀取期間若有寫入，ETag 會比資料舊，下次請求就會重新取得
+    cached = await check_not_modified(request, response, db, MASTER_TABLES, "lookups")
+    if cached:
+        return cached
+
+    # 以 ETag 當快取 key，版本改變後自然不會再讀到舊資料
+    return await lookups_cache.get_or_load(response.headers["ETag"], _load_lookups)
+
+
+async def _load_lookups() -> dict:
+    async with get_db_session_context() as db:
+        products = await db.exec(select(Product.ProductID, Product.prName, Product.prSpec).order_by(Product.ProductID))
+        suppliers = await db.exec(select(Supplier.SupplierID, Supplier.suName).order_by(Supplier.SupplierID))
+        warehouses = await db.exec(select(Warehouse.WarehouseID, Warehouse.waName).order_by(Warehouse.WarehouseID))
+        staff = await db.exec(select(Staff.StaffID, Staff.stName).order_by(Staff.StaffID))
+        return {
+            "products": [dict(row._mapping) for row in products.all()],
+            "suppliers": [dict(row._mapping) for row in suppliers.all()],
+            "warehouses": [dict(row._mapping) for row in warehouses.all()],
+            "staff": [dict(row._mapping) for row in staff.all()],
+        }
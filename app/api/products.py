@@ -1,135 +1,134 @@
-from fastapi import APIRouter, HTTPException, Query, status, Depends
+from fastapi import APIRouter, HTTPException, Query, Response, status, Depends, Request
 from typing import List, Optional
+from datetime import date
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy import func
 
 from app.schemas.product import Product as ProductSchema, ProductCreate
 from app.models.product import Product as ProductModel
-from app.models.inbound_order import InboundDetail, InboundOrder
-from app.models.requisition import ReqDetail, Requisition
+from app.models.stock_level import StockLevel
+from app.models.stock_movement import StockMovement
 from app.core.database import get_db
+from app.core.cache import dashboard_cache
+from app.core.pagination import paginate, set_next_cursor
+from app.services.table_versions import bump_table_versions
+from app.core.conditional import check_not_modified
+from app.core.search import apply_search
+from app.services.stock_service import purge_empty_stock_levels
+from app.services.stock_snapshots import get_distribution_as_of, get_stock_as_of
 from sqlalchemy.exc import IntegrityError
 from app.schemas.error import HTTPError
 
 router = APIRouter(prefix="/products", tags=["Products"])
 
+def stock_totals_statement(product_ids: List[int]):
+    """商品列表: 這些商品的目前庫存 (直接查 StockLevel 主鍵，不加總歷史明細)"""
+    return select(StockLevel.ProductID, func.sum(StockLevel.slQuantity))\
+           .where(StockLevel.ProductID.in_(product_ids))\
+           .group_by(StockLevel.ProductID)
+
+def distribution_statement(product_id: int):
+    """單一商品各倉庫存與倉庫名稱 (StockLevel 以 (ProductID, WarehouseID) 為主鍵)"""
+    from app.models.warehouse import Warehouse
+
+    return select(StockLevel.WarehouseID, Warehouse.waName, StockLevel.slQuantity)\
+           .join(Warehouse, StockLevel.WarehouseID == Warehouse.WarehouseID, isouter=True)\
+           .where(StockLevel.ProductID == product_id)\
+           .where(StockLevel.slQuantity != 0) # Only show non-zero
+
 @router.get("/", response_model=List[ProductSchema])
 async def get_products(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0, description="跳過前 N 筆"),
     limit: int = Query(10, le=100, description="限制回傳 N 筆"),
     q: Optional[str] = Query(None, description="搜尋產品名稱或分類"),
+    cursor: Optional[str] = Query(None, description="分頁游標 (取自上一頁回應的 X-Next-Cursor Header)，有值時忽略 skip；搜尋 (q) 時不使用"),
+    as_of: Optional[date] = Query(None, description="current_stock 改為該日結束時的庫存 (由庫存快照 + 之後的異動計算)"),
     db: AsyncSession = Depends(get_db)
 ):
+    # 資料沒有變動時直接回 304，不執行列表查詢
+    # 庫存的版本: stockmovement (每次進貨 / 領料追加) + stocklevel (重建時 bump)
+    cached = await check_not_modified(
+        request, response, db, [ProductModel.__tablename__, StockLevel.__tablename__, StockMovement.__tablename__], request.url.query,
+    )
+    if cached:
+        return cached
+
     statement = select(ProductModel)
     if q:
-        statement = statement.where(
-            (ProductModel.prName.contains(q)) | (ProductModel.prCategory.contains(q))
-        )
-    
-    if limit > 0:
-        statement = statement.offset(skip).limit(limit)
+        # 索引搜尋 (app/core/search.py)，依相關度排序
+        statement = apply_search(statement, ProductModel, q, skip, limit, db.bind.dialect.name)
+    else:
+        statement = paginate(statement, [ProductModel.ProductID], cursor, skip, limit)
     
     result = await db.exec(statement)
     products = result.all()
+    if not q:
+        set_next_cursor(response, products, limit, lambda p: (p.ProductID,))
 
     # Calculate Stock for these products
-    # Note: For strict pagination accuracy we should calc for *only* these IDs, 
-    # but for simplicity and small scale, fetching agg for all or just these is fine.
-    # Let's fetch agg for all (easier query) or filtered by these IDs if list is large.
-    # Given requirements, simple approach is OK.
-    
-    # 1. Get Inbound Sum
-    from app.models.inbound_order import InboundDetail, InboundOrder
-    from app.models.requisition import ReqDetail, Requisition
-    from sqlalchemy import func
-
-    # We need to turn SQLModel objects into Pydantic models to add field
+    # 直接查 StockLevel (主鍵查詢)，不再加總進貨 / 領料歷史明細
     output = []
     
-    # Batch strategy: Get all stock info in one go (or for visible IDs)
     product_ids = [p.ProductID for p in products]
     if not product_ids:
         return []
 
-    in_stmt = select(InboundDetail.ProductID, func.sum(InboundDetail.idQuantity))\
-              .join(InboundOrder)\
-              .where(InboundOrder.Status == 'Completed')\
-              .where(InboundDetail.ProductID.in_(product_ids))\
-              .group_by(InboundDetail.ProductID)
-
-    out_stmt = select(ReqDetail.ProductID, func.sum(ReqDetail.rdQuantity))\
-               .join(Requisition)\
-               .where(Requisition.Status == 'Completed')\
-               .where(ReqDetail.ProductID.in_(product_ids))\
-               .group_by(ReqDetail.ProductID)
-               
-    in_data = (await db.exec(in_stmt)).all()
-    out_data = (await db.exec(out_stmt)).all()
-    
-    in_map = {row[0]: row[1] for row in in_data}
-    out_map = {row[0]: row[1] for row in out_data}
+    if as_of is not None:
+        stock_map = await get_stock_as_of(db, as_of, product_ids)
+    else:
+        stock_map = {row[0]: row[1] for row in (await db.exec(stock_totals_statement(product_ids))).all()}
     
     for p in products:
         p_schema = ProductSchema.model_validate(p)
-        stock = in_map.get(p.ProductID, 0) - out_map.get(p.ProductID, 0)
-        p_schema.current_stock = stock
+        p_schema.current_stock = stock_map.get(p.ProductID, 0)
         output.append(p_schema)
         
     return output
 
 @router.get("/{product_id}/distribution")
-async def get_product_distribution(product_id: int, db: AsyncSession = Depends(get_db)):
+async def get_product_distribution(
+    product_id: int,
+    request: Request,
+    response: Response,
+    as_of: Optional[date] = Query(None, description="改為該日結束時各倉庫的庫存"),
+    db: AsyncSession = Depends(get_db)
+):
     """Get stock distribution by warehouse"""
     from app.models.warehouse import Warehouse
-    
-    # 1. Inbound by Warehouse (only Completed)
-    in_stmt = select(InboundDetail.WarehouseID, func.sum(InboundDetail.idQuantity))\
-              .join(InboundOrder, InboundDetail.InboundID == InboundOrder.InboundID)\
-              .where(InboundDetail.ProductID == product_id)\
-              .where(InboundOrder.Status == 'Completed')\
-              .group_by(InboundDetail.WarehouseID)
-              
-    # 2. Outbound by Warehouse (only Completed)
-    out_stmt = select(ReqDetail.WarehouseID, func.sum(ReqDetail.rdQuantity))\
-               .join(Requisition, ReqDetail.ReqID == Requisition.ReqID)\
-               .where(ReqDetail.ProductID == product_id)\
-               .where(Requisition.Status == 'Completed')\
-               .group_by(ReqDetail.WarehouseID)
-
-    in_res = (await db.exec(in_stmt)).all()
-    out_res = (await db.exec(out_stmt)).all()
-    
-    stock_map = {} # {warehouse_id: stock}
-    
-    for row in in_res:
-        stock_map[row[0]] = stock_map.get(row[0], 0) + row[1]
-    for row in out_res:
-        stock_map[row[0]] = stock_map.get(row[0], 0) - row[1]
-        
-    # Remove zero or negative (if any logic error) entries? Keep for transparency.
-    # We need Warehouse Names
-    results = []
-    
-    if not stock_map:
-         return []
 
-    # Fetch Warehouse Names
-    wh_ids = list(stock_map.keys())
-    warehouses = (await db.exec(select(Warehouse).where(Warehouse.WarehouseID.in_(wh_ids)))).all()
-    wh_name_map = {w.WarehouseID: w.waName for w in warehouses}
+    # 目前 / 回溯的庫存都只會因追加異動 (或重建) 而改變
+    cached = await check_not_modified(
+        request, response, db, [StockLevel.__tablename__, StockMovement.__tablename__, Warehouse.__tablename__], product_id, as_of,
+    )
+    if cached:
+        return cached
+
+    if as_of is not None:
+        stock = {wid: qty for wid, qty in (await get_distribution_as_of(db, as_of, product_id)).items() if qty != 0}
+        names = dict((await db.exec(
+            select(Warehouse.WarehouseID, Warehouse.waName).where(Warehouse.WarehouseID.in_(list(stock)))
+        )).all()) if stock else {}
+        return [{"warehouse": names.get(wid) or f"Unknown ({wid})", "stock": qty} for wid, qty in stock.items()]
     
-    for wid, qty in stock_map.items():
-        if qty != 0: # Only show non-zero
-            results.append({
-                "warehouse": wh_name_map.get(wid, f"Unknown ({wid})"),
-                "stock": qty
-            })
-            
-    return results
+    # 一次查出各倉庫存與倉庫名稱
+    rows = (await db.exec(distribution_statement(product_id))).all()
+
+    return [
+        {
+            "warehouse": wa_name or f"Unknown ({wid})",
+            "stock": qty
+        }
+        for wid, wa_name, qty in rows
+    ]
 
 @router.get("/{product_id}", response_model=ProductSchema)
-async def get_product(product_id: int, db: AsyncSession = Depends(get_db)):
+async def get_product(product_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_db)):
+    cached = await check_not_modified(request, response, db, [ProductModel.__tablename__], product_id)
+    if cached:
+        return cached
     result = await db.get(ProductModel, product_id)
     if not result:
         raise HTTPException(status_code=404, detail="Product not found")
@@ -139,7 +138,9 @@ async def get_product(product_id: int, db: AsyncSession = Depends(get_db)):
 async def create_product(product: ProductCreate, db: AsyncSession = Depends(get_db)):
     new_product = ProductModel.model_validate(product)
     db.add(new_product)
+    await bump_table_versions(db, ProductModel.__tablename__)
     await db.commit()
+    await dashboard_cache.invalidate()
     await db.refresh(new_product)
     return new_product
 
@@ -154,7 +155,9 @@ async def update_product(product_id: int, updated_product: ProductCreate, db: As
         setattr(db_product, key, value)
         
     db.add(db_product)
+    await bump_table_versions(db, ProductModel.__tablename__)
     await db.commit()
+    await dashboard_cache.invalidate()
     await db.refresh(db_product)
     return db_product
 
@@ -171,7 +174,10 @@ async def delete_product(product_id: int, db: AsyncSession = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Product not found")
     
     try:
+        # 庫存已歸零的 StockLevel 不算關聯資料，先清掉
+        await purge_empty_stock_levels(db, product_id=product_id)
         await db.delete(db_product)
+        await bump_table_versions(db, ProductModel.__tablename__)
         await db.commit()
     except IntegrityError:
         await db.rollback()
@@ -179,4 +185,5 @@ async def delete_product(product_id: int, db: AsyncSession = Depends(get_db)):
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="無法刪除：該商品尚有庫存紀錄或存在於交易單據中(如進貨單、領料單)。"
         )
+    await dashboard_cache.invalidate()
     return None
\ No newline at end of file
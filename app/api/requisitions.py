@@ -1,24 +1,28 @@
-from fastapi import APIRouter, HTTPException, Query, status, Depends
+from fastapi import APIRouter, HTTPException, Query, Response, status, Depends
 from typing import List, Optional
 from datetime import date
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy.orm import selectinload # 用於預加載關聯
 
-from app.schemas.requisition import Requisition as RequisitionSchema, RequisitionCreate, RequisitionRead
+from app.schemas.requisition import (
+    Requisition as RequisitionSchema, RequisitionCreate, RequisitionRead, RequisitionBatchResult,
+    ReqDetail as ReqDetailSchema, ReqDetailBase, ReqDetailUpdate,
+)
 from app.models.requisition import Requisition, ReqDetail
+from app.models.warehouse import Warehouse
 from app.core.database import get_db
+from app.core.cache import dashboard_cache
+from app.core.pagination import paginate, set_next_cursor
+from app.services.requisition_batch import create_requisitions_batch, MAX_BATCH_SIZE
+from sqlalchemy.exc import IntegrityError
+from app.services.stock_service import collect_requisition_changes, apply_stock_changes
+from app.services.order_details import merge_details, find_duplicate_products, DuplicateDetailError
 
 router = APIRouter(prefix="/requisitions", tags=["Requisitions"])
 
-@router.get("/", response_model=List[RequisitionRead])
-async def get_requisitions(
-    re_date: Optional[date] = Query(None, description="篩選領料日期"),
-    q: Optional[str] = Query(None, description="搜尋單號或領料原因"),
-    skip: int = Query(0, ge=0),
-    limit: int = Query(10, le=100),
-    db: AsyncSession = Depends(get_db)
-):
+def requisitions_statement(re_date: Optional[date], q: Optional[str], cursor: Optional[str], skip: int, limit: int):
+    """領料單列表查詢 (scripts/check_query_plans.py 也用這個檢查索引)"""
     statement = select(Requisition).options(
         selectinload(Requisition.details).options(
             selectinload(ReqDetail.product),
@@ -35,13 +39,25 @@ async def get_requisitions(
         # 注意: SQLModel 搜尋 ID 通常需轉型，這裡簡化搜尋 Reason 即可，若要搜 ID 需精確匹配
         statement = statement.where(Requisition.reReason.contains(q))
     
-    # 排序：新單在後
-    statement = statement.order_by(Requisition.ReqID.desc())
-    if limit > 0:
-        statement = statement.offset(skip).limit(limit)
+    # 排序：依領料日期、ID 倒序 (新單在前)；有 cursor 時使用 Keyset 分頁
+    return paginate(statement, [Requisition.reDate, Requisition.ReqID], cursor, skip, limit, descending=True)
+
+@router.get("/", response_model=List[RequisitionRead])
+async def get_requisitions(
+    response: Response,
+    re_date: Optional[date] = Query(None, description="篩選領料日期"),
+    q: Optional[str] = Query(None, description="搜尋單號或領料原因"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, le=100),
+    cursor: Optional[str] = Query(None, description="分頁游標 (取自上一頁回應的 X-Next-Cursor Header)，有值時忽略 skip"),
+    db: AsyncSession = Depends(get_db)
+):
+    statement = requisitions_statement(re_date, q, cursor, skip, limit)
     
     result = await db.exec(statement)
-    return result.all()
+    reqs = result.all()
+    set_next_cursor(response, reqs, limit, lambda r: (r.reDate, r.ReqID))
+    return reqs
 
 @router.get("/{req_id}", response_model=RequisitionRead)
 async def get_requisition(req_id: int, db: AsyncSession = Depends(get_db)):
@@ -62,6 +78,11 @@ async def get_requisition(req_id: int, db: AsyncSession = Depends(get_db)):
 
 @router.post("/", response_model=RequisitionSchema, status_code=status.HTTP_201_CREATED)
 async def create_requisition(req_data: RequisitionCreate, db: AsyncSession = Depends(get_db)):
+    # 明細主鍵含 ProductID，同一張單重複的商品會在寫入時違反主鍵
+    duplicates = find_duplicate_products(req_data.details)
+    if duplicates:
+        raise HTTPException(status_code=400, detail=f"Duplicate ProductID in details: {duplicates}")
+
     # 1. 建立主單 (排除 details list)
     new_req = Requisition(**req_data.model_dump(exclude={'details'}))
     
@@ -80,13 +101,44 @@ async def create_requisition(req_data: RequisitionCreate, db: AsyncSession = Dep
         )
         db.add(new_detail)
     
+    # 3. 同步庫存 (與單據同一個交易)
+    await apply_stock_changes(db, collect_requisition_changes(
+        new_req.Status, req_data.details, source_id=new_req.ReqID, on=new_req.reDate
+    ))
+
     await db.commit()
+    await dashboard_cache.invalidate()
     
     # 重新讀取 (包含 details)
     statement = select(Requisition).where(Requisition.ReqID == new_req.ReqID).options(selectinload(Requisition.details))
     result = await db.exec(statement)
     return result.first()
 
+@router.post("/batch", response_model=RequisitionBatchResult)
+async def create_requisitions(items: List[RequisitionCreate], db: AsyncSession = Depends(get_db)):
+    """
+    一次建立多張領料單 (例如交班時產線一起送出)，全部在同一個交易中寫入。
+    每筆的結果依序列在 results: 成功帶 ReqID，驗證失敗帶 error。
+    """
+    if len(items) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"一次最多 {MAX_BATCH_SIZE} 張領料單"
+        )
+
+    try:
+        result = await create_requisitions_batch(db, items)
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="批次寫入失敗：資料違反資料庫約束，整批未寫入。"
+        )
+
+    if result.created:
+        await dashboard_cache.invalidate()
+    return result
+
 @router.put("/{req_id}", response_model=RequisitionSchema)
 async def update_requisition(req_id: int, req_data: RequisitionCreate, db: AsyncSession = Depends(get_db)):
     # 1. 撈取舊資料
@@ -97,36 +149,84 @@ async def update_requisition(req_id: int, req_data: RequisitionCreate, db: Async
     if not req:
         raise HTTPException(status_code=404, detail="Requisition not found")
     
+    # 先沖銷舊單據對庫存的影響 (依舊的 Status、日期與明細)
+    stock_changes = collect_requisition_changes(req.Status, req.details, sign=-1, source_id=req_id, on=req.reDate)
+
     # 2. 更新主單欄位
     req.reDate = req_data.reDate
     req.reReason = req_data.reReason
     req.StaffID = req_data.StaffID
+    req.Status = req_data.Status
     db.add(req)
     
-    # 3. 更新明細 (刪除舊的 -> 加入新的)
-    for detail in req.details:
-        await db.delete(detail)
-        
-    for d in req_data.details:
-        new_detail = ReqDetail(
+    # 3. 更新明細 (依 ProductID 比對，只新增 / 更新 / 刪除有變動的明細)
+    try:
+        merge_details(req.details, req_data.details, ("rdQuantity", "WarehouseID"), lambda d: ReqDetail(
             ReqID=req_id,
             ProductID=d.ProductID,
             rdQuantity=d.rdQuantity,
             WarehouseID=d.WarehouseID
-        )
-        db.add(new_detail)
-        
+        ))
+    except DuplicateDetailError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # 4. 再計入新單據的影響，兩者合併後一次寫入 (異動帳只記錄差額，日期有變時各記一筆)
+    collect_requisition_changes(req.Status, req_data.details, changes=stock_changes, source_id=req_id, on=req.reDate)
+    await apply_stock_changes(db, stock_changes)
+
     await db.commit()
+    await dashboard_cache.invalidate()
     await db.refresh(req)
     return req
 
+@router.patch("/{req_id}/details/{product_id}", response_model=ReqDetailSchema)
+async def update_requisition_detail(req_id: int, product_id: int, detail_data: ReqDetailUpdate, db: AsyncSession = Depends(get_db)):
+    """只修改領料單中的一筆明細 (數量或倉庫)，其他明細與主單不動"""
+    req = await db.get(Requisition, req_id)
+    detail = await db.get(ReqDetail, (req_id, product_id))
+    if not req or not detail:
+        raise HTTPException(status_code=404, detail="Requisition detail not found")
+
+    # 沖銷舊的明細、計入新的明細 (數量不變且倉庫不變時兩者相抵，不產生異動)
+    changes = detail_data.model_dump(exclude_unset=True, exclude_none=True)
+    if changes.get("rdQuantity", detail.rdQuantity) <= 0:
+        raise HTTPException(status_code=400, detail="rdQuantity must be positive")
+    if "WarehouseID" in changes and not await db.get(Warehouse, changes["WarehouseID"]):
+        raise HTTPException(status_code=400, detail=f"WarehouseID {changes['WarehouseID']} not found")
+
+    old = ReqDetailBase(ProductID=detail.ProductID, rdQuantity=detail.rdQuantity, WarehouseID=detail.WarehouseID)
+    for key, value in changes.items():
+        setattr(detail, key, value)
+    db.add(detail)
+
+    stock_changes = collect_requisition_changes(req.Status, [old], sign=-1, source_id=req_id, on=req.reDate)
+    collect_requisition_changes(req.Status, [detail], changes=stock_changes, source_id=req_id, on=req.reDate)
+    try:
+        await apply_stock_changes(db, stock_changes)
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="修改失敗：明細資料違反資料庫約束 (如倉庫不存在)。"
+        )
+    await dashboard_cache.invalidate()
+    return detail
+
 @router.delete("/{req_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_requisition(req_id: int, db: AsyncSession = Depends(get_db)):
-    result = await db.get(Requisition, req_id)
+    statement = select(Requisition).where(Requisition.ReqID == req_id).options(selectinload(Requisition.details))
+    result = (await db.exec(statement)).first()
     if not result:
         raise HTTPException(status_code=404, detail="Requisition not found")
     
+    # 沖銷庫存
+    await apply_stock_changes(db, collect_requisition_changes(
+        result.Status, result.details, sign=-1, source_id=req_id, on=result.reDate
+    ))
+
     # Cascade 設定會自動刪除明細
     await db.delete(result)
     await db.commit()
+    await dashboard_cache.invalidate()
     return None
\ No newline at end of file
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status, Request
 from typing import List, Optional
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
@@ -6,6 +6,10 @@ from sqlmodel.ext.asyncio.session import AsyncSession
 from app.schemas.staff import Staff as StaffSchema, StaffCreate
 from app.models.staff import Staff as StaffModel
 from app.core.database import get_db
+from app.core.pagination import paginate, set_next_cursor
+from app.services.table_versions import bump_table_versions
+from app.core.conditional import check_not_modified
+from app.core.search import apply_search
 from sqlalchemy.exc import IntegrityError
 from app.schemas.error import HTTPError
 
@@ -13,26 +17,38 @@ router = APIRouter(prefix="/staff", tags=["Staff"])
 
 @router.get("/", response_model=List[StaffSchema])
 async def get_all_staff(
+    request: Request,
+    response: Response,
     q: Optional[str] = Query(None, description="搜尋員工姓名或部門"),
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=0, le=100),
+    cursor: Optional[str] = Query(None, description="分頁游標 (取自上一頁回應的 X-Next-Cursor Header)，有值時忽略 skip；搜尋 (q) 時不使用"),
     db: AsyncSession = Depends(get_db) # DI DB Session
 ):
+    # 資料沒有變動時直接回 304，不執行列表查詢
+    cached = await check_not_modified(request, response, db, [StaffModel.__tablename__], request.url.query)
+    if cached:
+        return cached
+
     statement = select(StaffModel)
     
     if q:
-        statement = statement.where(
-            (StaffModel.stName.contains(q)) | (StaffModel.stDept.contains(q))
-        )
-    
-    if limit > 0:
-        statement = statement.offset(skip).limit(limit)
+        # 索引搜尋 (app/core/search.py)，依相關度排序
+        statement = apply_search(statement, StaffModel, q, skip, limit, db.bind.dialect.name)
+    else:
+        statement = paginate(statement, [StaffModel.StaffID], cursor, skip, limit)
     
     result = await db.exec(statement)
-    return result.all()
+    staff_list = result.all()
+    if not q:
+        set_next_cursor(response, staff_list, limit, lambda s: (s.StaffID,))
+    return staff_list
 
 @router.get("/{staff_id}", response_model=StaffSchema)
-async def get_staff(staff_id: int, db: AsyncSession = Depends(get_db)):
+async def get_staff(staff_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_db)):
+    cached = await check_not_modified(request, response, db, [StaffModel.__tablename__], staff_id)
+    if cached:
+        return cached
     result = await db.get(StaffModel, staff_id)
     if not result:
         raise HTTPException(status_code=404, detail="Staff not found")
@@ -44,6 +60,7 @@ async def create_staff(staff: StaffCreate, db: AsyncSession = Depends(get_db)):
     new_staff = StaffModel.model_validate(staff)
     
     db.add(new_staff)
+    await bump_table_versions(db, StaffModel.__tablename__)
     await db.commit()
     await db.refresh(new_staff) # 刷新以取得 DB 自動生成的 StaffID
     return new_staff
@@ -71,6 +88,7 @@ async def update_staff(staff_id: int, updated_staff: StaffCreate, db: AsyncSessi
         setattr(db_staff, key, value)
         
     db.add(db_staff)
+    await bump_table_versions(db, StaffModel.__tablename__)
     await db.commit()
     await db.refresh(db_staff)
     return db_staff
@@ -96,6 +114,7 @@ async def delete_staff(staff_id: int, db: AsyncSession = Depends(get_db)):
         
     try:
         await db.delete(db_staff)
+        await bump_table_versions(db, StaffModel.__tablename__)
         await db.commit()
     except IntegrityError:
         # 捕捉資料庫的關聯錯誤 (Foreign Key Violation)
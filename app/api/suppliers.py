@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, status, Query, Depends
+from fastapi import APIRouter, HTTPException, status, Query, Response, Depends, Request
 from typing import List, Optional
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
@@ -6,6 +6,10 @@ from sqlmodel.ext.asyncio.session import AsyncSession
 from app.schemas.supplier import Supplier as SupplierSchema, SupplierCreate
 from app.models.supplier import Supplier as SupplierModel
 from app.core.database import get_db
+from app.core.pagination import paginate, set_next_cursor
+from app.services.table_versions import bump_table_versions
+from app.core.conditional import check_not_modified
+from app.core.search import apply_search
 from sqlalchemy.exc import IntegrityError
 from app.schemas.error import HTTPError
 
@@ -13,23 +17,37 @@ router = APIRouter(prefix="/suppliers", tags=["Suppliers"])
 
 @router.get("/", response_model=List[SupplierSchema])
 async def get_suppliers(
+    request: Request,
+    response: Response,
     q: Optional[str] = Query(None, description="搜尋供應商名稱"),
     skip: int = Query(0, ge=0),
     limit: int = Query(10, le=100),
+    cursor: Optional[str] = Query(None, description="分頁游標 (取自上一頁回應的 X-Next-Cursor Header)，有值時忽略 skip；搜尋 (q) 時不使用"),
     db: AsyncSession = Depends(get_db)
 ):
+    # 資料沒有變動時直接回 304，不執行列表查詢
+    cached = await check_not_modified(request, response, db, [SupplierModel.__tablename__], request.url.query)
+    if cached:
+        return cached
+
     statement = select(SupplierModel)
     if q:
-        statement = statement.where(SupplierModel.suName.contains(q))
-    
-    if limit > 0:
-        statement = statement.offset(skip).limit(limit)
+        # 索引搜尋 (app/core/search.py)，依相關度排序
+        statement = apply_search(statement, SupplierModel, q, skip, limit, db.bind.dialect.name)
+    else:
+        statement = paginate(statement, [SupplierModel.SupplierID], cursor, skip, limit)
 
     result = await db.exec(statement)
-    return result.all()
+    suppliers = result.all()
+    if not q:
+        set_next_cursor(response, suppliers, limit, lambda s: (s.SupplierID,))
+    return suppliers
 
 @router.get("/{supplier_id}", response_model=SupplierSchema)
-async def get_supplier(supplier_id: int, db: AsyncSession = Depends(get_db)):
+async def get_supplier(supplier_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_db)):
+    cached = await check_not_modified(request, response, db, [SupplierModel.__tablename__], supplier_id)
+    if cached:
+        return cached
     result = await db.get(SupplierModel, supplier_id)
     if not result:
         raise HTTPException(status_code=404, detail="Supplier not found")
@@ -39,6 +57,7 @@ async def get_supplier(supplier_id: int, db: AsyncSession = Depends(get_db)):
 async def create_supplier(supplier: SupplierCreate, db: AsyncSession = Depends(get_db)):
     new_supplier = SupplierModel.model_validate(supplier)
     db.add(new_supplier)
+    await bump_table_versions(db, SupplierModel.__tablename__)
     await db.commit()
     await db.refresh(new_supplier)
     return new_supplier
@@ -54,6 +73,7 @@ async def update_supplier(supplier_id: int, updated_supplier: SupplierCreate, db
         setattr(db_supplier, key, value)
         
     db.add(db_supplier)
+    await bump_table_versions(db, SupplierModel.__tablename__)
     await db.commit()
     await db.refresh(db_supplier)
     return db_supplier
@@ -72,6 +92,7 @@ async def delete_supplier(supplier_id: int, db: AsyncSession = Depends(get_db)):
         
     try:
         await db.delete(db_supplier)
+        await bump_table_versions(db, SupplierModel.__tablename__)
         await db.commit()
     except IntegrityError:
         await db.rollback()
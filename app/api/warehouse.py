@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, Query, status, Depends
+from fastapi import APIRouter, HTTPException, Query, Response, status, Depends, Request
 from typing import List, Optional
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
@@ -6,6 +6,11 @@ from sqlmodel.ext.asyncio.session import AsyncSession
 from app.schemas.warehouse import Warehouse as WarehouseSchema, WarehouseCreate
 from app.models.warehouse import Warehouse as WarehouseModel
 from app.core.database import get_db
+from app.core.pagination import paginate, set_next_cursor
+from app.services.table_versions import bump_table_versions
+from app.core.conditional import check_not_modified
+from app.core.search import apply_search
+from app.services.stock_service import purge_empty_stock_levels
 from sqlalchemy.exc import IntegrityError
 from app.schemas.error import HTTPError
 
@@ -13,28 +18,39 @@ router = APIRouter(prefix="/warehouse", tags=["Warehouse"])
 
 @router.get("/", response_model=List[WarehouseSchema])
 async def get_warehouses(
+    request: Request,
+    response: Response,
     q: Optional[str] = Query(None, description="搜尋倉庫名稱或地點"),
     skip: int = Query(0, ge=0, description="跳過前 N 筆"),
     limit: int = Query(10, le=100, description="限制回傳 N 筆"),
+    cursor: Optional[str] = Query(None, description="分頁游標 (取自上一頁回應的 X-Next-Cursor Header)，有值時忽略 skip；搜尋 (q) 時不使用"),
     db: AsyncSession = Depends(get_db)
 ):
+    # 資料沒有變動時直接回 304，不執行列表查詢
+    cached = await check_not_modified(request, response, db, [WarehouseModel.__tablename__], request.url.query)
+    if cached:
+        return cached
+
     statement = select(WarehouseModel)
     
-    # 搜尋邏輯: 搜尋 名稱 OR 地點
+    # 搜尋邏輯: 搜尋 名稱 OR 地點 (索引搜尋，見 app/core/search.py，依相關度排序)
     if q:
-        statement = statement.where(
-            (WarehouseModel.waName.contains(q)) | (WarehouseModel.waLocation.contains(q))
-        )
-    
-    # 分頁切片
-    if limit > 0:
-        statement = statement.offset(skip).limit(limit)
+        statement = apply_search(statement, WarehouseModel, q, skip, limit, db.bind.dialect.name)
+    else:
+        # 分頁切片 (依 ID 排序，有 cursor 時使用 Keyset 分頁)
+        statement = paginate(statement, [WarehouseModel.WarehouseID], cursor, skip, limit)
     
     result = await db.exec(statement)
-    return result.all()
+    warehouses = result.all()
+    if not q:
+        set_next_cursor(response, warehouses, limit, lambda w: (w.WarehouseID,))
+    return warehouses
 
 @router.get("/{warehouse_id}", response_model=WarehouseSchema)
-async def get_warehouse(warehouse_id: int, db: AsyncSession = Depends(get_db)):
+async def get_warehouse(warehouse_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_db)):
+    cached = await check_not_modified(request, response, db, [WarehouseModel.__tablename__], warehouse_id)
+    if cached:
+        return cached
     result = await db.get(WarehouseModel, warehouse_id)
     if not result:
         raise HTTPException(status_code=404, detail="Warehouse not found")
@@ -46,6 +62,7 @@ async def create_warehouse(warehouse: WarehouseCreate, db: AsyncSession = Depend
     new_warehouse = WarehouseModel.model_validate(warehouse)
     
     db.add(new_warehouse)
+    await bump_table_versions(db, WarehouseModel.__tablename__)
     await db.commit()
     await db.refresh(new_warehouse) # 取得自動生成的 ID
     return new_warehouse
@@ -64,6 +81,7 @@ async def update_warehouse(warehouse_id: int, updated_warehouse: WarehouseCreate
         
     # 3. 儲存
     db.add(db_warehouse)
+    await bump_table_versions(db, WarehouseModel.__tablename__)
     await db.commit()
     await db.refresh(db_warehouse)
     return db_warehouse
@@ -81,7 +99,10 @@ async def delete_warehouse(warehouse_id: int, db: AsyncSession = Depends(get_db)
         raise HTTPException(status_code=404, detail="Warehouse not found")
     
     try:
+        # 庫存已歸零的 StockLevel 不算關聯資料，先清掉
+        await purge_empty_stock_levels(db, warehouse_id=warehouse_id)
         await db.delete(db_warehouse)
+        await bump_table_versions(db, WarehouseModel.__tablename__)
         await db.commit()
     except IntegrityError:
         await db.rollback()
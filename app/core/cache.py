@@ -0,0 +1,125 @@
+# app/core/cache.py
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.core.config import DASHBOARD_CACHE_TTL, LOOKUPS_CACHE_TTL
+
+
+class CacheBackend:
+    """
+    快取儲存介面。預設使用 MemoryCacheBackend (單一 process 內)，
+    若要換成其他儲存 (例如 Redis 或本機替代服務)，實作這四個方法後呼叫 set_cache_backend() 即可。
+    """
+
+    async def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        raise NotImplementedError
+
+    async def delete(self, key: str):
+        raise NotImplementedError
+
+    async def incr(self, key: str) -> int:
+        raise NotImplementedError
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Process 內的 TTL 快取"""
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[Optional[float], Any]] = {}  # {key: (expires_at, value)}
+
+    async def get(self, key: str) -> Optional[Any]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            self._data.pop(key, None)
+            return None
+        return value
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        now = time.monotonic()
+        # 順手清掉過期項目，避免舊世代的 key 一直留在記憶體
+        for k in [k for k, (exp, _) in self._data.items() if exp is not None and exp <= now]:
+            self._data.pop(k, None)
+        self._data[key] = (now + ttl if ttl else None, value)
+
+    async def delete(self, key: str):
+        self._data.pop(key, None)
+
+    async def incr(self, key: str) -> int:
+        value = (await self.get(key) or 0) + 1
+        self._data[key] = (None, value)
+        return value
+
+
+_backend: CacheBackend = MemoryCacheBackend()
+
+
+def set_cache_backend(backend: CacheBackend):
+    global _backend
+    _backend = backend
+
+
+def get_cache_backend() -> CacheBackend:
+    return _backend
+
+
+class CacheNamespace:
+    """
+    一組可以一起失效的快取 (例如儀表板)。
+
+    - 失效: invalidate() 只是把世代號 +1，舊世代的 key 自然不再被讀到，之後靠 TTL 淘汰
+    - Single-flight: 同一個 key 同時有多個請求 miss 時，只有第一個會執行 loader，其餘等待同一個結果
+    - 計算期間若發生失效，結果不寫回快取，避免把舊資料存進新世代
+    """
+
+    def __init__(self, name: str, ttl: float):
+        self.name = name
+        self.ttl = ttl
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def _generation_key(self) -> str:
+        return f"{self.name}:gen"
+
+    async def _generation(self) -> int:
+        return await get_cache_backend().get(self._generation_key()) or 0
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        backend = get_cache_backend()
+        generation = await self._generation()
+        full_key = f"{self.name}:{generation}:{key}"
+
+        value = await backend.get(full_key)
+        if value is not None:
+            return value
+
+        inflight = self._inflight.get(full_key)
+        if inflight is None:
+            inflight = asyncio.ensure_future(self._load(full_key, generation, loader))
+            self._inflight[full_key] = inflight
+            inflight.add_done_callback(lambda _: self._inflight.pop(full_key, None))
+
+        # shield: 某個等待中的請求被取消時，不影響其他正在等同一個結果的請求
+        return await asyncio.shield(inflight)
+
+    async def _load(self, full_key: str, generation: int, loader: Callable[[], Awaitable[Any]]) -> Any:
+        value = await loader()
+        # ttl <= 0 代表停用快取 (仍保留 single-flight)
+        if self.ttl > 0 and await self._generation() == generation:
+            await get_cache_backend().set(full_key, value, self.ttl)
+        return value
+
+    async def invalidate(self):
+        await get_cache_backend().incr(self._generation_key())
+
+
+# 儀表板資料: 進貨單、領料單、商品有寫入時失效
+dashboard_cache = CacheNamespace("dashboard", ttl=DASHBOARD_CACHE_TTL)
+
+# 下拉選單資料: key 即為主檔版本 ETag，不需要 invalidate
+lookups_cache = CacheNamespace("lookups", ttl=LOOKUPS_CACHE_TTL)
@@ -0,0 +1,132 @@
+# app/core/compression.py
+"""
+回應壓縮 Middleware
+
+依 Accept-Encoding 選擇 br (已安裝 brotli 時) 或 gzip，小於 minimum_size 的回應不壓縮。
+串流回應 (StreamingResponse) 逐塊壓縮並 flush，不會等整個回應結束；事件串流 (SSE / NDJSON) 不壓縮。
+只包裝 ASGI send，不依賴 Starlette 內部的 Responder 類別。
+"""
+
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # 選用套件
+    brotli = None
+
+# 這些回應要即時送達用戶端，不壓縮
+EXCLUDED_CONTENT_TYPES = ("text/event-stream", "application/x-ndjson")
+
+
+def _accepted_encodings(accept_encoding: str) -> set:
+    """解析 Accept-Encoding，排除 q=0 的項目"""
+    encodings = set()
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        if name and params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            encodings.add(name.strip())
+    return encodings
+
+
+class GzipCompressor:
+    encoding = "gzip"
+
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # 16 + = gzip 格式
+
+    def compress(self, body: bytes, more_body: bool) -> bytes:
+        # 還有後續內容時 Z_SYNC_FLUSH: 目前為止的資料都送出，用戶端可以先解壓
+        return self._compressor.compress(body) + self._compressor.flush(zlib.Z_SYNC_FLUSH if more_body else zlib.Z_FINISH)
+
+
+class BrotliCompressor:
+    encoding = "br"
+
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, body: bytes, more_body: bool) -> bytes:
+        data = self._compressor.process(body)
+        return data + (self._compressor.flush() if more_body else self._compressor.finish())
+
+
+class _CompressingSend:
+    """包裝單一請求的 send: 依回應的第一塊內容決定是否壓縮"""
+
+    def __init__(self, send: Send, compressor, minimum_size: int):
+        self.send = send
+        self.compressor = compressor
+        self.minimum_size = minimum_size
+        self.start_message: Message = None
+        self.compressing = None  # None = 尚未決定
+
+    async def __call__(self, message: Message):
+        if message["type"] == "http.response.start":
+            # 等第一塊內容才知道大小，先保留
+            self.start_message = message
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            if "content-encoding" in headers or content_type.startswith(EXCLUDED_CONTENT_TYPES):
+                self.compressing = False
+                await self.send(message)
+            return
+
+        if message["type"] != "http.response.body" or self.compressing is False:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressing is None:
+            # 單塊回應小於 minimum_size 時不壓縮；串流回應一律壓縮
+            if not more_body and len(body) < self.minimum_size:
+                self.compressing = False
+                await self.send(self.start_message)
+                await self.send(message)
+                return
+            self.compressing = True
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            headers["Content-Encoding"] = self.compressor.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if more_body:
+                del headers["Content-Length"]
+            else:
+                body = self.compressor.compress(body, more_body=False)
+                headers["Content-Length"] = str(len(body))
+                await self.send(self.start_message)
+                await self.send({"type": "http.response.body", "body": body})
+                return
+            await self.send(self.start_message)
+
+        await self.send({
+            "type": "http.response.body",
+            "body": self.compressor.compress(body, more_body),
+            "more_body": more_body,
+        })
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accepted = _accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+        if brotli is not None and "br" in accepted:
+            compressor = BrotliCompressor(self.brotli_quality)
+        elif "gzip" in accepted:
+            compressor = GzipCompressor(self.gzip_level)
+        else:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _CompressingSend(send, compressor, self.minimum_size))
@@ -0,0 +1,97 @@
+# app/core/conditional.py
+"""
+HTTP 條件式請求 (ETag / If-None-Match、Last-Modified / If-Modified-Since)
+
+ETag 與 Last-Modified 由資料表的寫入版本組成 (見 app/services/table_versions.py)，
+版本沒變時回 304，只需查一次版本表，不需要再查詢與序列化資料。
+"""
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterable, Optional, Tuple
+
+from fastapi import Request, Response, status
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.services.table_versions import TableVersions, get_table_versions
+
+# 要求瀏覽器 / 前端每次都帶 If-None-Match 重新驗證
+REVALIDATE = "no-cache"
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha1("|".join(map(str, parts)).encode()).hexdigest()[:20]
+    return f'"{digest}"'
+
+
+def make_validators(versions: TableVersions, *parts) -> Tuple[str, Optional[datetime]]:
+    """由資料表版本產生 (ETag, Last-Modified)；parts 為其他會影響回應內容的值 (例如查詢參數)"""
+    etag = make_etag(*parts, *(f"{t}:{v}:{ts}" for t, (v, ts) in sorted(versions.items())))
+    timestamps = [ts for _, ts in versions.values() if ts is not None]
+    return etag, max(timestamps) if timestamps else None
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # 可能是多個以逗號分隔的 ETag，比較時忽略弱驗證前綴 W/
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+def _not_modified_since(if_modified_since: Optional[str], last_modified: Optional[datetime]) -> bool:
+    if not if_modified_since or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    # HTTP 日期只精確到秒
+    return last_modified.replace(microsecond=0) <= since
+
+
+def _headers(etag: str, last_modified: Optional[datetime]) -> dict:
+    headers = {"ETag": etag, "Cache-Control": REVALIDATE}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified.astimezone(timezone.utc), usegmt=True)
+    return headers
+
+
+def not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> Optional[Response]:
+    """請求的 If-None-Match (優先) 或 If-Modified-Since 表示資料沒變時回傳 304 Response，否則回傳 None"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        unchanged = etag_matches(if_none_match, etag)
+    else:
+        unchanged = _not_modified_since(request.headers.get("if-modified-since"), last_modified)
+    if unchanged:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=_headers(etag, last_modified))
+    return None
+
+
+def set_etag(response: Response, etag: str, last_modified: Optional[datetime] = None):
+    response.headers.update(_headers(etag, last_modified))
+
+
+async def check_not_modified(
+    request: Request,
+    response: Response,
+    db: AsyncSession,
+    tables: Iterable[str],
+    *parts,
+) -> Optional[Response]:
+    """
+    查詢資料表版本 (一次查詢) 並處理條件式請求:
+    資料沒變時回傳 304 Response，呼叫端直接 return；否則在 response 設定 ETag / Last-Modified 後回傳 None。
+    """
+    versions = await get_table_versions(db, tables)
+    etag, last_modified = make_validators(versions, *parts)
+    cached = not_modified(request, etag, last_modified)
+    if cached is None:
+        set_etag(response, etag, last_modified)
+    return cached
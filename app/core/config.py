@@ -5,3 +5,34 @@ from dotenv import load_dotenv
 load_dotenv()
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+# 指定模型名稱 (未設定時第一次呼叫會自動挑選並快取)
+GEMINI_MODEL = os.getenv("GEMINI_MODEL") or None
+# AI 查詢: 同時呼叫 LLM 的上限 (每個 worker) 與等待秒數 (含排隊時間)
+AI_MAX_CONCURRENCY = int(os.getenv("AI_MAX_CONCURRENCY", "4"))
+AI_TIMEOUT = float(os.getenv("AI_TIMEOUT", "30"))
+# AI 問題 → SQL 快取: 筆數上限與秒數 (任一為 0 = 停用)
+AI_CACHE_SIZE = int(os.getenv("AI_CACHE_SIZE", "256"))
+AI_CACHE_TTL = float(os.getenv("AI_CACHE_TTL", "86400"))
+# AI 產生的 SQL: 最多回傳列數、每批取回列數、EXPLAIN 預估成本上限
+# (連線池與 statement timeout 見 app/core/database.py 的 AI_DATABASE_URL / AI_STATEMENT_TIMEOUT_MS)
+AI_MAX_ROWS = int(os.getenv("AI_MAX_ROWS", "1000"))
+AI_FETCH_SIZE = int(os.getenv("AI_FETCH_SIZE", "200"))
+AI_MAX_QUERY_COST = float(os.getenv("AI_MAX_QUERY_COST", "1000000"))
+
+# 儀表板快取秒數 (0 = 停用快取)
+DASHBOARD_CACHE_TTL = float(os.getenv("DASHBOARD_CACHE_TTL", "30"))
+
+# 下拉選單資料快取秒數 (快取 key 含主檔版本，寫入後不會讀到舊資料；0 = 停用快取)
+LOOKUPS_CACHE_TTL = float(os.getenv("LOOKUPS_CACHE_TTL", "300"))
+
+# JSON 回應的序列化方式: default (FastAPI 內建) | orjson (需安裝 orjson)
+JSON_RESPONSE_CLASS = os.getenv("JSON_RESPONSE_CLASS", "default").lower()
+
+# 回應壓縮: 超過 COMPRESSION_MINIMUM_SIZE bytes 的回應依 Accept-Encoding 使用 br (需安裝 brotli) 或 gzip
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() in ("1", "true", "yes")
+COMPRESSION_MINIMUM_SIZE = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+# 庫存快照週期: daily | monthly (scripts/stock_snapshots.py 依此補齊到上一個期末)
+STOCK_SNAPSHOT_PERIOD = os.getenv("STOCK_SNAPSHOT_PERIOD", "monthly").lower()
@@ -1,11 +1,14 @@
 # app/core/database.py
 import os
+import time
 from sqlmodel import SQLModel, create_engine
 from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
 from contextlib import asynccontextmanager
+from app.core.search import install_search
 
 load_dotenv()
 
@@ -14,6 +17,20 @@ APP_ENV = os.getenv("APP_ENV", "development")
 POSTGRES_URL = os.getenv("DATABASE_URL")
 SQLITE_URL = os.getenv("SQLITE_URL", "sqlite+aiosqlite:///./local_dev.db")
 
+# 連線池設定 (依 worker 數調整，例如 4 個 worker * (POOL_SIZE + MAX_OVERFLOW) 不可超過資料庫 max_connections)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))     # 等待可用連線的秒數
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))     # 連線使用超過 N 秒後重建，-1 = 不重建
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+# echo=True 會印出 SQL 語句，只在需要除錯時打開
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() in ("1", "true", "yes")
+
+# 啟動模式:
+#   auto       - 啟動時 create_all + 檢查 / 寫入初始資料 (開發用)
+#   migrations - 資料表由 Alembic 管理、初始資料由 scripts/seed.py 寫入，啟動時只檢查一次 schema 版本
+DB_STARTUP_MODE = os.getenv("DB_STARTUP_MODE", "migrations" if APP_ENV == "production" else "auto")
+
 # 判斷連線字串
 if APP_ENV == "production":
     DATABASE_URL = POSTGRES_URL
@@ -22,30 +39,158 @@ else:
     DATABASE_URL = SQLITE_URL
     print("🛠️ Using SQLite Database (Development Mode)")
 
+
+def _engine_options(url: str) -> dict:
+    options = {"echo": DB_ECHO, "future": True, "pool_pre_ping": DB_POOL_PRE_PING}
+    # 記憶體 SQLite 使用 StaticPool，不適用連線池大小設定
+    if ":memory:" not in url:
+        options.update(
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+        )
+    return options
+
+
 # 建立 Async Engine
-# echo=True 會印出 SQL 語句，方便開發除錯
-engine = create_async_engine(DATABASE_URL, echo=True, future=True)
+engine = create_async_engine(DATABASE_URL, **_engine_options(DATABASE_URL))
+
+session_options = {}
+if engine.dialect.name == "sqlite":
+    # 單機部署: WAL 等 PRAGMA + 寫入交易排隊 (見 app/core/sqlite.py)
+    from app.core.sqlite import apply_sqlite_profile, SerializedWriteSession, SQLITE_SERIALIZE_WRITES
+    apply_sqlite_profile(engine)
+    if SQLITE_SERIALIZE_WRITES:
+        session_options["sync_session_class"] = SerializedWriteSession
+
+# Session 工廠 (模組層級建立一次，不在每個請求重建)
+async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False, **session_options)
+
+
+# --- AI 查詢專用 Engine ---
+# LLM 產生的 SQL 使用獨立的小連線池，不會佔滿主連線池；連線層級設為唯讀並限制執行時間
+# AI_DATABASE_URL 可指定只有 SELECT 權限的資料庫帳號 (未設定時與主連線相同)
+AI_DATABASE_URL = os.getenv("AI_DATABASE_URL") or DATABASE_URL
+AI_DB_POOL_SIZE = int(os.getenv("AI_DB_POOL_SIZE", "2"))
+AI_DB_MAX_OVERFLOW = int(os.getenv("AI_DB_MAX_OVERFLOW", "0"))
+AI_STATEMENT_TIMEOUT_MS = int(os.getenv("AI_STATEMENT_TIMEOUT_MS", "5000"))
+
+
+def _create_ai_engine():
+    options = _engine_options(AI_DATABASE_URL)
+    if "pool_size" in options:
+        options.update(pool_size=AI_DB_POOL_SIZE, max_overflow=AI_DB_MAX_OVERFLOW)
+
+    if AI_DATABASE_URL.startswith("postgresql"):
+        # asyncpg: 每條連線的預設交易為唯讀，單一語句超過時間由 PostgreSQL 中止
+        options["connect_args"] = {"server_settings": {
+            "default_transaction_read_only": "on",
+            "statement_timeout": str(AI_STATEMENT_TIMEOUT_MS),
+        }}
+
+    ai_engine = create_async_engine(AI_DATABASE_URL, **options)
+    if ai_engine.dialect.name == "sqlite":
+        from app.core.sqlite import apply_sqlite_profile, apply_sqlite_read_only
+        apply_sqlite_profile(ai_engine)
+        apply_sqlite_read_only(ai_engine, AI_STATEMENT_TIMEOUT_MS)
+    return ai_engine
+
+
+ai_engine = _create_ai_engine()
+
+
+# 取得連線等待超過此秒數視為慢取用
+SLOW_CHECKOUT_SECONDS = 0.1
+
+
+class PoolStats:
+    """統計從連線池取得連線所花的時間 (含排隊等待)，用來判斷連線池是否太小"""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.slow_checkouts = 0  # 等待超過 SLOW_CHECKOUT_SECONDS 的次數
+
+    def record(self, wait: float):
+        self.checkouts += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        if wait >= SLOW_CHECKOUT_SECONDS:
+            self.slow_checkouts += 1
+
+
+pool_stats = PoolStats()
+
+
+def get_pool_status() -> dict:
+    """目前連線池狀態 + 取得連線的等待統計"""
+    pool = engine.pool
+    status = {"pool_class": type(pool).__name__}
+    # QueuePool 才有這些數值 (StaticPool / NullPool 沒有)
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        if hasattr(pool, name):
+            status[name] = getattr(pool, name)()
+    status.update(
+        max_overflow=DB_MAX_OVERFLOW,
+        timeout=DB_POOL_TIMEOUT,
+        checkouts=pool_stats.checkouts,
+        avg_wait_ms=round(pool_stats.total_wait / pool_stats.checkouts * 1000, 3) if pool_stats.checkouts else 0.0,
+        max_wait_ms=round(pool_stats.max_wait * 1000, 3),
+        slow_checkouts=pool_stats.slow_checkouts,
+    )
+    return status
+
 
 # 依賴注入用的 Session 產生器
 async def get_db():
-    async_session = sessionmaker(
-        engine, class_=AsyncSession, expire_on_commit=False
-    )
     async with async_session() as session:
+        # 先取得連線並計時，等待時間即為連線池排隊時間
+        start = time.perf_counter()
+        await session.connection()
+        pool_stats.record(time.perf_counter() - start)
         yield session
 
 # 初始化 DB (用於 SQLite 快速建立 Table，正規做法是用 Alembic)
 async def init_db():
+    import app.models  # noqa: F401  註冊所有 Table 到 SQLModel.metadata (腳本可能只 import 了部分 model)
     async with engine.begin() as conn:
         # await conn.run_sync(SQLModel.metadata.drop_all) # 開發初期若要重置可打開
         await conn.run_sync(SQLModel.metadata.create_all)
+        # 搜尋索引 (FTS5 / pg_trgm) 不是 SQLModel 資料表，另外建立
+        await conn.run_sync(install_search)
+
+
+def expected_schema_version() -> str:
+    """程式碼對應的 Alembic 版本 (migrations/ 的 head)，只讀檔案不連資料庫"""
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    config = Config(os.path.join(project_root, "alembic.ini"))
+    return ScriptDirectory.from_config(config).get_current_head()
+
+
+async def check_schema_version():
+    """確認資料庫已 migrate 到程式碼需要的版本 (一次查詢，不做任何 DDL)"""
+    expected = expected_schema_version()
+    try:
+        async with engine.connect() as conn:
+            current = (await conn.execute(text("SELECT version_num FROM alembic_version"))).scalar()
+    except Exception as e:
+        raise RuntimeError(f"Cannot read schema version ({e}). Run `alembic upgrade head` first.")
+
+    if current != expected:
+        raise RuntimeError(
+            f"Database schema is at {current}, but this build expects {expected}. "
+            "Run `alembic upgrade head` before starting the API."
+        )
+    print(f"✅ Database schema version {current}")
 
 
 @asynccontextmanager
 async def get_db_session_context():
     """提供給非 FastAPI Depends 使用的 Context Manager (例如 seed.py)"""
-    async_session = sessionmaker(
-        engine, class_=AsyncSession, expire_on_commit=False
-    )
     async with async_session() as session:
-        yield session
\ No newline at end of file
+        yield session
@@ -0,0 +1,63 @@
+# app/core/pagination.py
+import base64
+import json
+from datetime import date
+from typing import Any, Callable, List, Optional, Sequence
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import tuple_
+
+# 下一頁游標放在回應 Header，回應本體維持原本的 List 格式 (不影響既有前端)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """將排序鍵值編成不透明的游標字串"""
+    raw = json.dumps([v.isoformat() if isinstance(v, date) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence) -> List[Any]:
+    """解回排序鍵值，並依欄位型別轉型 (例如 Date 欄位轉回 date)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("cursor length mismatch")
+        result = []
+        for column, value in zip(columns, values):
+            python_type = column.type.python_type
+            result.append(python_type.fromisoformat(value) if python_type is date else python_type(value))
+        return result
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def paginate(statement, columns: Sequence, cursor: Optional[str], skip: int, limit: int, descending: bool = False):
+    """
+    依 columns 排序並分頁。
+    - 有 cursor: Keyset 分頁 (WHERE (排序鍵) < / > 上一頁最後一筆)，深頁也只需走索引，不受 OFFSET 影響
+    - 無 cursor: 維持原本 offset(skip).limit(limit)
+    columns 最後一個必須是主鍵，確保排序唯一。
+    """
+    statement = statement.order_by(*[c.desc() if descending else c for c in columns])
+
+    if cursor:
+        values = decode_cursor(cursor, columns)
+        if len(columns) == 1:
+            key, value = columns[0], values[0]
+        else:
+            key, value = tuple_(*columns), tuple_(*values)
+        statement = statement.where(key < value if descending else key > value)
+        if limit > 0:
+            statement = statement.limit(limit)
+    elif limit > 0:
+        statement = statement.offset(skip).limit(limit)
+
+    return statement
+
+
+def set_next_cursor(response: Response, rows: Sequence, limit: int, key: Callable[[Any], Sequence[Any]]):
+    """這一頁滿了才代表可能還有下一頁，將最後一筆的排序鍵放進 Header"""
+    if limit > 0 and len(rows) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(key(rows[-1]))
@@ -0,0 +1,32 @@
+# app/core/responses.py
+"""
+JSON 回應類別
+
+JSON_RESPONSE_CLASS=orjson 時以 orjson 序列化 (比標準 json 快，輸出也較精簡)，
+未安裝 orjson 時退回 FastAPI 預設的 JSONResponse。
+"""
+
+from typing import Any, Type
+
+from fastapi.responses import JSONResponse
+
+from app.core.config import JSON_RESPONSE_CLASS
+
+try:
+    import orjson
+except ImportError:  # 選用套件
+    orjson = None
+
+
+class ORJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+def get_default_response_class() -> Type[JSONResponse]:
+    if JSON_RESPONSE_CLASS == "orjson":
+        if orjson is None:
+            print("Warning: JSON_RESPONSE_CLASS=orjson but orjson is not installed, using JSONResponse.")
+            return JSONResponse
+        return ORJSONResponse
+    return JSONResponse
@@ -0,0 +1,159 @@
+# app/core/search.py
+"""
+主檔搜尋 (商品、供應商、員工、倉庫的 q 參數)
+
+原本的 .contains(q) 是 LIKE '%q%'，無法使用索引，每次搜尋都全表掃描。
+- PostgreSQL: pg_trgm GIN 索引，ILIKE '%q%' 可以走索引，以 similarity() 排序
+- SQLite: FTS5 trigram 影子表 (external content)，由 trigger 在寫入時同步，以 bm25() 排序
+兩者都是 3 字元 (trigram) 為單位，搜尋詞少於 3 個字元時退回 LIKE。
+排序: 名稱以搜尋詞開頭的優先 (prefix)，其次依相關度，最後依主鍵。
+
+DDL 由 install_search() 建立 (Alembic migration 與開發模式的 init_db 共用)。
+"""
+
+from typing import Dict, List, Tuple
+
+from sqlalchemy import and_, case, column, func, literal_column, or_, table as table_clause, text
+
+# {資料表: (主鍵欄位, 可搜尋欄位)}，第一個欄位為名稱，用於 prefix 排序
+SEARCH_FIELDS: Dict[str, Tuple[str, List[str]]] = {
+    "product": ("ProductID", ["prName", "prCategory"]),
+    "supplier": ("SupplierID", ["suName"]),
+    "staff": ("StaffID", ["stName", "stDept"]),
+    "warehouse": ("WarehouseID", ["waName", "waLocation"]),
+}
+
+# trigram 索引可以處理的最短搜尋詞
+MIN_TERM_LENGTH = 3
+
+
+def _fts_table(table: str) -> str:
+    return f"{table}_fts"
+
+
+def _trgm_index(table: str, column: str) -> str:
+    return f"ix_{table}_{column.lower()}_trgm"
+
+
+def is_search_object(name: str) -> bool:
+    """FTS5 影子表與 trigram 索引不在 SQLModel metadata 中，Alembic autogenerate 時略過"""
+    return any(name.startswith(_fts_table(t)) for t in SEARCH_FIELDS) or name.endswith("_trgm")
+
+
+# --- DDL ---
+
+def _install_sqlite(connection, table: str, pk: str, columns: List[str]):
+    fts = _fts_table(table)
+    cols = ", ".join(f'"{c}"' for c in columns)
+    new_values = ", ".join(f'new."{c}"' for c in columns)
+    old_values = ", ".join(f'old."{c}"' for c in columns)
+
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": fts}
+    ).first()
+    if not exists:
+        connection.execute(text(
+            f"CREATE VIRTUAL TABLE {fts} USING fts5({cols}, content='{table}', content_rowid='{pk}', tokenize='trigram')"
+        ))
+        # 既有資料建立索引
+        connection.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+    # external content 表不會自動同步，由 trigger 在主表寫入時更新 (API、批次匯入、模擬資料都適用)
+    # batch migration 重建主表時 trigger 會消失，重新執行 install_search() 即可補回
+    connection.execute(text(
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN '
+        f'INSERT INTO {fts}(rowid, {cols}) VALUES (new."{pk}", {new_values}); END'
+    ))
+    connection.execute(text(
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN '
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.\"{pk}\", {old_values}); END"
+    ))
+    connection.execute(text(
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {table} BEGIN '
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.\"{pk}\", {old_values}); "
+        f'INSERT INTO {fts}(rowid, {cols}) VALUES (new."{pk}", {new_values}); END'
+    ))
+
+
+def install_search(connection):
+    """建立搜尋索引 (可重複執行)，connection 為同步 Connection (migration 或 run_sync)"""
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        for table, (_, columns) in SEARCH_FIELDS.items():
+            for column in columns:
+                connection.execute(text(
+                    f'CREATE INDEX IF NOT EXISTS {_trgm_index(table, column)} ON {table} USING gin ("{column}" gin_trgm_ops)'
+                ))
+    elif dialect == "sqlite":
+        for table, (pk, columns) in SEARCH_FIELDS.items():
+            _install_sqlite(connection, table, pk, columns)
+
+
+def uninstall_search(connection):
+    dialect = connection.dialect.name
+    for table, (_, columns) in SEARCH_FIELDS.items():
+        if dialect == "postgresql":
+            for column in columns:
+                connection.execute(text(f"DROP INDEX IF EXISTS {_trgm_index(table, column)}"))
+        elif dialect == "sqlite":
+            fts = _fts_table(table)
+            for suffix in ("ai", "ad", "au"):
+                connection.execute(text(f"DROP TRIGGER IF EXISTS {fts}_{suffix}"))
+            connection.execute(text(f"DROP TABLE IF EXISTS {fts}"))
+
+
+# --- 查詢 ---
+
+def _terms(q: str) -> List[str]:
+    return [t for t in q.split() if t]
+
+
+def _like_filter(columns, terms: List[str]):
+    # 每個詞都要出現在任一欄位中
+    return and_(*[or_(*[c.contains(t, autoescape=True) for c in columns]) for t in terms])
+
+
+def apply_search(statement, model, q: str, skip: int, limit: int, dialect: str):
+    """
+    在 select(model) 加上搜尋條件、相關度排序與 offset 分頁 (dialect 取自 db.bind.dialect.name)。
+    搜尋結果依相關度排序，不提供 Keyset 游標。
+    """
+    table = model.__tablename__
+    pk_name, column_names = SEARCH_FIELDS[table]
+    pk = getattr(model, pk_name)
+    columns = [getattr(model, c) for c in column_names]
+    terms = _terms(q)
+
+    if not terms:
+        return _page(statement.order_by(pk), skip, limit)
+
+    prefix = case((columns[0].startswith(terms[0], autoescape=True), 0), else_=1)
+    indexed = all(len(t) >= MIN_TERM_LENGTH for t in terms)
+
+    if dialect == "sqlite" and indexed:
+        fts = table_clause(_fts_table(table), column("rowid"))
+        fts_name = literal_column(fts.name)
+        # 每個詞以 FTS5 phrase 查詢 (trigram 代表子字串比對)，多個詞為 AND
+        match = " AND ".join('"' + t.replace('"', '""') + '"' for t in terms)
+        statement = statement.join(fts, fts.c.rowid == pk)\
+                             .where(fts_name.op("MATCH")(match))\
+                             .order_by(prefix, func.bm25(fts_name), pk)
+    elif dialect == "postgresql":
+        # ILIKE '%q%' 由 pg_trgm GIN 索引處理 (少於 3 字元時 PostgreSQL 會自行改用掃描)
+        statement = statement.where(and_(*[or_(*[c.ilike(f"%{_escape(t)}%", escape="\\") for c in columns]) for t in terms]))
+        similarity = func.greatest(*[func.similarity(c, q) for c in columns]) if len(columns) > 1 \
+            else func.similarity(columns[0], q)
+        statement = statement.order_by(prefix, similarity.desc(), pk)
+    else:
+        statement = statement.where(_like_filter(columns, terms)).order_by(prefix, pk)
+
+    return _page(statement, skip, limit)
+
+
+def _escape(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _page(statement, skip: int, limit: int):
+    return statement.offset(skip).limit(limit) if limit > 0 else statement
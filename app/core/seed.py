@@ -7,6 +7,11 @@ from app.models.supplier import Supplier
 from app.models.inbound_order import InboundDetail, InboundOrder
 from app.models.warehouse import Warehouse
 from app.models.requisition import Requisition, ReqDetail
+from app.models.stock_level import StockLevel
+from app.models.stock_movement import StockMovement
+from app.models.app_metadata import AppMetadata
+from app.services.stock_service import rebuild_stock_levels, rebuild_stock_ledger
+from app.services.table_versions import bump_table_versions
 
 # --- Seed Staff ---
 INITIAL_STAFF = [
@@ -178,6 +183,18 @@ async def create_initial_data(db: AsyncSession):
         
         await db.commit()
 
+    # 種子單據不經過 API，StockLevel 為空時 (新資料庫或舊資料庫升級) 由歷史明細重建
+    result = await db.exec(select(StockLevel))
+    if not result.first():
+        print("🌱 Rebuilding StockLevel from order history...")
+        await rebuild_stock_levels(db)
+
+    # 庫存異動帳為空時 (新資料庫或舊資料庫升級) 由歷史明細產生
+    result = await db.exec(select(StockMovement.MovementID).limit(1))
+    if not result.first():
+        print("🌱 Building StockMovement ledger from order history...")
+        await rebuild_stock_ledger(db)
+
     try:
         # 1. 重置 Staff
         await db.exec(text("SELECT setval(pg_get_serial_sequence('staff', 'StaffID'), (SELECT MAX(\"StaffID\") FROM staff));"))
@@ -202,4 +219,36 @@ async def create_initial_data(db: AsyncSession):
         print("🔄 PostgreSQL Sequences have been reset.")
         
     except Exception as e:
-        print(f"ℹ️ Sequence reset skipped: {e}")
\ No newline at end of file
+        await db.rollback()
+        print(f"ℹ️ Sequence reset skipped: {e}")
+
+
+# 初始資料版本: 修改上方種子資料 (或新增需要由歷史資料補建的資料表) 時 +1，下次 seed 會重新執行 create_initial_data
+SEED_VERSION = "2"
+SEED_VERSION_KEY = "seed_version"
+
+
+async def get_seed_version(db: AsyncSession):
+    """讀取已寫入的種子資料版本 (單一主鍵查詢)，尚未 seed 時回傳 None"""
+    record = await db.get(AppMetadata, SEED_VERSION_KEY)
+    return record.value if record else None
+
+
+async def seed_database(db: AsyncSession, force: bool = False) -> bool:
+    """
+    寫入初始資料並記錄版本到 AppMetadata。
+    已是目前版本時直接略過 (只花一次查詢)，force=True 時強制重新執行。回傳是否有執行。
+    """
+    if not force and await get_seed_version(db) == SEED_VERSION:
+        return False
+
+    await create_initial_data(db)
+
+    record = await db.get(AppMetadata, SEED_VERSION_KEY) or AppMetadata(key=SEED_VERSION_KEY, value=SEED_VERSION)
+    record.value = SEED_VERSION
+    db.add(record)
+    # 主檔有異動，讓 /lookups 的 ETag 失效
+    await bump_table_versions(db, Staff.__tablename__, Supplier.__tablename__, Product.__tablename__, Warehouse.__tablename__)
+    await db.commit()
+    print(f"🌱 Seed version {SEED_VERSION} recorded.")
+    return True
\ No newline at end of file
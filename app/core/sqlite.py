@@ -0,0 +1,116 @@
+# app/core/sqlite.py
+"""
+單機 (SQLite) 部署的效能設定
+
+1. 每條連線建立時套用 PRAGMA:
+   - journal_mode=WAL: 讀取不會被寫入擋住
+   - synchronous=NORMAL: WAL 模式下安全且比 FULL 快很多
+   - busy_timeout: 遇到鎖時等待而不是立刻回 "database is locked"
+   - cache_size / mmap_size: 加大頁面快取與記憶體映射
+   - foreign_keys=ON: SQLite 預設不檢查外鍵
+2. 同一個 process 內的寫入交易排隊執行 (asyncio.Lock，先到先寫)，
+   避免多個交易同時要升級成寫鎖而互相 BUSY 失敗；純讀取的 Session 不受影響。
+"""
+
+import asyncio
+import os
+import time
+from sqlalchemy import event
+from sqlalchemy.util import await_only
+from sqlmodel import Session
+
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))       # 64 MB
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))  # 256 MB
+SQLITE_SERIALIZE_WRITES = os.getenv("SQLITE_SERIALIZE_WRITES", "true").lower() in ("1", "true", "yes")
+
+_LOCK_KEY = "sqlite_write_lock_held"
+
+
+def apply_sqlite_profile(engine):
+    """在 Engine 的每條新連線上設定 PRAGMA"""
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")  # 負數代表 KB
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+
+def apply_sqlite_read_only(engine, statement_timeout_ms: int):
+    """
+    唯讀連線 (AI 查詢用): PRAGMA query_only 拒絕所有寫入，
+    並以 progress handler 中止執行超過 statement_timeout_ms 的語句 (SQLite 沒有 statement_timeout)。
+    """
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _set_read_only(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+
+        # handler 在 aiosqlite 的執行緒中呼叫，回傳 True 時 SQLite 中止目前語句 (sqlite3.OperationalError: interrupted)
+        deadline = connection_record.info.setdefault("deadline", [None])
+
+        def _check_deadline():
+            return deadline[0] is not None and time.monotonic() > deadline[0]
+
+        dbapi_connection.run_async(lambda conn: conn.set_progress_handler(_check_deadline, 1000))
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _start_deadline(conn, cursor, statement, parameters, context, executemany):
+        conn.info["deadline"][0] = time.monotonic() + statement_timeout_ms / 1000
+
+
+class SerializedWriteSession(Session):
+    """
+    寫入時先取得 process 內的寫鎖，交易結束 (commit / rollback / close) 時釋放。
+    搭配 AsyncSession(sync_session_class=SerializedWriteSession) 使用。
+    """
+
+
+_write_lock = None
+
+
+def _get_write_lock() -> asyncio.Lock:
+    # 延遲建立，確保綁定在實際執行的 event loop 上
+    global _write_lock
+    if _write_lock is None:
+        _write_lock = asyncio.Lock()
+    return _write_lock
+
+
+def _acquire_write_lock(session: Session):
+    if session.info.get(_LOCK_KEY):
+        return
+    # 這些事件在 AsyncSession 的 greenlet 中執行，可以用 await_only 等待 asyncio.Lock
+    await_only(_get_write_lock().acquire())
+    session.info[_LOCK_KEY] = True
+
+
+def _release_write_lock(session: Session):
+    if session.info.pop(_LOCK_KEY, False):
+        _get_write_lock().release()
+
+
+@event.listens_for(SerializedWriteSession, "before_flush")
+def _lock_before_flush(session, flush_context, instances):
+    _acquire_write_lock(session)
+
+
+@event.listens_for(SerializedWriteSession, "do_orm_execute")
+def _lock_before_dml(orm_execute_state):
+    # session.execute(insert / update / delete) 不經過 flush，另外攔截
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        _acquire_write_lock(orm_execute_state.session)
+
+
+@event.listens_for(SerializedWriteSession, "after_transaction_end")
+def _unlock_after_transaction(session, transaction):
+    if transaction.parent is None:
+        _release_write_lock(session)
@@ -2,38 +2,57 @@ from fastapi import FastAPI, Request
 from app.api import products, requisitions, staffs, suppliers, inboundorders, warehouse, ai
 
 from contextlib import asynccontextmanager
-from app.core.database import init_db, get_db_session_context
-from app.core.seed import create_initial_data
+from app.core.database import init_db, get_db_session_context, get_pool_status, check_schema_version, DB_STARTUP_MODE
+from app.core.seed import seed_database
+from app.services.ai_service import shutdown_ai_executor
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # 啟動時建立資料庫 Tables (SQLModel)
-    await init_db()
-
-    is_need_seed = True
-    if is_need_seed:
-        from app.core.database import engine
-        from sqlmodel.ext.asyncio.session import AsyncSession
-        from sqlalchemy.orm import sessionmaker
-        
-        async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
-        
-        async with async_session() as session:
-            await create_initial_data(session)
+    if DB_STARTUP_MODE == "migrations":
+        # 正式環境: 資料表由 Alembic 管理、初始資料由 scripts/seed.py 寫入
+        # Worker 啟動不做任何 DDL，只確認 schema 版本
+        await check_schema_version()
+    else:
+        # 開發環境: 啟動時建立資料庫 Tables (SQLModel)，初始資料已是最新版本時只花一次查詢
+        await init_db()
+        async with get_db_session_context() as session:
+            await seed_database(session)
 
     yield
 
-app = FastAPI(title="物流倉儲管理系統 API", version="1.0.0", lifespan=lifespan)
+    shutdown_ai_executor()
+    # 關閉時輸出連線池統計，方便依 worker 數調整 DB_POOL_SIZE / DB_MAX_OVERFLOW
+    print(f"📊 DB pool stats: {get_pool_status()}")
+
+from app.core.responses import get_default_response_class
+app = FastAPI(
+    title="物流倉儲管理系統 API",
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=get_default_response_class(),
+)
 
 from fastapi.middleware.cors import CORSMiddleware
+from app.core.pagination import NEXT_CURSOR_HEADER
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"], # For dev only
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
+from app.core.config import COMPRESSION_ENABLED, COMPRESSION_MINIMUM_SIZE, GZIP_LEVEL, BROTLI_QUALITY
+from app.core.compression import CompressionMiddleware
+if COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=COMPRESSION_MINIMUM_SIZE,
+        gzip_level=GZIP_LEVEL,
+        brotli_quality=BROTLI_QUALITY,
+    )
+
 app.include_router(products.router, prefix="/api/v1")
 app.include_router(suppliers.router, prefix="/api/v1")
 app.include_router(staffs.router, prefix="/api/v1")
@@ -45,6 +64,12 @@ from app.api import dashboard
 app.include_router(dashboard.router, prefix="/api/v1")
 from app.api import auth
 app.include_router(auth.router, prefix="/api/v1")
+from app.api import health
+app.include_router(health.router, prefix="/api/v1")
+from app.api import lookups
+app.include_router(lookups.router, prefix="/api/v1")
+from app.api import analytics
+app.include_router(analytics.router, prefix="/api/v1")
 
 @app.get("/")
 async def root():
@@ -3,4 +3,11 @@ from .supplier import Supplier
 from .product import Product
 from .warehouse import Warehouse
 from .inbound_order import InboundOrder, InboundDetail
-from .requisition import Requisition, ReqDetail
\ No newline at end of file
+from .requisition import Requisition, ReqDetail
+from .stock_level import StockLevel
+from .app_metadata import AppMetadata
+from .table_version import TableVersion
+from .ai_query_cache import AiQueryCache
+from .stock_movement import StockMovement
+from .stock_snapshot import StockSnapshot, StockSnapshotRun
+from .movement_rollup import MovementRollup
\ No newline at end of file
@@ -0,0 +1,11 @@
+from datetime import datetime
+from sqlmodel import Field, SQLModel
+
+# --- AI 查詢快取 Table ---
+# 正規化後的問題 → LLM 產生的 SQL，重啟後仍可使用 (見 app/services/ai_query_cache.py)
+class AiQueryCache(SQLModel, table=True):
+    question_key: str = Field(primary_key=True)
+    question: str
+    sql: str
+    created_at: datetime
+    last_used_at: datetime = Field(index=True)
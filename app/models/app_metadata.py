@@ -0,0 +1,7 @@
+from sqlmodel import Field, SQLModel
+
+# --- 系統資訊 Table (key / value) ---
+# 例如 seed_version: 記錄初始資料已經寫入，啟動時不需再逐表檢查
+class AppMetadata(SQLModel, table=True):
+    key: str = Field(primary_key=True)
+    value: str
@@ -1,6 +1,7 @@
 from typing import List, Optional
 from datetime import date
 from sqlmodel import Field, SQLModel, Relationship
+from sqlalchemy import Index, text
 from app.schemas.inboundorder import InboundOrderBase, InboundDetailBase
 
 from app.models.product import Product
@@ -9,6 +10,11 @@ from app.models.supplier import Supplier
 from app.models.staff import Staff
 
 class InboundDetail(InboundDetailBase, SQLModel, table=True):
+    # 庫存加總 / 各倉分布依 ProductID (+ WarehouseID) 查詢
+    __table_args__ = (
+        Index("ix_inbounddetail_product_warehouse", "ProductID", "WarehouseID"),
+    )
+
     # (Composite Primary Key): InboundID + ProductID
     InboundID: int = Field(primary_key=True, foreign_key="inboundorder.InboundID")
     ProductID: int = Field(primary_key=True, foreign_key="product.ProductID")
@@ -24,6 +30,19 @@ class InboundDetail(InboundDetailBase, SQLModel, table=True):
 
 # --- 進貨主單 Table ---
 class InboundOrder(SQLModel, table=True):
+    __table_args__ = (
+        # 列表 / Keyset 分頁 / 儀表板本月統計: ORDER BY ioDate DESC, InboundID DESC
+        Index("ix_inboundorder_date_id", "ioDate", "InboundID"),
+        # 只有 Completed 的單據計入庫存 (部分索引)
+        Index(
+            "ix_inboundorder_completed", "InboundID",
+            postgresql_where=text("\"Status\" = 'Completed'"),
+            sqlite_where=text("\"Status\" = 'Completed'"),
+        ),
+        Index("ix_inboundorder_supplier", "SupplierID"),
+        Index("ix_inboundorder_staff", "StaffID"),
+    )
+
     InboundID: Optional[int] = Field(default=None, primary_key=True)
     ioDate: date
     SupplierID: int = Field(foreign_key="supplier.SupplierID")
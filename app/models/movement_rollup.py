@@ -0,0 +1,25 @@
+from datetime import date
+from sqlmodel import Field, SQLModel
+from sqlalchemy import Index
+
+# mrDirection
+IN = "in"
+OUT = "out"
+
+# --- 每日進出量彙總 Table ---
+# 由 StockMovement 依 (日期, 商品, 倉庫, 方向) 加總，趨勢圖表直接讀這張表而不掃描單據明細
+# 進貨單的異動 (含修改時的補償分錄) 計入 in、領料單計入 out，數量皆為正數；調整依正負分別計入 in / out
+# apply_stock_changes 寫入異動時同步累加 (見 app/services/movement_rollups.py)
+class MovementRollup(SQLModel, table=True):
+    __table_args__ = (
+        # 指定商品 / 倉庫的期間趨勢
+        Index("ix_movementrollup_product_date", "ProductID", "mrDate"),
+        Index("ix_movementrollup_warehouse_date", "WarehouseID", "mrDate"),
+    )
+
+    # 主鍵以日期開頭: 全部商品的期間趨勢
+    mrDate: date = Field(primary_key=True)
+    ProductID: int = Field(primary_key=True)
+    WarehouseID: int = Field(primary_key=True)
+    mrDirection: str = Field(primary_key=True)    # in | out
+    mrQuantity: int
@@ -1,6 +1,7 @@
 from typing import List, Optional
 from datetime import date
 from sqlmodel import Field, SQLModel, Relationship
+from sqlalchemy import Index, text
 from app.schemas.requisition import RequisitionBase, ReqDetailBase
 
 from app.models.product import Product
@@ -9,6 +10,11 @@ from app.models.staff import Staff
 
 # --- 領料明細 Table ---
 class ReqDetail(ReqDetailBase, SQLModel, table=True):
+    # 庫存加總 / 各倉分布依 ProductID (+ WarehouseID) 查詢
+    __table_args__ = (
+        Index("ix_reqdetail_product_warehouse", "ProductID", "WarehouseID"),
+    )
+
     # 複合主鍵: ReqID + ProductID
     ReqID: int = Field(primary_key=True, foreign_key="requisition.ReqID")
     ProductID: int = Field(primary_key=True, foreign_key="product.ProductID")
@@ -24,6 +30,18 @@ class ReqDetail(ReqDetailBase, SQLModel, table=True):
 
 # --- 領料主單 Table ---
 class Requisition(RequisitionBase, SQLModel, table=True):
+    __table_args__ = (
+        # 列表 / Keyset 分頁 / 儀表板本月統計: ORDER BY reDate DESC, ReqID DESC
+        Index("ix_requisition_date_id", "reDate", "ReqID"),
+        # 只有 Completed 的單據計入庫存 (部分索引)
+        Index(
+            "ix_requisition_completed", "ReqID",
+            postgresql_where=text("\"Status\" = 'Completed'"),
+            sqlite_where=text("\"Status\" = 'Completed'"),
+        ),
+        Index("ix_requisition_staff", "StaffID"),
+    )
+
     # PK
     ReqID: Optional[int] = Field(default=None, primary_key=True)
     reDate: date
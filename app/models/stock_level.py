@@ -0,0 +1,16 @@
+from sqlmodel import Field, SQLModel
+from sqlalchemy import Index
+
+# --- 即時庫存 Table ---
+# 由進貨單 / 領料單的新增、修改、刪除同步維護 (見 app/services/stock_service.py)
+# 讀取庫存時直接以 (ProductID, WarehouseID) 主鍵查詢，不再加總歷史明細
+class StockLevel(SQLModel, table=True):
+    # 主鍵已涵蓋依 ProductID 查詢；另外為依倉庫查詢 / 刪除倉庫時的清理建索引
+    __table_args__ = (
+        Index("ix_stocklevel_warehouse", "WarehouseID"),
+    )
+
+    # 複合主鍵: ProductID + WarehouseID
+    ProductID: int = Field(primary_key=True, foreign_key="product.ProductID")
+    WarehouseID: int = Field(primary_key=True, foreign_key="warehouse.WarehouseID")
+    slQuantity: int = Field(default=0)
@@ -0,0 +1,33 @@
+from typing import Optional
+from datetime import date, datetime
+from sqlmodel import Field, SQLModel
+from sqlalchemy import Index
+
+# StockMovement.smSource
+INBOUND = "inbound"
+REQUISITION = "requisition"
+ADJUSTMENT = "adjustment"
+
+# --- 庫存異動帳 Table (只新增、不修改) ---
+# 進貨單 / 領料單的新增、修改 (補償分錄)、刪除都會寫入一筆，smBalance 為該商品 × 倉庫在這筆之後的結餘
+# 同一個商品 × 倉庫的最新一筆 (MovementID 最大) 即為目前庫存，與 StockLevel 相同
+# 不設外鍵: 歷史紀錄不應阻擋刪除已沒有庫存的商品 / 倉庫
+class StockMovement(SQLModel, table=True):
+    __table_args__ = (
+        # 依商品 × 倉庫取最新結餘 / 異動歷程
+        Index("ix_stockmovement_location", "ProductID", "WarehouseID", "MovementID"),
+        # 依業務日期查詢 (某日庫存、期間統計)
+        Index("ix_stockmovement_date", "smDate"),
+        # 查詢某張單據造成的異動
+        Index("ix_stockmovement_source", "smSource", "smSourceID"),
+    )
+
+    MovementID: Optional[int] = Field(default=None, primary_key=True)
+    ProductID: int
+    WarehouseID: int
+    smDate: date                        # 業務日期 (單據的進貨 / 領料日期)
+    smQuantity: int                     # 數量變化，入庫為正、出庫為負
+    smBalance: int                      # 此筆之後的結餘
+    smSource: str                       # inbound | requisition | adjustment
+    smSourceID: Optional[int] = None    # InboundID / ReqID
+    smCreatedAt: datetime               # 寫入時間
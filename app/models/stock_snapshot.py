@@ -0,0 +1,20 @@
+from datetime import date, datetime
+from sqlmodel import Field, SQLModel
+
+# --- 庫存快照 Table ---
+# 每個期末 (日 / 月) 各商品 × 倉庫的結存 (依單據日期，smDate <= ssDate 的異動加總)，只存非 0 的列
+# 查詢某日庫存時由最近一次快照 + 之後的異動計算 (見 app/services/stock_snapshots.py)
+class StockSnapshot(SQLModel, table=True):
+    # 主鍵以日期開頭: 查詢某次快照的一批商品
+    ssDate: date = Field(primary_key=True)
+    ProductID: int = Field(primary_key=True)
+    WarehouseID: int = Field(primary_key=True)
+    ssQuantity: int
+
+
+# --- 已建立的快照日期 ---
+# 結存為 0 的商品不會寫入 StockSnapshot，因此另外記錄哪些日期已經有完整快照
+class StockSnapshotRun(SQLModel, table=True):
+    ssDate: date = Field(primary_key=True)
+    ssPeriod: str                       # daily | monthly
+    ssCreatedAt: datetime
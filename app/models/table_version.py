@@ -0,0 +1,10 @@
+from datetime import datetime
+from sqlmodel import Field, SQLModel
+
+# --- 資料表版本 Table ---
+# 主檔 (商品、供應商、倉庫、員工) 每次寫入時 version +1，用來產生 ETag / Last-Modified
+# 與資料寫在同一個交易中，rollback 時版本也不會變
+class TableVersion(SQLModel, table=True):
+    table_name: str = Field(primary_key=True)
+    version: int = 0
+    updated_at: datetime
@@ -16,6 +16,11 @@ class InboundDetailBase(BaseModel):
 class InboundDetail(InboundDetailBase):
     InboundID: int
 
+class InboundDetailUpdate(BaseModel):
+    # PATCH 單一明細: 只更新有傳入的欄位
+    idQuantity: Optional[int] = None
+    WarehouseID: Optional[int] = None
+
 # 進貨主單
 class InboundOrderBase(BaseModel):
     ioDate: date
@@ -23,6 +28,7 @@ class InboundOrderBase(BaseModel):
     StaffID: int
 
 class InboundOrderCreate(InboundOrderBase):
+    Status: str = "Completed"  # 只有 Completed 的單據會計入庫存
     details: List[InboundDetailBase]  # 建立單據時同時傳入多筆明細
 
 class InboundOrder(InboundOrderBase):
@@ -47,4 +53,15 @@ class InboundOrderRead(InboundOrderBase):
     staff: Optional[Staff] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# 大量匯入結果
+class InboundImportError(BaseModel):
+    line: int                 # 檔案行號 (該張單據的第一行)
+    ref: Optional[str] = None # 檔案中的單據參考編號
+    error: str
+
+class InboundImportResult(BaseModel):
+    orders_created: int = 0
+    lines_created: int = 0
+    errors: List[InboundImportError] = []
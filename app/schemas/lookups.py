@@ -0,0 +1,27 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+# 表單下拉選單用的精簡欄位 (欄位名稱與完整資料相同，前端模板可以直接使用)
+
+class ProductOption(BaseModel):
+    ProductID: int
+    prName: str
+    prSpec: Optional[str] = None
+
+class SupplierOption(BaseModel):
+    SupplierID: int
+    suName: str
+
+class WarehouseOption(BaseModel):
+    WarehouseID: int
+    waName: str
+
+class StaffOption(BaseModel):
+    StaffID: int
+    stName: str
+
+class Lookups(BaseModel):
+    products: List[ProductOption]
+    suppliers: List[SupplierOption]
+    warehouses: List[WarehouseOption]
+    staff: List[StaffOption]
@@ -6,6 +6,7 @@ class ProductBase(BaseModel):
     prName: str
     prSpec: Optional[str] = None
     prCategory: str
+    prReorderLevel: int = 10  # 安全庫存量，低於此數量時顯示在儀表板警示
 
 class ProductCreate(ProductBase):
     pass
@@ -18,6 +18,11 @@ class ReqDetail(ReqDetailBase):
     class Config:
         from_attributes = True
 
+class ReqDetailUpdate(BaseModel):
+    # PATCH 單一明細: 只更新有傳入的欄位
+    rdQuantity: Optional[int] = None
+    WarehouseID: Optional[int] = None
+
 # --- 領料主單 (Requisition) ---
 class RequisitionBase(BaseModel):
     reDate: date
@@ -25,6 +30,7 @@ class RequisitionBase(BaseModel):
     StaffID: int
 
 class RequisitionCreate(RequisitionBase):
+    Status: str = "Completed"  # 只有 Completed 的單據會計入庫存
     details: List[ReqDetailBase]  # 建立時傳入明細列表
 
 class Requisition(RequisitionBase):
@@ -46,4 +52,14 @@ class RequisitionRead(RequisitionBase):
     staff: Optional[Staff] = None     # 新增
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# --- 批次建立領料單 ---
+class RequisitionBatchItemResult(BaseModel):
+    index: int                   # 對應 Request 中的第幾筆 (從 0 開始)
+    ReqID: Optional[int] = None  # 建立成功時的單號
+    error: Optional[str] = None  # 驗證失敗原因
+
+class RequisitionBatchResult(BaseModel):
+    created: int = 0
+    results: List[RequisitionBatchItemResult] = []
@@ -0,0 +1,144 @@
+# app/services/ai_query_cache.py
+"""
+AI 查詢快取: 正規化後的問題 → LLM 產生的 SQL
+
+同樣的問題 (例如「哪些商品庫存偏低」) 不再重複呼叫 LLM，直接執行快取的 SQL。
+- 記憶體 LRU (最多 AI_CACHE_SIZE 筆) + TTL (AI_CACHE_TTL 秒)
+- 同時寫入 aiquerycache 資料表，重啟後 (或其他 worker) 仍可使用
+- 只快取執行成功的 SQL；快取的 SQL 執行失敗時 (例如 schema 變更) 移除
+"""
+
+import re
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+
+from sqlalchemy import delete, func, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import select
+
+from app.core.config import AI_CACHE_SIZE, AI_CACHE_TTL
+from app.core.database import get_db_session_context
+from app.models.ai_query_cache import AiQueryCache
+
+# last_used_at 只用來決定資料表超過上限時先刪哪些，精確到這個間隔即可:
+# 讀取時只有超過間隔才寫回，命中快取大多不需要寫入交易
+LAST_USED_RESOLUTION = timedelta(hours=1)
+
+# 問題結尾的標點不影響語意
+_TRAILING_PUNCTUATION = "?？.。!！~～ "
+
+
+def normalize_question(question: str) -> str:
+    """全形轉半形、小寫、合併空白、去掉結尾標點"""
+    text = unicodedata.normalize("NFKC", question).lower()
+    text = re.sub(r"\s+", " ", text).strip()
+    return text.rstrip(_TRAILING_PUNCTUATION)
+
+
+class QuestionCache:
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()  # {key: (expires_at, sql)}
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl > 0
+
+    def _now(self) -> datetime:
+        return datetime.now(timezone.utc)
+
+    def _remember(self, key: str, sql: str, created_at: datetime):
+        self._entries[key] = (created_at.timestamp() + self.ttl, sql)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def get(self, question: str) -> Optional[str]:
+        """回傳快取的 SQL，沒有時回傳 None (並計入 miss)"""
+        if not self.enabled:
+            return None
+        key = normalize_question(question)
+        now = self._now()
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, sql = entry
+            if expires_at > now.timestamp():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return sql
+            self._entries.pop(key, None)
+
+        # 記憶體沒有時查資料表 (重啟後或其他 worker 寫入的)
+        async with get_db_session_context() as db:
+            row = await db.get(AiQueryCache, key)
+            if row is not None and row.created_at > now - timedelta(seconds=self.ttl):
+                if row.last_used_at < now - LAST_USED_RESOLUTION:
+                    await db.execute(update(AiQueryCache).where(AiQueryCache.question_key == key).values(last_used_at=now))
+                    await db.commit()
+                self._remember(key, row.sql, row.created_at)
+                self.hits += 1
+                return row.sql
+
+        self.misses += 1
+        return None
+
+    async def set(self, question: str, sql: str):
+        if not self.enabled:
+            return
+        key = normalize_question(question)
+        now = self._now()
+        self._remember(key, sql, now)
+
+        async with get_db_session_context() as db:
+            insert = pg_insert if db.bind.dialect.name == "postgresql" else sqlite_insert
+            stmt = insert(AiQueryCache).values(question_key=key, question=question, sql=sql, created_at=now, last_used_at=now)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[AiQueryCache.question_key],
+                set_={"question": stmt.excluded.question, "sql": stmt.excluded.sql,
+                      "created_at": stmt.excluded.created_at, "last_used_at": stmt.excluded.last_used_at},
+            )
+            await db.execute(stmt)
+
+            # 資料表也維持上限: 刪除過期的，再刪除最久沒用到的
+            await db.execute(delete(AiQueryCache).where(AiQueryCache.created_at <= now - timedelta(seconds=self.ttl)))
+            count = (await db.exec(select(func.count()).select_from(AiQueryCache))).one()
+            if count > self.max_size:
+                oldest = select(AiQueryCache.question_key).order_by(AiQueryCache.last_used_at).limit(count - self.max_size)
+                await db.execute(delete(AiQueryCache).where(AiQueryCache.question_key.in_(oldest)))
+            await db.commit()
+
+    async def discard(self, question: str):
+        key = normalize_question(question)
+        self._entries.pop(key, None)
+        async with get_db_session_context() as db:
+            await db.execute(delete(AiQueryCache).where(AiQueryCache.question_key == key))
+            await db.commit()
+
+    async def clear(self):
+        self._entries.clear()
+        self.hits = self.misses = 0
+        async with get_db_session_context() as db:
+            await db.execute(delete(AiQueryCache))
+            await db.commit()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+question_cache = QuestionCache(max_size=AI_CACHE_SIZE, ttl=AI_CACHE_TTL)
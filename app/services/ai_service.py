@@ -1,14 +1,22 @@
 
+import asyncio
+import json
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import google.generativeai as genai
 from sqlalchemy import text
-from app.core.config import GEMINI_API_KEY
+from app.core.config import (
+    GEMINI_API_KEY, GEMINI_MODEL, AI_MAX_CONCURRENCY, AI_TIMEOUT, AI_MAX_ROWS, AI_FETCH_SIZE, AI_MAX_QUERY_COST,
+)
+from app.core.database import ai_engine, AI_STATEMENT_TIMEOUT_MS
 
 # Setup Gemini
 if GEMINI_API_KEY:
     genai.configure(api_key=GEMINI_API_KEY)
 else:
     print("Warning: GEMINI_API_KEY is not set.")
-import os
 
 SYSTEM_PROMPT = """
 You are a SQL expert for a Warehouse Management System (WMS).
@@ -33,66 +41,211 @@ Rules:
 6. Important: Primary keys are Capitalized (e.g. 'ProductID', not 'id').
 """
 
-def generate_sql_query(question: str) -> str:
-    if not GEMINI_API_KEY:
-        return "Error: API Key not configured."
-    
-    # Dynamic Model Selection
-    model_name = "gemini-1.5-flash" # Default fallback
+# --- LLM 呼叫 ---
+# google-generativeai 的 SDK 是同步 (阻塞) 的，直接在 async 路由裡呼叫會卡住整個 event loop。
+# 改在專用的 thread pool 執行，同時執行數上限 AI_MAX_CONCURRENCY，整體等待時間上限 AI_TIMEOUT 秒。
+_executor = ThreadPoolExecutor(max_workers=AI_MAX_CONCURRENCY, thread_name_prefix="ai")
+_slots = asyncio.Semaphore(AI_MAX_CONCURRENCY)
+
+# 模型只在第一次使用時選擇一次 (list_models 本身也是一次網路呼叫)
+_model = None
+_model_lock = threading.Lock()
+DEFAULT_MODEL_NAME = "gemini-1.5-flash"
+
+
+def _select_model_name():
+    """回傳 (模型名稱, 是否可快取)；list_models 失敗時先用預設模型，下次再試"""
+    if GEMINI_MODEL:
+        return GEMINI_MODEL, True
+
     print("AI Service: Starting model selection...")
     try:
-        for m in genai.list_models():
-            # print(f"Checking model: {m.name}")
-            if 'generateContent' in m.supported_generation_methods:
-                if 'gemini' in m.name:
-                    model_name = m.name
-                    break
+        for m in genai.list_models(request_options={"timeout": AI_TIMEOUT}):
+            if 'generateContent' in m.supported_generation_methods and 'gemini' in m.name:
+                return m.name, True
     except Exception as e:
         print(f"AI Service Error during model list: {e}")
-        pass
-        
-    print(f"AI Service: Using Model: {model_name}")
-    model = genai.GenerativeModel(model_name)
+        return DEFAULT_MODEL_NAME, False
+    return DEFAULT_MODEL_NAME, True
+
+
+def get_model():
+    global _model
+    if _model is not None:
+        return _model
+    with _model_lock:
+        if _model is not None:
+            return _model
+        model_name, cacheable = _select_model_name()
+        print(f"AI Service: Using Model: {model_name}")
+        model = genai.GenerativeModel(model_name)
+        if cacheable:
+            _model = model
+        return model
+
+
+def _generate_sql_blocking(question: str) -> str:
+    """在 thread pool 中執行"""
+    model = get_model()
     prompt = f"{SYSTEM_PROMPT}\n\nUser Question: {question}\nSQL Query:"
-    
+
     print(f"AI Service: Sending prompt to LLM...")
+    # SDK 本身也設定 timeout，逾時後 thread 會結束而不是一直佔著 pool
+    response = model.generate_content(prompt, request_options={"timeout": AI_TIMEOUT})
+    print(f"AI Service: Response received.")
+    sql = response.text.strip()
+    # Clean up if model adds backticks despite instructions
+    sql = sql.replace("```sql", "").replace("```", "").strip()
+    print(f"AI Service: Generated SQL: {sql}")
+    return sql
+
+
+async def generate_sql_query(question: str) -> str:
+    if not GEMINI_API_KEY:
+        return "Error: API Key not configured."
+
+    async def run():
+        async with _slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(_executor, _generate_sql_blocking, question)
+
     try:
-        response = model.generate_content(prompt)
-        print(f"AI Service: Response received.")
-        sql = response.text.strip()
-        # Clean up if model adds backticks despite instructions
-        sql = sql.replace("```sql", "").replace("```", "").strip()
-        print(f"AI Service: Generated SQL: {sql}")
-        return sql
+        # 排隊等待空位的時間也計入 timeout，尖峰時不會無限堆積
+        return await asyncio.wait_for(run(), timeout=AI_TIMEOUT)
+    except asyncio.TimeoutError:
+        print(f"AI Service: Timed out after {AI_TIMEOUT}s")
+        return f"Error calling AI: timed out after {AI_TIMEOUT:g}s"
     except Exception as e:
         print(f"AI Service Generation Error: {e}")
         return f"Error calling AI: {str(e)}"
 
-from app.core.database import get_db_session_context
+
+def shutdown_ai_executor():
+    _executor.shutdown(wait=False, cancel_futures=True)
+
+# --- 執行 AI 產生的 SQL ---
+# 防護 (見 README「AI 查詢」):
+# 1. 只允許單一 SELECT / WITH 語句
+# 2. 使用唯讀、有 statement timeout 的獨立連線池 (app.core.database.ai_engine)
+# 3. 外層強制 LIMIT AI_MAX_ROWS
+# 4. 執行前 EXPLAIN，預估成本超過 AI_MAX_QUERY_COST 時拒絕
+# 5. 分批取回結果，不一次載入整個結果集
+_UNSAFE_KEYWORDS = re.compile(
+    r"\b(insert|update|delete|drop|alter|create|truncate|grant|revoke|attach|detach|pragma|vacuum|copy)\b",
+    re.IGNORECASE,
+)
+
+
+class UnsafeQueryError(Exception):
+    pass
+
+
+def _prepare_sql(sql: str) -> str:
+    """檢查語句並套上外層 LIMIT"""
+    sql = sql.strip().rstrip(";").strip()
+    if not re.match(r"(select|with)\b", sql, re.IGNORECASE):
+        raise UnsafeQueryError("Only SELECT queries are allowed for safety.")
+    if ";" in sql:
+        raise UnsafeQueryError("Only a single statement is allowed.")
+    if _UNSAFE_KEYWORDS.search(sql):
+        raise UnsafeQueryError("Unsafe query detected.")
+    # 多取一筆用來判斷結果是否被截斷
+    return f"SELECT * FROM ({sql}) AS ai_query LIMIT {AI_MAX_ROWS + 1}"
+
+
+async def _estimate_cost(conn, sql: str) -> float:
+    """
+    PostgreSQL: 規劃器的 Total Cost。
+    SQLite: 沒有成本估計，以 EXPLAIN QUERY PLAN 中每個全表掃描 (SCAN) 的資料表列數相乘估計
+    (巢狀迴圈的 cross join 會相乘，使用索引的 SEARCH 不計)。
+    """
+    if conn.dialect.name == "postgresql":
+        plan = (await conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return float(plan[0]["Plan"]["Total Cost"])
+
+    scans = [row[3].split()[1] for row in (await conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"))).all()
+             if row[3].startswith("SCAN ")]
+    if not scans:
+        return 0.0
+
+    tables = (await conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'table'"))).scalars().all()
+    rows = {}
+    for table in tables:
+        # 語句中出現的資料表與其別名 (FROM product p / JOIN product AS p)
+        names = re.findall(rf"\b{re.escape(table)}\b(?:\s+(?:as\s+)?(\w+))?", sql, re.IGNORECASE)
+        if not names:
+            continue
+        # MAX(rowid) 只讀 B-tree 最右邊的頁，比 COUNT(*) 便宜很多
+        count = (await conn.execute(text(f'SELECT MAX(rowid) FROM "{table}"'))).scalar() or 0
+        for name in [table, *names]:
+            if name:
+                rows[name.lower()] = count
+
+    # 子查詢、CTE 的掃描不是實際資料表 (其來源的掃描已計入)，不列入
+    cost = 1.0
+    for name in scans:
+        cost *= max(rows.get(name.lower(), 1), 1)
+    return cost
+
+
+async def stream_safe_query(sql: str, chunk_size: int = None):
+    """
+    檢查並執行 AI 產生的 SQL，以 list[dict] 分批 yield 結果 (每批最多 chunk_size 筆)。
+    最後 yield 一個 dict: {"row_count": n, "truncated": bool}。
+    不安全或成本過高時拋出 UnsafeQueryError。
+    """
+    chunk_size = chunk_size or AI_FETCH_SIZE
+    limited_sql = _prepare_sql(sql)
+
+    async with ai_engine.connect() as conn:
+        cost = await _estimate_cost(conn, limited_sql)
+        if cost > AI_MAX_QUERY_COST:
+            raise UnsafeQueryError(f"Query is too expensive (estimated cost {cost:,.0f} > {AI_MAX_QUERY_COST:,.0f}).")
+
+        # stream(): PostgreSQL 使用 server-side cursor，SQLite 逐批從 cursor 取出
+        result = await conn.stream(text(limited_sql))
+        row_count = 0
+        truncated = False
+        async for partition in result.mappings().partitions(chunk_size):
+            rows = [dict(row) for row in partition]
+            if row_count + len(rows) > AI_MAX_ROWS:
+                rows = rows[:AI_MAX_ROWS - row_count]
+                truncated = True
+            row_count += len(rows)
+            if rows:
+                yield rows
+            if truncated:
+                break
+        await result.close()
+
+    yield {"row_count": row_count, "truncated": truncated}
+
 
 async def execute_safe_query(sql: str):
     """
     Executes the SQL query if it is a safe SELECT statement.
+    回傳 list[dict]，錯誤時回傳 {"error": 訊息}。
     """
-    # 1. Safety Check
-    if not sql.lower().startswith("select"):
-        return {"error": "Only SELECT queries are allowed for safety."}
-    
-    if "drop" in sql.lower() or "delete" in sql.lower() or "update" in sql.lower() or "insert" in sql.lower():
-         return {"error": "Unsafe query detected."}
-
-    # 2. Execute
     try:
-        async with get_db_session_context() as session:
-            result = await session.exec(text(sql))
-            # Get columns and data
-            # session.exec with text() returns a Result object.
-            # .mappings() converts rows to dict-like objects
-            result = result.mappings().all()
-            
-            # Convert to plain dicts for JSON serialization
-            return [dict(row) for row in result]
-            
+        results = []
+        async for chunk in stream_safe_query(sql):
+            if isinstance(chunk, list):
+                results.extend(chunk)
+            elif chunk["truncated"]:
+                print(f"AI Service: Result truncated to {AI_MAX_ROWS} rows")
+        return results
+    except UnsafeQueryError as e:
+        return {"error": str(e)}
     except Exception as e:
         print(f"Database Execution Error: {e}")
-        return {"error": f"Database error: {str(e)}"}
+        return {"error": describe_query_error(e)}
+
+
+def describe_query_error(error: Exception) -> str:
+    message = str(error)
+    # SQLite progress handler 中止 / PostgreSQL statement_timeout
+    if "interrupted" in message or "statement timeout" in message:
+        return f"Query timed out after {AI_STATEMENT_TIMEOUT_MS} ms."
+    return f"Database error: {message}"
@@ -0,0 +1,209 @@
+"""
+進貨單大量匯入
+
+支援兩種格式，皆以串流方式逐行讀取，不會把整個檔案載入記憶體:
+
+CSV (每列一筆明細，相同 ref 且相鄰的列屬於同一張進貨單；沒有 ref 欄位時以 ioDate+SupplierID+StaffID 分組):
+    ref,ioDate,SupplierID,StaffID,ProductID,idQuantity,WarehouseID[,Status]
+
+NDJSON (每行一個 JSON)，可以是:
+    - 一張完整的進貨單: {"ioDate": ..., "SupplierID": ..., "StaffID": ..., "details": [{...}, ...]}
+    - 或與 CSV 相同欄位的單筆明細 (同樣依 ref 分組)
+
+每 chunk_size 張單據為一個交易，以多列 INSERT 寫入 (PostgreSQL 明細使用 COPY)；
+單筆資料錯誤只會記錄在 errors，不會中斷整個檔案。
+"""
+
+import csv
+import json
+from typing import AsyncIterator, List, Optional
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.inbound_order import InboundOrder, InboundDetail
+from app.schemas.inboundorder import InboundOrderCreate, InboundImportResult, InboundImportError
+from app.services.stock_service import collect_inbound_changes, apply_stock_changes
+from app.services.lookups import MasterDataIds
+
+
+DEFAULT_CHUNK_SIZE = 500
+
+HEADER_FIELDS = ("ioDate", "SupplierID", "StaffID", "Status")
+DETAIL_FIELDS = ("ProductID", "idQuantity", "WarehouseID")
+
+
+class _PendingOrder:
+    def __init__(self, line: int, ref, data: dict):
+        self.line = line
+        self.ref = None if ref is None else str(ref)
+        self.data = data
+        self.order: Optional[InboundOrderCreate] = None
+
+
+def _validate(ids: MasterDataIds, order: InboundOrderCreate) -> Optional[str]:
+    if order.SupplierID not in ids.suppliers:
+        return f"SupplierID {order.SupplierID} not found"
+    if order.StaffID not in ids.staff:
+        return f"StaffID {order.StaffID} not found"
+    return ids.check_details(order.details, "idQuantity")
+
+
+async def _iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8-sig").rstrip("\r")
+    if buffer:
+        yield buffer.decode("utf-8-sig").rstrip("\r")
+
+
+async def _iter_records(chunks: AsyncIterator[bytes], fmt: str) -> AsyncIterator[tuple]:
+    """逐行產生 (行號, dict)，無法解析的行產生 (行號, 錯誤訊息)"""
+    header = None
+    line_no = 0
+    async for line in _iter_lines(chunks):
+        line_no += 1
+        if not line.strip():
+            continue
+        if fmt == "csv":
+            values = next(csv.reader([line]))
+            if header is None:
+                header = [h.strip() for h in values]
+                continue
+            if len(values) != len(header):
+                yield line_no, f"Expected {len(header)} columns, got {len(values)}"
+                continue
+            yield line_no, {k: v.strip() for k, v in zip(header, values) if v.strip() != ""}
+        else:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_no, f"Invalid JSON: {e}"
+                continue
+            if not isinstance(record, dict):
+                yield line_no, "Each line must be a JSON object"
+                continue
+            yield line_no, record
+
+
+async def _iter_orders(chunks: AsyncIterator[bytes], fmt: str, errors: List[InboundImportError]) -> AsyncIterator[_PendingOrder]:
+    """將逐行資料組合成進貨單 (相鄰且同 ref 的明細合併為一張)"""
+    current: Optional[_PendingOrder] = None
+    current_key = None
+
+    async for line_no, record in _iter_records(chunks, fmt):
+        if isinstance(record, str):
+            errors.append(InboundImportError(line=line_no, error=record))
+            continue
+
+        if "details" in record:
+            if current is not None:
+                yield current
+                current, current_key = None, None
+            yield _PendingOrder(line_no, record.get("ref"), record)
+            continue
+
+        ref = record.get("ref")
+        key = ref if ref is not None else tuple(record.get(f) for f in HEADER_FIELDS)
+        if current is None or key != current_key:
+            if current is not None:
+                yield current
+            header = {f: record[f] for f in HEADER_FIELDS if f in record}
+            current = _PendingOrder(line_no, ref, {**header, "details": []})
+            current_key = key
+        current.data["details"].append({f: record.get(f) for f in DETAIL_FIELDS})
+
+    if current is not None:
+        yield current
+
+
+async def _insert_details(db: AsyncSession, rows: List[dict]):
+    if db.bind.dialect.name == "postgresql":
+        # PostgreSQL: 使用 COPY 寫入明細，比多列 INSERT 更快
+        conn = await db.connection()
+        raw = await conn.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            InboundDetail.__tablename__,
+            records=[tuple(r[c] for c in ("InboundID", *DETAIL_FIELDS)) for r in rows],
+            columns=["InboundID", *DETAIL_FIELDS],
+        )
+    else:
+        await db.execute(insert(InboundDetail), rows)
+
+
+async def _write_chunk(db: AsyncSession, pending: List[_PendingOrder]) -> int:
+    """一個交易寫入多張進貨單，回傳明細筆數"""
+    headers = [p.order.model_dump(exclude={"details"}) for p in pending]
+    stmt = insert(InboundOrder).returning(InboundOrder.InboundID, sort_by_parameter_order=True)
+    new_ids = (await db.execute(stmt, headers)).scalars().all()
+
+    detail_rows = []
+    stock_changes = {}
+    for inbound_id, p in zip(new_ids, pending):
+        for d in p.order.details:
+            detail_rows.append({"InboundID": inbound_id, **d.model_dump()})
+        collect_inbound_changes(p.order.Status, p.order.details, changes=stock_changes, source_id=inbound_id, on=p.order.ioDate)
+
+    await _insert_details(db, detail_rows)
+    await apply_stock_changes(db, stock_changes)
+    await db.commit()
+    return len(detail_rows)
+
+
+async def _flush(db: AsyncSession, pending: List[_PendingOrder], result: InboundImportResult):
+    if not pending:
+        return
+    try:
+        result.lines_created += await _write_chunk(db, pending)
+        result.orders_created += len(pending)
+        return
+    except Exception as e:
+        await db.rollback()
+        if len(pending) == 1:
+            result.errors.append(InboundImportError(line=pending[0].line, ref=pending[0].ref, error=f"Database error: {e}"))
+            return
+
+    # 整批失敗時逐張重試，找出是哪一張造成錯誤，其他單據照常寫入
+    for p in pending:
+        try:
+            result.lines_created += await _write_chunk(db, [p])
+            result.orders_created += 1
+        except Exception as e:
+            await db.rollback()
+            result.errors.append(InboundImportError(line=p.line, ref=p.ref, error=f"Database error: {e}"))
+
+
+async def import_inbound_orders(
+    db: AsyncSession,
+    chunks: AsyncIterator[bytes],
+    fmt: str = "csv",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> InboundImportResult:
+    """串流匯入進貨單，chunks 為檔案內容的 bytes 區塊 (例如 request.stream())"""
+    ids = await MasterDataIds.load(db)
+    result = InboundImportResult()
+    pending: List[_PendingOrder] = []
+
+    async for p in _iter_orders(chunks, fmt, result.errors):
+        try:
+            p.order = InboundOrderCreate.model_validate(p.data)
+        except ValidationError as e:
+            result.errors.append(InboundImportError(line=p.line, ref=p.ref, error=str(e).replace("\n", " ")))
+            continue
+
+        error = _validate(ids, p.order)
+        if error:
+            result.errors.append(InboundImportError(line=p.line, ref=p.ref, error=error))
+            continue
+
+        pending.append(p)
+        if len(pending) >= chunk_size:
+            await _flush(db, pending, result)
+            pending = []
+
+    await _flush(db, pending, result)
+    return result
@@ -0,0 +1,44 @@
+from typing import Set
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.product import Product
+from app.models.staff import Staff
+from app.models.supplier import Supplier
+from app.models.warehouse import Warehouse
+
+
+class MasterDataIds:
+    """批次寫入前一次載入所有主檔 ID，逐筆驗證時不需再查資料庫"""
+
+    def __init__(self, products: Set[int], warehouses: Set[int], suppliers: Set[int], staff: Set[int]):
+        self.products = products
+        self.warehouses = warehouses
+        self.suppliers = suppliers
+        self.staff = staff
+
+    @classmethod
+    async def load(cls, db: AsyncSession) -> "MasterDataIds":
+        return cls(
+            products=set((await db.exec(select(Product.ProductID))).all()),
+            warehouses=set((await db.exec(select(Warehouse.WarehouseID))).all()),
+            suppliers=set((await db.exec(select(Supplier.SupplierID))).all()),
+            staff=set((await db.exec(select(Staff.StaffID))).all()),
+        )
+
+    def check_details(self, details, quantity_field: str):
+        """檢查明細的商品 / 倉庫 / 數量，以及同一張單不可重複商品 (明細主鍵含 ProductID)；回傳錯誤訊息或 None"""
+        if not details:
+            return "Order has no details"
+        seen = set()
+        for d in details:
+            if d.ProductID not in self.products:
+                return f"ProductID {d.ProductID} not found"
+            if d.WarehouseID not in self.warehouses:
+                return f"WarehouseID {d.WarehouseID} not found"
+            if getattr(d, quantity_field) <= 0:
+                return f"{quantity_field} must be positive (ProductID {d.ProductID})"
+            if d.ProductID in seen:
+                return f"Duplicate ProductID {d.ProductID} in one order"
+            seen.add(d.ProductID)
+        return None
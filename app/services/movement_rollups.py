@@ -0,0 +1,189 @@
+# app/services/movement_rollups.py
+"""
+每日進出量彙總 (MovementRollup)
+
+趨勢圖表 (各商品 / 倉庫每日、每週、每月的進貨量與領料量) 直接讀彙總表，不掃描單據明細。
+- 寫入: apply_stock_changes 寫入異動時，同一個交易中以 upsert 累加到對應的 (日期, 商品, 倉庫, 方向)
+- 重建: 由 StockMovement 一次 INSERT ... SELECT 產生 (migration 0009、scripts/stock_levels.py rebuild-rollups)
+- 查詢: get_movement_series 在資料庫端依 day / week / month 分組
+"""
+
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import Date, String, case, cast, delete, func, insert, literal
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.movement_rollup import IN, OUT, MovementRollup
+from app.models.stock_movement import INBOUND, REQUISITION, StockMovement
+from app.services.table_versions import bump_table_versions
+
+BUCKETS = ("day", "week", "month")
+
+
+def direction_of(source: str, quantity: int) -> Tuple[str, int]:
+    """異動 → (方向, 計入該方向的數量)；進貨單的沖銷為負的 in，而不是 out"""
+    if source == INBOUND or (source != REQUISITION and quantity > 0):
+        return IN, quantity
+    return OUT, -quantity
+
+
+# --- 寫入 ---
+
+async def add_to_rollups(db: AsyncSession, movements: Iterable[Tuple[int, int, date, str, int]]):
+    """
+    將異動 (ProductID, WarehouseID, smDate, smSource, smQuantity) 累加到每日彙總。
+    同一格的多筆異動先在記憶體合併，只執行一次 upsert。不 commit。
+    """
+    totals: Dict[tuple, int] = {}
+    for pid, wid, on, source, quantity in movements:
+        direction, amount = direction_of(source, quantity)
+        key = (on, pid, wid, direction)
+        totals[key] = totals.get(key, 0) + amount
+    # 依 (商品, 倉庫, 日期) 排序: 併發交易以相同順序鎖定彙總列，避免死結
+    ordered = sorted(totals.items(), key=lambda item: (item[0][1], item[0][2], item[0][0], item[0][3]))
+    rows = [{"mrDate": on, "ProductID": pid, "WarehouseID": wid, "mrDirection": direction, "mrQuantity": amount}
+            for (on, pid, wid, direction), amount in ordered if amount != 0]
+    if not rows:
+        return
+
+    insert_ = pg_insert if db.bind.dialect.name == "postgresql" else sqlite_insert
+    stmt = insert_(MovementRollup).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[MovementRollup.mrDate, MovementRollup.ProductID, MovementRollup.WarehouseID, MovementRollup.mrDirection],
+        set_={"mrQuantity": MovementRollup.mrQuantity + stmt.excluded.mrQuantity},
+    )
+    await db.execute(stmt)
+
+
+def _ledger_totals():
+    """由 StockMovement 加總的 (mrDate, ProductID, WarehouseID, mrDirection, mrQuantity) 查詢"""
+    is_in = (StockMovement.smSource == INBOUND) | (
+        (StockMovement.smSource != REQUISITION) & (StockMovement.smQuantity > 0)
+    )
+    m = select(
+        StockMovement.smDate, StockMovement.ProductID, StockMovement.WarehouseID,
+        case((is_in, literal(IN, String)), else_=literal(OUT, String)).label("direction"),
+        case((is_in, StockMovement.smQuantity), else_=-StockMovement.smQuantity).label("quantity"),
+    ).subquery()
+    total = func.sum(m.c.quantity)
+    return select(m.c.smDate, m.c.ProductID, m.c.WarehouseID, m.c.direction, total)\
+           .group_by(m.c.smDate, m.c.ProductID, m.c.WarehouseID, m.c.direction)\
+           .having(total != 0)
+
+
+def rollup_backfill_statement():
+    """由 StockMovement 產生 MovementRollup 的 INSERT ... SELECT (Alembic migration 與重建共用)"""
+    return insert(MovementRollup).from_select(
+        ["mrDate", "ProductID", "WarehouseID", "mrDirection", "mrQuantity"], _ledger_totals(),
+    )
+
+
+async def rebuild_movement_rollups(db: AsyncSession) -> int:
+    """清空 MovementRollup 並由異動帳重建，回傳寫入筆數。不 commit。"""
+    await db.execute(delete(MovementRollup))
+    await db.execute(rollup_backfill_statement())
+    await bump_table_versions(db, MovementRollup.__tablename__)
+    return (await db.exec(select(func.count()).select_from(MovementRollup))).one()
+
+
+async def verify_movement_rollups(db: AsyncSession) -> List[dict]:
+    """比對 MovementRollup 與異動帳加總，回傳不一致的項目"""
+    expected = {tuple(row[:4]): row[4] for row in (await db.exec(_ledger_totals())).all()}
+    rollups = (await db.exec(select(MovementRollup))).all()
+    stored = {(r.mrDate, r.ProductID, r.WarehouseID, r.mrDirection): r.mrQuantity for r in rollups}
+
+    mismatches = []
+    for key in sorted(set(expected) | set(stored)):
+        if expected.get(key, 0) != stored.get(key, 0):
+            mismatches.append({
+                "date": key[0], "ProductID": key[1], "WarehouseID": key[2], "direction": key[3],
+                "expected": expected.get(key, 0), "actual": stored.get(key, 0),
+            })
+    return mismatches
+
+
+# --- 查詢 ---
+
+def bucket_start(day: date, bucket: str) -> date:
+    """day 所在週期的第一天 (週一 / 月初)"""
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _next_bucket(day: date, bucket: str) -> date:
+    if bucket == "week":
+        return day + timedelta(days=7)
+    if bucket == "month":
+        return (day + timedelta(days=32)).replace(day=1)
+    return day + timedelta(days=1)
+
+
+def _bucket_column(dialect: str, bucket: str):
+    column = MovementRollup.mrDate
+    if bucket == "day":
+        return column
+    if dialect == "postgresql":
+        return cast(func.date_trunc(bucket, column), Date)
+    # SQLite: 往回 6 天再前進到週一 = 本週週一
+    modifiers = ("-6 days", "weekday 1") if bucket == "week" else ("start of month",)
+    return func.date(column, *modifiers, type_=Date)
+
+
+async def get_movement_series(
+    db: AsyncSession,
+    bucket: str,
+    start: date,
+    end: date,
+    product_id: Optional[int] = None,
+    warehouse_id: Optional[int] = None,
+    group_by: Optional[str] = None,
+) -> List[dict]:
+    """
+    [start, end] 期間依 bucket 分組的進貨量 / 領料量。
+    group_by 為 product / warehouse 時每個商品 / 倉庫各一條序列，否則只有一條；沒有資料的週期補 0。
+    """
+    period = _bucket_column(db.bind.dialect.name, bucket).label("period")
+    group_column = {"product": MovementRollup.ProductID, "warehouse": MovementRollup.WarehouseID}.get(group_by)
+    columns = [period, MovementRollup.mrDirection] + ([group_column] if group_column is not None else [])
+
+    statement = select(*columns, func.sum(MovementRollup.mrQuantity))\
+                .where(MovementRollup.mrDate >= start, MovementRollup.mrDate <= end)\
+                .group_by(*columns)
+    if product_id is not None:
+        statement = statement.where(MovementRollup.ProductID == product_id)
+    if warehouse_id is not None:
+        statement = statement.where(MovementRollup.WarehouseID == warehouse_id)
+
+    # {group: {period: {"in": n, "out": n}}}
+    grouped: Dict[Optional[int], Dict[date, Dict[str, int]]] = {}
+    for row in (await db.exec(statement)).all():
+        on, direction, quantity = row[0], row[1], row[-1]
+        group = row[2] if group_column is not None else None
+        grouped.setdefault(group, {}).setdefault(on, {IN: 0, OUT: 0})[direction] = quantity
+    if group_column is None:
+        grouped.setdefault(None, {})
+
+    periods = []
+    day = bucket_start(start, bucket)
+    while day <= end:
+        periods.append(day)
+        day = _next_bucket(day, bucket)
+
+    series = []
+    for group in sorted(grouped, key=lambda g: (g is None, g)):
+        values = grouped[group]
+        points = []
+        for on in periods:
+            totals = values.get(on, {IN: 0, OUT: 0})
+            points.append({"period": on, IN: totals[IN], OUT: totals[OUT], "net": totals[IN] - totals[OUT]})
+        entry = {f"{group_by}_id": group} if group_column is not None else {}
+        entry["points"] = points
+        series.append(entry)
+    return series
@@ -0,0 +1,49 @@
+# app/services/order_details.py
+"""
+單據明細的差異更新 (進貨單 / 領料單共用)
+
+修改單據時不再刪除全部明細後重新寫入，而是依 ProductID (明細主鍵的一部分) 比對:
+- 只有送出的商品 → 新增
+- 兩邊都有且數量 / 倉庫有變 → 更新該列
+- 只有原本的商品 → 刪除 (relationship 設定 delete-orphan)
+實際的 INSERT / UPDATE / DELETE 由 Session flush 時一起送出，沒變的明細不會產生任何語句。
+"""
+
+from typing import Callable, Iterable, List, Sequence
+
+
+class DuplicateDetailError(ValueError):
+    """同一張單據的明細出現重複的 ProductID"""
+
+
+def find_duplicate_products(details: Iterable) -> List[int]:
+    seen, duplicates = set(), []
+    for d in details:
+        if d.ProductID in seen and d.ProductID not in duplicates:
+            duplicates.append(d.ProductID)
+        seen.add(d.ProductID)
+    return duplicates
+
+
+def merge_details(collection: list, submitted: Sequence, fields: Sequence[str], build: Callable):
+    """
+    將 submitted (API payload 的明細) 套用到 collection (已載入的 order.details)。
+    fields 為 ProductID 以外需要比對的欄位，build(payload) 建立新的明細物件。
+    """
+    duplicates = find_duplicate_products(submitted)
+    if duplicates:
+        raise DuplicateDetailError(f"Duplicate ProductID in details: {duplicates}")
+
+    existing = {d.ProductID: d for d in collection}
+    for item in submitted:
+        current = existing.pop(item.ProductID, None)
+        if current is None:
+            collection.append(build(item))
+            continue
+        for field in fields:
+            value = getattr(item, field)
+            if getattr(current, field) != value:
+                setattr(current, field, value)
+
+    for stale in existing.values():
+        collection.remove(stale)
@@ -0,0 +1,56 @@
+from typing import List, Optional
+from sqlalchemy import insert
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.requisition import Requisition, ReqDetail
+from app.schemas.requisition import RequisitionCreate, RequisitionBatchResult, RequisitionBatchItemResult
+from app.services.lookups import MasterDataIds
+from app.services.stock_service import collect_requisition_changes, apply_stock_changes
+
+MAX_BATCH_SIZE = 500
+
+
+def _validate(ids: MasterDataIds, req: RequisitionCreate) -> Optional[str]:
+    if req.StaffID not in ids.staff:
+        return f"StaffID {req.StaffID} not found"
+    return ids.check_details(req.details, "rdQuantity")
+
+
+async def create_requisitions_batch(db: AsyncSession, items: List[RequisitionCreate]) -> RequisitionBatchResult:
+    """
+    批次建立領料單: 先以預載的主檔 ID 逐筆驗證，通過的單據在同一個交易中
+    以多列 INSERT ... RETURNING 寫入主單 (一次拿回所有 ReqID)，再以多列 INSERT 寫入明細。
+    驗證失敗的單據不寫入，錯誤記錄在對應的 results。
+    """
+    ids = await MasterDataIds.load(db)
+    results = [RequisitionBatchItemResult(index=i) for i in range(len(items))]
+
+    valid = []
+    for i, item in enumerate(items):
+        error = _validate(ids, item)
+        if error:
+            results[i].error = error
+        else:
+            valid.append(i)
+
+    if not valid:
+        return RequisitionBatchResult(created=0, results=results)
+
+    headers = [items[i].model_dump(exclude={"details"}) for i in valid]
+    stmt = insert(Requisition).returning(Requisition.ReqID, sort_by_parameter_order=True)
+    new_ids = (await db.execute(stmt, headers)).scalars().all()
+
+    detail_rows = []
+    stock_changes = {}
+    for i, req_id in zip(valid, new_ids):
+        item = items[i]
+        results[i].ReqID = req_id
+        for d in item.details:
+            detail_rows.append({"ReqID": req_id, **d.model_dump()})
+        collect_requisition_changes(item.Status, item.details, changes=stock_changes, source_id=req_id, on=item.reDate)
+
+    await db.execute(insert(ReqDetail), detail_rows)
+    await apply_stock_changes(db, stock_changes)
+    await db.commit()
+
+    return RequisitionBatchResult(created=len(valid), results=results)
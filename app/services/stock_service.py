@@ -0,0 +1,263 @@
+from datetime import date, datetime, timezone
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from sqlalchemy import String, delete, func, insert, literal, union_all
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.stock_level import StockLevel
+from app.models.stock_movement import ADJUSTMENT, INBOUND, REQUISITION, StockMovement
+from app.models.inbound_order import InboundDetail, InboundOrder
+from app.models.requisition import ReqDetail, Requisition
+from app.services.table_versions import bump_table_versions
+from app.services.stock_snapshots import adjust_snapshots, clear_snapshots
+from app.services.movement_rollups import add_to_rollups, rebuild_movement_rollups
+
+COMPLETED = "Completed"
+
+
+class MovementKey(NamedTuple):
+    """一筆庫存異動的位置與來源 (寫入 StockMovement 時的分組單位)"""
+    ProductID: int
+    WarehouseID: int
+    source: str = ADJUSTMENT
+    source_id: Optional[int] = None
+    on: Optional[date] = None   # 業務日期，None = 今天
+
+
+# {MovementKey: 數量變化}；也接受 {(ProductID, WarehouseID): 數量變化}，視為今天的 adjustment
+StockChanges = Dict[tuple, int]
+
+
+def collect_inbound_changes(status: str, details: Iterable, sign: int = 1, changes: StockChanges = None,
+                            source_id: int = None, on: date = None) -> StockChanges:
+    """
+    進貨單對庫存的影響 (只有 Completed 的單據才計入)，sign=-1 代表沖銷。
+    details 可以是 InboundDetail 或 InboundDetailBase (API payload)。
+    source_id / on 為進貨單 ID 與進貨日期，記錄在異動帳上。
+    """
+    changes = {} if changes is None else changes
+    if status != COMPLETED:
+        return changes
+    for d in details:
+        key = MovementKey(d.ProductID, d.WarehouseID, INBOUND, source_id, on)
+        changes[key] = changes.get(key, 0) + sign * d.idQuantity
+    return changes
+
+
+def collect_requisition_changes(status: str, details: Iterable, sign: int = 1, changes: StockChanges = None,
+                                source_id: int = None, on: date = None) -> StockChanges:
+    """領料單對庫存的影響 (出庫為負數)，sign=-1 代表沖銷"""
+    changes = {} if changes is None else changes
+    if status != COMPLETED:
+        return changes
+    for d in details:
+        key = MovementKey(d.ProductID, d.WarehouseID, REQUISITION, source_id, on)
+        changes[key] = changes.get(key, 0) - sign * d.rdQuantity
+    return changes
+
+
+async def upsert_stock_levels(db: AsyncSession, totals: Dict[Tuple[int, int], int]) -> Dict[Tuple[int, int], int]:
+    """
+    將 {(ProductID, WarehouseID): 數量變化} 疊加到 StockLevel，回傳這些位置更新後的數量。
+    使用 INSERT ... ON CONFLICT DO UPDATE ... RETURNING (SQLite / PostgreSQL 皆支援)，
+    在資料庫端做 slQuantity + delta，避免併發時讀-改-寫互相覆蓋。
+    不更新 tableversion: 庫存的 ETag 由異動帳最新一筆推導 (見 app/services/table_versions.py)。
+    """
+    # 依 (ProductID, WarehouseID) 排序: 併發交易以相同順序鎖定列，避免死結
+    rows = [{"ProductID": pid, "WarehouseID": wid, "slQuantity": delta} for (pid, wid), delta in sorted(totals.items())]
+    if not rows:
+        return {}
+
+    insert_ = pg_insert if db.bind.dialect.name == "postgresql" else sqlite_insert
+    stmt = insert_(StockLevel).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[StockLevel.ProductID, StockLevel.WarehouseID],
+        set_={"slQuantity": StockLevel.slQuantity + stmt.excluded.slQuantity},
+    ).returning(StockLevel.ProductID, StockLevel.WarehouseID, StockLevel.slQuantity)
+    result = await db.execute(stmt)
+    return {(pid, wid): qty for pid, wid, qty in result.all()}
+
+
+async def apply_stock_changes(db: AsyncSession, changes: StockChanges):
+    """
+    將庫存變化寫入 StockLevel，並在 StockMovement 追加對應的異動 (含結餘)。
+    同一個位置有多筆異動時 (例如修改單據日期: 舊日期沖銷 + 新日期計入) 依收集順序各寫一筆。
+    追加的異動即為庫存的新版本 (商品列表等 ETag 由最新一筆異動推導，不更新 tableversion)；
+    單據日期落在已建立的庫存快照之前時一併修正快照；每日進出量彙總 (MovementRollup) 同步累加。
+    不 commit，由呼叫端與單據寫入放在同一個交易中。
+    """
+    movements = [(key if isinstance(key, MovementKey) else MovementKey(*key), delta)
+                 for key, delta in changes.items() if delta != 0]
+    if not movements:
+        return
+
+    totals: Dict[Tuple[int, int], int] = {}
+    for key, delta in movements:
+        location = (key.ProductID, key.WarehouseID)
+        totals[location] = totals.get(location, 0) + delta
+    balances = await upsert_stock_levels(db, totals)
+
+    # StockLevel 的列已被這個交易鎖住，由最終數量往回推算每一筆的結餘
+    now = datetime.now(timezone.utc)
+    today = date.today()
+    rows = []
+    for key, delta in reversed(movements):
+        location = (key.ProductID, key.WarehouseID)
+        rows.append({
+            "ProductID": key.ProductID, "WarehouseID": key.WarehouseID,
+            "smDate": key.on or today, "smQuantity": delta, "smBalance": balances[location],
+            "smSource": key.source, "smSourceID": key.source_id, "smCreatedAt": now,
+        })
+        balances[location] -= delta
+    rows.reverse()
+    await db.execute(insert(StockMovement), rows)
+    await adjust_snapshots(db, [(r["ProductID"], r["WarehouseID"], r["smDate"], r["smQuantity"]) for r in rows])
+    await add_to_rollups(db, [(r["ProductID"], r["WarehouseID"], r["smDate"], r["smSource"], r["smQuantity"]) for r in rows])
+
+
+def history_totals_statements():
+    """(進貨, 領料) 依商品 × 倉庫加總 Completed 明細的查詢"""
+    in_stmt = select(InboundDetail.ProductID, InboundDetail.WarehouseID, func.sum(InboundDetail.idQuantity))\
+              .join(InboundOrder)\
+              .where(InboundOrder.Status == COMPLETED)\
+              .group_by(InboundDetail.ProductID, InboundDetail.WarehouseID)
+
+    out_stmt = select(ReqDetail.ProductID, ReqDetail.WarehouseID, func.sum(ReqDetail.rdQuantity))\
+               .join(Requisition)\
+               .where(Requisition.Status == COMPLETED)\
+               .group_by(ReqDetail.ProductID, ReqDetail.WarehouseID)
+    return in_stmt, out_stmt
+
+
+async def _aggregate_from_history(db: AsyncSession) -> StockChanges:
+    """以歷史明細重新加總庫存 (舊做法，僅供重建 / 驗證使用)"""
+    in_stmt, out_stmt = history_totals_statements()
+    totals: StockChanges = {}
+    for pid, wid, qty in (await db.exec(in_stmt)).all():
+        totals[(pid, wid)] = totals.get((pid, wid), 0) + qty
+    for pid, wid, qty in (await db.exec(out_stmt)).all():
+        totals[(pid, wid)] = totals.get((pid, wid), 0) - qty
+    return totals
+
+
+def stock_level_backfill_statement():
+    """由歷史明細 (Completed 單據的進貨 - 領料) 產生 StockLevel 的 INSERT ... SELECT (Alembic migration 用)"""
+    inbound = select(InboundDetail.ProductID, InboundDetail.WarehouseID, InboundDetail.idQuantity.label("quantity"))\
+              .join(InboundOrder).where(InboundOrder.Status == COMPLETED)
+    outbound = select(ReqDetail.ProductID, ReqDetail.WarehouseID, (-ReqDetail.rdQuantity).label("quantity"))\
+               .join(Requisition).where(Requisition.Status == COMPLETED)
+    m = union_all(inbound, outbound).subquery()
+    rows = select(m.c.ProductID, m.c.WarehouseID, func.sum(m.c.quantity)).group_by(m.c.ProductID, m.c.WarehouseID)
+    return insert(StockLevel).from_select(["ProductID", "WarehouseID", "slQuantity"], rows)
+
+
+async def rebuild_stock_levels(db: AsyncSession) -> int:
+    """清空 StockLevel 並由歷史明細重建，回傳寫入筆數"""
+    totals = await _aggregate_from_history(db)
+    await db.execute(delete(StockLevel))
+    for (pid, wid), qty in totals.items():
+        db.add(StockLevel(ProductID=pid, WarehouseID=wid, slQuantity=qty))
+    await bump_table_versions(db, StockLevel.__tablename__)
+    await db.commit()
+    return len(totals)
+
+
+async def verify_stock_levels(db: AsyncSession) -> List[dict]:
+    """比對 StockLevel 與歷史明細加總，回傳不一致的項目 (空 list 代表一致)"""
+    totals = await _aggregate_from_history(db)
+    levels = (await db.exec(select(StockLevel))).all()
+    stored = {(s.ProductID, s.WarehouseID): s.slQuantity for s in levels}
+
+    mismatches = []
+    for key in sorted(set(totals) | set(stored)):
+        expected = totals.get(key, 0)
+        actual = stored.get(key, 0)
+        if expected != actual:
+            mismatches.append({
+                "ProductID": key[0],
+                "WarehouseID": key[1],
+                "expected": expected,
+                "actual": actual,
+            })
+    return mismatches
+
+
+def ledger_backfill_statement(created_at: datetime):
+    """
+    由歷史明細產生 StockMovement 的 INSERT ... SELECT (每張 Completed 單據的每一行一筆)，
+    結餘以視窗函數依 (日期, 進貨先於領料, 單據 ID) 累計。
+    Alembic migration (同步連線) 與 rebuild_stock_ledger 共用。
+    """
+    inbound = select(
+        InboundDetail.ProductID, InboundDetail.WarehouseID, InboundOrder.ioDate.label("on"),
+        InboundDetail.idQuantity.label("quantity"),
+        literal(INBOUND, String).label("source"), InboundOrder.InboundID.label("source_id"),
+    ).join(InboundOrder).where(InboundOrder.Status == COMPLETED)
+    outbound = select(
+        ReqDetail.ProductID, ReqDetail.WarehouseID, Requisition.reDate.label("on"),
+        (-ReqDetail.rdQuantity).label("quantity"),
+        literal(REQUISITION, String).label("source"), Requisition.ReqID.label("source_id"),
+    ).join(Requisition).where(Requisition.Status == COMPLETED)
+
+    m = union_all(inbound, outbound).subquery()
+    order = [m.c.on, m.c.source, m.c.source_id]
+    balance = func.sum(m.c.quantity).over(partition_by=[m.c.ProductID, m.c.WarehouseID], order_by=order)
+    rows = select(
+        m.c.ProductID, m.c.WarehouseID, m.c.on, m.c.quantity, balance, m.c.source, m.c.source_id,
+        literal(created_at, StockMovement.__table__.c.smCreatedAt.type),
+    ).order_by(m.c.ProductID, m.c.WarehouseID, *order)
+
+    return insert(StockMovement).from_select(
+        ["ProductID", "WarehouseID", "smDate", "smQuantity", "smBalance", "smSource", "smSourceID", "smCreatedAt"],
+        rows,
+    )
+
+
+async def rebuild_stock_ledger(db: AsyncSession) -> int:
+    """
+    清空 StockMovement 並由歷史明細重建 (新資料庫 / 舊資料庫升級時的初始化)，回傳寫入筆數。
+    已修改過的單據只留下目前內容，原本的補償分錄會消失；庫存快照一併清空 (需重新建立)，每日進出量彙總一併重建。
+    """
+    await db.execute(delete(StockMovement))
+    await clear_snapshots(db)
+    await db.execute(ledger_backfill_statement(datetime.now(timezone.utc)))
+    await rebuild_movement_rollups(db)
+    # 重建後 MovementID 可能與先前重複，另外 bump 版本
+    await bump_table_versions(db, StockMovement.__tablename__)
+    await db.commit()
+    return (await db.exec(select(func.count()).select_from(StockMovement))).one()
+
+
+async def get_ledger_balances(db: AsyncSession) -> Dict[Tuple[int, int], int]:
+    """每個商品 × 倉庫在異動帳上的最新結餘"""
+    latest = select(func.max(StockMovement.MovementID)).group_by(StockMovement.ProductID, StockMovement.WarehouseID)
+    statement = select(StockMovement.ProductID, StockMovement.WarehouseID, StockMovement.smBalance)\
+                .where(StockMovement.MovementID.in_(latest))
+    return {(pid, wid): balance for pid, wid, balance in (await db.exec(statement)).all()}
+
+
+async def verify_stock_ledger(db: AsyncSession) -> List[dict]:
+    """比對 StockLevel 與異動帳最新結餘，回傳不一致的項目"""
+    ledger = await get_ledger_balances(db)
+    levels = (await db.exec(select(StockLevel))).all()
+    stored = {(s.ProductID, s.WarehouseID): s.slQuantity for s in levels}
+
+    mismatches = []
+    for key in sorted(set(ledger) | set(stored)):
+        expected = ledger.get(key, 0)
+        actual = stored.get(key, 0)
+        if expected != actual:
+            mismatches.append({"ProductID": key[0], "WarehouseID": key[1], "expected": expected, "actual": actual})
+    return mismatches
+
+
+async def purge_empty_stock_levels(db: AsyncSession, product_id: int = None, warehouse_id: int = None):
+    """刪除數量為 0 的 StockLevel，避免刪除商品 / 倉庫時被外鍵擋住"""
+    stmt = delete(StockLevel).where(StockLevel.slQuantity == 0)
+    if product_id is not None:
+        stmt = stmt.where(StockLevel.ProductID == product_id)
+    if warehouse_id is not None:
+        stmt = stmt.where(StockLevel.WarehouseID == warehouse_id)
+    await db.execute(stmt)
@@ -0,0 +1,175 @@
+# app/services/stock_snapshots.py
+"""
+庫存快照 (某日結束時的庫存)
+
+以往要知道「月底庫存」只能把該日以前的歷史明細全部加總。
+- 快照: 每個期末 (daily / monthly) 寫入各商品 × 倉庫的結存 (StockSnapshot)
+- 查詢: 最近一次 <= as_of 的快照 + 快照之後到 as_of 的異動 (StockMovement)，最多掃描一個週期的異動
+- 補登: 單據日期早於已建立的快照時 (例如補登上個月的進貨)，apply_stock_changes 會同步修正之後的快照
+
+日期一律為單據日期 (smDate)，與異動寫入的時間無關。
+"""
+
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import Integer, and_, delete, func, insert, literal, or_, union_all
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import STOCK_SNAPSHOT_PERIOD
+from app.models.stock_movement import StockMovement
+from app.models.stock_snapshot import StockSnapshot, StockSnapshotRun
+
+SNAPSHOT_PERIODS = ("daily", "monthly")
+
+
+def _month_end(day: date) -> date:
+    first_of_next = (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+    return first_of_next - timedelta(days=1)
+
+
+def period_ends(start: date, end: date, period: str) -> List[date]:
+    """start ~ end 之間 (含) 的期末日期"""
+    if period not in SNAPSHOT_PERIODS:
+        raise ValueError(f"Unknown snapshot period: {period}")
+    days = []
+    day = start if period == "daily" else _month_end(start)
+    while day <= end:
+        days.append(day)
+        day = day + timedelta(days=1) if period == "daily" else _month_end(day + timedelta(days=1))
+    return days
+
+
+async def _latest_run(db: AsyncSession, on_or_before: Optional[date] = None) -> Optional[date]:
+    statement = select(func.max(StockSnapshotRun.ssDate))
+    if on_or_before is not None:
+        statement = statement.where(StockSnapshotRun.ssDate <= on_or_before)
+    return (await db.exec(statement)).one()
+
+
+def _balances_as_of(as_of: date, base: Optional[date], product_ids: Optional[List[int]] = None):
+    """
+    (ProductID, WarehouseID, quantity) 的子查詢:
+    base 快照的結存 + (base, as_of] 之間的異動；base 為 None 時加總 as_of 以前的所有異動
+    """
+    movements = select(StockMovement.ProductID, StockMovement.WarehouseID, StockMovement.smQuantity.label("quantity"))\
+                .where(StockMovement.smDate <= as_of)
+    parts = []
+    if base is not None:
+        movements = movements.where(StockMovement.smDate > base)
+        snapshot = select(StockSnapshot.ProductID, StockSnapshot.WarehouseID, StockSnapshot.ssQuantity.label("quantity"))\
+                   .where(StockSnapshot.ssDate == base)
+        if product_ids is not None:
+            snapshot = snapshot.where(StockSnapshot.ProductID.in_(product_ids))
+        parts.append(snapshot)
+    if product_ids is not None:
+        movements = movements.where(StockMovement.ProductID.in_(product_ids))
+    parts.append(movements)
+    return union_all(*parts).subquery() if len(parts) > 1 else parts[0].subquery()
+
+
+# --- 建立快照 ---
+
+async def take_snapshot(db: AsyncSession, on: date, period: str = STOCK_SNAPSHOT_PERIOD) -> int:
+    """寫入 on 當日結束時的結存 (已存在時重建)，回傳寫入筆數。會 commit。"""
+    await db.execute(delete(StockSnapshot).where(StockSnapshot.ssDate == on))
+    await db.execute(delete(StockSnapshotRun).where(StockSnapshotRun.ssDate == on))
+
+    balances = _balances_as_of(on, await _latest_run(db, on - timedelta(days=1)))
+    total = func.sum(balances.c.quantity)
+    rows = select(literal(on, StockSnapshot.__table__.c.ssDate.type), balances.c.ProductID, balances.c.WarehouseID, total)\
+           .group_by(balances.c.ProductID, balances.c.WarehouseID)\
+           .having(total != 0)
+    result = await db.execute(insert(StockSnapshot).from_select(
+        ["ssDate", "ProductID", "WarehouseID", "ssQuantity"], rows,
+    ))
+    db.add(StockSnapshotRun(ssDate=on, ssPeriod=period, ssCreatedAt=datetime.now(timezone.utc)))
+    await db.commit()
+    return result.rowcount
+
+
+async def take_due_snapshots(db: AsyncSession, period: str = STOCK_SNAPSHOT_PERIOD, today: Optional[date] = None) -> List[date]:
+    """
+    補齊上次快照之後、到上一個已結束的期末為止的所有快照 (排程每天執行一次即可)。
+    沒有任何快照時從第一筆異動的日期開始。回傳這次建立的日期。
+    """
+    today = today or date.today()
+    last = await _latest_run(db)
+    if last is not None:
+        start = last + timedelta(days=1)
+    else:
+        start = (await db.exec(select(func.min(StockMovement.smDate)))).one()
+        if start is None:
+            return []
+
+    taken = []
+    for day in period_ends(start, today - timedelta(days=1), period):
+        await take_snapshot(db, day, period)
+        taken.append(day)
+    return taken
+
+
+async def clear_snapshots(db: AsyncSession):
+    """刪除所有快照 (異動帳重建後需要重新建立)，不 commit"""
+    await db.execute(delete(StockSnapshot))
+    await db.execute(delete(StockSnapshotRun))
+
+
+# --- 補登修正 ---
+
+async def adjust_snapshots(db: AsyncSession, movements: Iterable[Tuple[int, int, date, int]]):
+    """
+    單據日期 <= 既有快照日期的異動 (ProductID, WarehouseID, smDate, 數量) 要加進之後每一個快照，
+    結存因此變成 0 的快照列一併刪除 (快照只存非 0 的列)。
+    一般情況 (單據日期在最後一次快照之後) 只花一次查詢。不 commit。
+    """
+    # 依 (商品, 倉庫, 日期) 固定順序寫入，併發交易鎖定快照列的順序一致，避免死結
+    movements = sorted(movements, key=lambda m: (m[0], m[1], m[2]))
+    if not movements:
+        return
+    last = await _latest_run(db)
+    if last is None:
+        return
+
+    insert_ = pg_insert if db.bind.dialect.name == "postgresql" else sqlite_insert
+    touched: Dict[Tuple[int, int], date] = {}
+    for pid, wid, on, delta in movements:
+        if on > last:
+            continue
+        touched.setdefault((pid, wid), on)
+        rows = select(
+            StockSnapshotRun.ssDate, literal(pid, Integer), literal(wid, Integer), literal(delta, Integer),
+        ).where(StockSnapshotRun.ssDate >= on)
+        stmt = insert_(StockSnapshot).from_select(["ssDate", "ProductID", "WarehouseID", "ssQuantity"], rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[StockSnapshot.ssDate, StockSnapshot.ProductID, StockSnapshot.WarehouseID],
+            set_={"ssQuantity": StockSnapshot.ssQuantity + stmt.excluded.ssQuantity},
+        )
+        await db.execute(stmt)
+
+    if touched:
+        await db.execute(delete(StockSnapshot).where(StockSnapshot.ssQuantity == 0, or_(*(
+            and_(StockSnapshot.ProductID == pid, StockSnapshot.WarehouseID == wid, StockSnapshot.ssDate >= on)
+            for (pid, wid), on in touched.items()
+        ))))
+
+
+# --- 查詢 ---
+
+async def get_stock_as_of(db: AsyncSession, as_of: date, product_ids: List[int]) -> Dict[int, int]:
+    """{ProductID: as_of 當日結束時的總庫存}"""
+    if not product_ids:
+        return {}
+    balances = _balances_as_of(as_of, await _latest_run(db, as_of), product_ids)
+    statement = select(balances.c.ProductID, func.sum(balances.c.quantity)).group_by(balances.c.ProductID)
+    return {pid: qty for pid, qty in (await db.exec(statement)).all()}
+
+
+async def get_distribution_as_of(db: AsyncSession, as_of: date, product_id: int) -> Dict[int, int]:
+    """{WarehouseID: as_of 當日結束時的庫存}"""
+    balances = _balances_as_of(as_of, await _latest_run(db, as_of), [product_id])
+    statement = select(balances.c.WarehouseID, func.sum(balances.c.quantity)).group_by(balances.c.WarehouseID)
+    return {wid: qty for wid, qty in (await db.exec(statement)).all()}
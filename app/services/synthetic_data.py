@@ -0,0 +1,347 @@
+"""
+產生大量模擬資料 (壓力測試 / 效能量測用)
+
+- 相同的 seed 與設定一定產生相同的資料
+- 熱門程度呈長尾分布 (Zipf): 少數商品 / 供應商 / 倉庫佔大部分單據
+- 單據依日期先後產生，領料數量不會超過當時庫存，所以 StockLevel 不會出現負數
+- 以多列 INSERT 分批寫入 (PostgreSQL 使用 COPY)，ID 接在資料庫現有最大值之後，可重複追加
+
+用法見 scripts/generate_dataset.py
+"""
+
+import bisect
+import itertools
+import random
+from dataclasses import dataclass, asdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import func, insert, text
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.product import Product
+from app.models.staff import Staff
+from app.models.supplier import Supplier
+from app.models.warehouse import Warehouse
+from app.models.inbound_order import InboundOrder, InboundDetail
+from app.models.requisition import Requisition, ReqDetail
+from app.models.stock_level import StockLevel
+from app.models.stock_movement import StockMovement
+from app.services.stock_service import COMPLETED, INBOUND, REQUISITION, upsert_stock_levels
+from app.services.movement_rollups import rebuild_movement_rollups
+from app.services.table_versions import bump_table_versions
+
+
+@dataclass
+class DatasetConfig:
+    products: int = 1_000
+    warehouses: int = 5
+    suppliers: int = 50
+    staff: int = 20
+    years: float = 1.0
+    inbound_per_day: int = 20
+    requisitions_per_day: int = 30
+    lines_per_order: int = 5          # 每張單據的平均明細數
+    skew: float = 1.1                 # Zipf 指數，越大越集中在熱門商品
+    pending_ratio: float = 0.02       # 非 Completed (不影響庫存) 的單據比例
+    end_date: date = date(2025, 12, 31)
+    seed: int = 42
+
+
+# 常用規模，CLI 的 --size 參數
+PRESETS: Dict[str, DatasetConfig] = {
+    "small": DatasetConfig(),
+    "medium": DatasetConfig(products=10_000, warehouses=10, suppliers=200, staff=50, years=2,
+                            inbound_per_day=200, requisitions_per_day=300),
+    "large": DatasetConfig(products=100_000, warehouses=20, suppliers=1_000, staff=200, years=3,
+                           inbound_per_day=1_000, requisitions_per_day=1_500, lines_per_order=6),
+}
+
+CATEGORIES = ["電子產品", "電腦周邊", "辦公用品", "清潔用品", "五金工具", "包材", "食品", "冷凍食品"]
+REASONS = ["生產領料", "門市補貨", "樣品", "維修", "報廢", "專案使用"]
+
+INSERT_BATCH_SIZE = 5_000
+
+
+class _WeightedPicker:
+    """依 Zipf 權重抽樣 (rank 1 最熱門)，ids 先打亂，熱門的不一定是編號小的"""
+
+    def __init__(self, rng: random.Random, ids: List[int], skew: float):
+        self.rng = rng
+        self.ids = list(ids)
+        rng.shuffle(self.ids)
+        self.cum_weights = list(itertools.accumulate(1.0 / (rank ** skew) for rank in range(1, len(self.ids) + 1)))
+        self.total = self.cum_weights[-1]
+
+    def pick(self) -> int:
+        return self.ids[bisect.bisect(self.cum_weights, self.rng.random() * self.total)]
+
+    def pick_distinct(self, n: int) -> List[int]:
+        n = min(n, len(self.ids))
+        picked = {}
+        # 熱門商品容易重複抽到，最多嘗試 n*4 次
+        for _ in range(n * 4):
+            picked[self.pick()] = None
+            if len(picked) >= n:
+                break
+        return list(picked)
+
+
+class DatasetStats:
+    def __init__(self):
+        self.counts: Dict[str, int] = {}
+
+    def add(self, table: str, n: int):
+        self.counts[table] = self.counts.get(table, 0) + n
+
+    def __str__(self):
+        return ", ".join(f"{table}={n}" for table, n in self.counts.items())
+
+
+async def _next_id(db: AsyncSession, column) -> int:
+    return ((await db.exec(select(func.max(column)))).one() or 0) + 1
+
+
+async def _bulk_insert(db: AsyncSession, model, rows: List[dict]):
+    if not rows:
+        return
+    if db.bind.dialect.name == "postgresql":
+        conn = await db.connection()
+        raw = await conn.get_raw_connection()
+        columns = list(rows[0].keys())
+        await raw.driver_connection.copy_records_to_table(
+            model.__tablename__,
+            records=[tuple(r[c] for c in columns) for r in rows],
+            columns=columns,
+        )
+    else:
+        await db.execute(insert(model), rows)
+
+
+class DatasetGenerator:
+    """
+    產生並寫入模擬資料。
+    generate() 可以分開呼叫各個 iter_* 方法取得純資料 (不寫資料庫)，例如輸出成檔案。
+    """
+
+    def __init__(self, config: DatasetConfig):
+        self.config = config
+        self.rng = random.Random(config.seed)
+
+    # --- 主檔 ---
+
+    def iter_staff(self, start_id: int) -> Iterator[dict]:
+        depts = ["倉庫部", "採購部", "生產部", "業務部"]
+        for i in range(self.config.staff):
+            staff_id = start_id + i
+            yield {
+                "StaffID": staff_id, "stName": f"員工{staff_id}", "stDept": self.rng.choice(depts),
+                "stTitle": "專員", "stPhone": f"09{self.rng.randrange(10**8):08d}", "stEmail": f"staff{staff_id}@wms.com",
+                "username": f"staff{staff_id}", "password": "0000", "is_manager": False,
+            }
+
+    def iter_suppliers(self, start_id: int) -> Iterator[dict]:
+        for i in range(self.config.suppliers):
+            supplier_id = start_id + i
+            yield {
+                "SupplierID": supplier_id, "suName": f"供應商{supplier_id}",
+                "suPhone": f"02-{self.rng.randrange(10**8):08d}", "suAddress": f"模擬路 {supplier_id} 號",
+            }
+
+    def iter_products(self, start_id: int) -> Iterator[dict]:
+        for i in range(self.config.products):
+            product_id = start_id + i
+            yield {
+                "ProductID": product_id, "prName": f"商品{product_id}", "prSpec": f"規格-{self.rng.randrange(1000):03d}",
+                "prCategory": self.rng.choice(CATEGORIES), "prReorderLevel": self.rng.choice([5, 10, 20, 50]),
+            }
+
+    def iter_warehouses(self, start_id: int) -> Iterator[dict]:
+        for i in range(self.config.warehouses):
+            warehouse_id = start_id + i
+            yield {"WarehouseID": warehouse_id, "waName": f"倉庫{warehouse_id}", "waLocation": f"模擬園區 {i + 1} 區"}
+
+    # --- 單據 ---
+
+    def _status(self) -> str:
+        return "Pending" if self.rng.random() < self.config.pending_ratio else COMPLETED
+
+    def _line_count(self) -> int:
+        # 大部分單據只有幾筆明細，少數很長
+        return max(1, min(int(self.rng.expovariate(1.0 / self.config.lines_per_order)) + 1, self.config.lines_per_order * 6))
+
+    def iter_days(self) -> Iterator[date]:
+        days = max(1, int(self.config.years * 365))
+        first = self.config.end_date - timedelta(days=days - 1)
+        for offset in range(days):
+            yield first + timedelta(days=offset)
+
+    def iter_orders(
+        self,
+        inbound_start: int,
+        req_start: int,
+        product_ids: List[int],
+        warehouse_ids: List[int],
+        supplier_ids: List[int],
+        staff_ids: List[int],
+    ) -> Iterator[Tuple[str, dict, List[dict]]]:
+        """
+        依日期產生 ("inbound" | "requisition", 表頭, 明細)。
+        進貨補足熱門商品，領料只領取當下有的庫存。
+        """
+        cfg = self.config
+        products = _WeightedPicker(self.rng, product_ids, cfg.skew)
+        warehouses = _WeightedPicker(self.rng, warehouse_ids, 0.8)
+        suppliers = _WeightedPicker(self.rng, supplier_ids, cfg.skew)
+        # 商品主要存放的倉庫 (同一商品大多放在固定的一兩個倉庫)
+        home: Dict[int, int] = {}
+        stock: Dict[Tuple[int, int], int] = {}
+        inbound_id, req_id = inbound_start, req_start
+
+        for day in self.iter_days():
+            # 週末單量較少
+            weekend = day.weekday() >= 5
+            n_in = self.rng.randint(0, cfg.inbound_per_day * 2) // (3 if weekend else 1)
+            n_req = self.rng.randint(0, cfg.requisitions_per_day * 2) // (3 if weekend else 1)
+
+            for _ in range(n_in):
+                status = self._status()
+                details = []
+                for pid in products.pick_distinct(self._line_count()):
+                    wid = home.setdefault(pid, warehouses.pick())
+                    if self.rng.random() < 0.1:
+                        wid = warehouses.pick()
+                    qty = self.rng.randint(10, 500)
+                    details.append({"InboundID": inbound_id, "ProductID": pid, "idQuantity": qty, "WarehouseID": wid})
+                    if status == COMPLETED:
+                        stock[(pid, wid)] = stock.get((pid, wid), 0) + qty
+                yield "inbound", {
+                    "InboundID": inbound_id, "ioDate": day, "SupplierID": suppliers.pick(),
+                    "StaffID": self.rng.choice(staff_ids), "Status": status,
+                }, details
+                inbound_id += 1
+
+            for _ in range(n_req):
+                status = self._status()
+                details = []
+                for pid in products.pick_distinct(self._line_count()):
+                    wid = home.get(pid)
+                    available = stock.get((pid, wid), 0) if wid is not None else 0
+                    if available <= 0:
+                        continue
+                    qty = min(available, self.rng.randint(1, 200))
+                    details.append({"ReqID": req_id, "ProductID": pid, "rdQuantity": qty, "WarehouseID": wid})
+                    if status == COMPLETED:
+                        stock[(pid, wid)] = available - qty
+                if not details:
+                    continue
+                yield "requisition", {
+                    "ReqID": req_id, "reDate": day, "reReason": self.rng.choice(REASONS),
+                    "StaffID": self.rng.choice(staff_ids), "Status": status,
+                }, details
+                req_id += 1
+
+        self.final_stock = stock
+
+    # --- 寫入 ---
+
+    async def _load_master(self, db: AsyncSession, model, id_column, rows: Iterator[dict], stats: DatasetStats) -> List[int]:
+        rows = list(rows)
+        for i in range(0, len(rows), INSERT_BATCH_SIZE):
+            await _bulk_insert(db, model, rows[i:i + INSERT_BATCH_SIZE])
+        await bump_table_versions(db, model.__tablename__)
+        await db.commit()
+        stats.add(model.__tablename__, len(rows))
+        return [r[id_column.key] for r in rows]
+
+    async def generate(self, db: AsyncSession, progress=None) -> DatasetStats:
+        """寫入所有資料並更新 StockLevel 與 StockMovement，progress(stats) 會在每批寫入後呼叫"""
+        stats = DatasetStats()
+        staff_ids = await self._load_master(db, Staff, Staff.StaffID, self.iter_staff(await _next_id(db, Staff.StaffID)), stats)
+        supplier_ids = await self._load_master(db, Supplier, Supplier.SupplierID, self.iter_suppliers(await _next_id(db, Supplier.SupplierID)), stats)
+        product_ids = await self._load_master(db, Product, Product.ProductID, self.iter_products(await _next_id(db, Product.ProductID)), stats)
+        warehouse_ids = await self._load_master(db, Warehouse, Warehouse.WarehouseID, self.iter_warehouses(await _next_id(db, Warehouse.WarehouseID)), stats)
+
+        batches = {"inbound": ([], []), "requisition": ([], [])}
+        models = {"inbound": (InboundOrder, InboundDetail), "requisition": (Requisition, ReqDetail)}
+
+        # 異動帳: 結餘接在既有庫存之後，依單據產生順序累計
+        balances = {(s.ProductID, s.WarehouseID): s.slQuantity for s in (await db.exec(select(StockLevel))).all()}
+        movements: List[dict] = []
+        created_at = datetime.now(timezone.utc)
+
+        async def flush(kind: str):
+            headers, details = batches[kind]
+            header_model, detail_model = models[kind]
+            await _bulk_insert(db, header_model, headers)
+            await _bulk_insert(db, detail_model, details)
+            await _bulk_insert(db, StockMovement, movements)
+            await db.commit()
+            stats.add(header_model.__tablename__, len(headers))
+            stats.add(detail_model.__tablename__, len(details))
+            stats.add(StockMovement.__tablename__, len(movements))
+            headers.clear()
+            details.clear()
+            movements.clear()
+            if progress:
+                progress(stats)
+
+        orders = self.iter_orders(
+            await _next_id(db, InboundOrder.InboundID), await _next_id(db, Requisition.ReqID),
+            product_ids, warehouse_ids, supplier_ids, staff_ids,
+        )
+        for kind, header, details in orders:
+            headers, detail_rows = batches[kind]
+            headers.append(header)
+            detail_rows.extend(details)
+            if header["Status"] == COMPLETED:
+                inbound = kind == "inbound"
+                for d in details:
+                    location = (d["ProductID"], d["WarehouseID"])
+                    delta = d["idQuantity"] if inbound else -d["rdQuantity"]
+                    balances[location] = balances.get(location, 0) + delta
+                    movements.append({
+                        "ProductID": location[0], "WarehouseID": location[1],
+                        "smDate": header["ioDate"] if inbound else header["reDate"],
+                        "smQuantity": delta, "smBalance": balances[location],
+                        "smSource": INBOUND if inbound else REQUISITION,
+                        "smSourceID": header["InboundID"] if inbound else header["ReqID"],
+                        "smCreatedAt": created_at,
+                    })
+            if len(detail_rows) >= INSERT_BATCH_SIZE:
+                await flush(kind)
+        for kind in batches:
+            await flush(kind)
+
+        # 庫存直接用產生過程累計的結果 (與歷史明細一致)，以 upsert 疊加在既有庫存上 (異動帳已在上面寫入)
+        items = list(self.final_stock.items())
+        for i in range(0, len(items), INSERT_BATCH_SIZE // 5):
+            await upsert_stock_levels(db, dict(items[i:i + INSERT_BATCH_SIZE // 5]))
+        await db.commit()
+        stats.add("stocklevel", sum(1 for qty in self.final_stock.values() if qty))
+
+        # 每日進出量彙總由異動帳一次重建 (比逐批 upsert 快)
+        stats.add("movementrollup", await rebuild_movement_rollups(db))
+        await db.commit()
+
+        await _reset_sequences(db)
+        return stats
+
+
+async def _reset_sequences(db: AsyncSession):
+    """PostgreSQL 指定 ID 寫入後需要調整 sequence，否則之後 API 新增會撞到主鍵"""
+    if db.bind.dialect.name != "postgresql":
+        return
+    for table, column in (("staff", "StaffID"), ("supplier", "SupplierID"), ("product", "ProductID"),
+                          ("warehouse", "WarehouseID"), ("inboundorder", "InboundID"), ("requisition", "ReqID")):
+        await db.exec(text(f"SELECT setval(pg_get_serial_sequence('{table}', '{column}'), (SELECT MAX(\"{column}\") FROM {table}))"))
+    await db.commit()
+
+
+async def generate_dataset(db: AsyncSession, config: Optional[DatasetConfig] = None, progress=None) -> DatasetStats:
+    return await DatasetGenerator(config or DatasetConfig()).generate(db, progress=progress)
+
+
+def config_summary(config: DatasetConfig) -> str:
+    return ", ".join(f"{k}={v}" for k, v in asdict(config).items())
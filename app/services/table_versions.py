@@ -0,0 +1,60 @@
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+from sqlalchemy import String, literal, union_all
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.stock_movement import StockMovement
+from app.models.table_version import TableVersion
+
+# {table_name: (version, updated_at)}，從未寫入過的資料表為 (0, None)
+TableVersions = Dict[str, Tuple[Union[int, str], Optional[datetime]]]
+
+# 庫存異動帳只新增不修改，最新一筆 (MovementID, 寫入時間) 即可當作版本:
+# 進貨 / 領料寫入時不必再更新 tableversion 的同一列 (PostgreSQL 上會讓所有寫入交易互相等待列鎖)
+# 重建異動帳等管理操作仍會 bump 這個名稱，兩者合併為 "版本.MovementID"
+LEDGER_TABLE = StockMovement.__tablename__
+
+
+async def bump_table_versions(db: AsyncSession, *tables: str):
+    """
+    將資料表版本 +1 並更新 updated_at。
+    不 commit，由呼叫端與資料寫入放在同一個交易中 (rollback 時版本不變)。
+    """
+    now = datetime.now(timezone.utc)
+    insert = pg_insert if db.bind.dialect.name == "postgresql" else sqlite_insert
+    stmt = insert(TableVersion).values([{"table_name": t, "version": 1, "updated_at": now} for t in tables])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[TableVersion.table_name],
+        set_={"version": TableVersion.version + 1, "updated_at": stmt.excluded.updated_at},
+    )
+    await db.execute(stmt)
+
+
+async def get_table_versions(db: AsyncSession, tables: Iterable[str]) -> TableVersions:
+    """一次查詢取得多個資料表的版本 (stockmovement 由最新一筆異動推導)"""
+    tables = list(tables)
+    statement = select(TableVersion.table_name, TableVersion.version, TableVersion.updated_at)\
+                .where(TableVersion.table_name.in_(tables))
+    if LEDGER_TABLE not in tables:
+        found = {name: (version, updated_at) for name, version, updated_at in (await db.exec(statement)).all()}
+        return {t: found.get(t, (0, None)) for t in tables}
+
+    latest = select(
+        literal(f"{LEDGER_TABLE}:latest", String).label("table_name"), StockMovement.MovementID, StockMovement.smCreatedAt,
+    ).order_by(StockMovement.MovementID.desc()).limit(1).subquery()
+    found, movement = {}, (0, None)
+    for name, version, updated_at in (await db.exec(union_all(statement, select(latest)))).all():
+        if name == f"{LEDGER_TABLE}:latest":
+            movement = (version, updated_at)
+        else:
+            found[name] = (version, updated_at)
+
+    versions = {t: found.get(t, (0, None)) for t in tables}
+    bumped, bumped_at = versions[LEDGER_TABLE]
+    timestamps = [ts for ts in (bumped_at, movement[1]) if ts is not None]
+    versions[LEDGER_TABLE] = (f"{bumped}.{movement[0]}", max(timestamps) if timestamps else None)
+    return versions
@@ -0,0 +1,147 @@
+"""initial schema
+
+建立目前的完整資料表結構。
+若資料庫是先前由 SQLModel.metadata.create_all 或 scripts/migrate_v3.py 建立的，
+則只補上缺少的資料表 / 欄位 (取代原本手動執行的 migrate_v3.py)，不會動到既有資料。
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.services.stock_service import stock_level_backfill_statement
+
+
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _create_tables(existing: set):
+    if "staff" not in existing:
+        op.create_table(
+            "staff",
+            sa.Column("StaffID", sa.Integer(), primary_key=True),
+            sa.Column("stName", sa.String(), nullable=False),
+            sa.Column("stDept", sa.String(), nullable=False),
+            sa.Column("stTitle", sa.String(), nullable=True),
+            sa.Column("stPhone", sa.String(), nullable=True),
+            sa.Column("stEmail", sa.String(), nullable=True),
+            sa.Column("username", sa.String(), nullable=True, unique=True),
+            sa.Column("password", sa.String(), nullable=True),
+            sa.Column("is_manager", sa.Boolean(), nullable=False, server_default=sa.false()),
+        )
+    if "supplier" not in existing:
+        op.create_table(
+            "supplier",
+            sa.Column("SupplierID", sa.Integer(), primary_key=True),
+            sa.Column("suName", sa.String(), nullable=False),
+            sa.Column("suPhone", sa.String(), nullable=False),
+            sa.Column("suAddress", sa.String(), nullable=False),
+        )
+    if "product" not in existing:
+        op.create_table(
+            "product",
+            sa.Column("ProductID", sa.Integer(), primary_key=True),
+            sa.Column("prName", sa.String(), nullable=False),
+            sa.Column("prSpec", sa.String(), nullable=True),
+            sa.Column("prCategory", sa.String(), nullable=False),
+            sa.Column("prReorderLevel", sa.Integer(), nullable=False, server_default="10"),
+        )
+    if "warehouse" not in existing:
+        op.create_table(
+            "warehouse",
+            sa.Column("WarehouseID", sa.Integer(), primary_key=True),
+            sa.Column("waName", sa.String(), nullable=False),
+            sa.Column("waLocation", sa.String(), nullable=True),
+        )
+    if "inboundorder" not in existing:
+        op.create_table(
+            "inboundorder",
+            sa.Column("InboundID", sa.Integer(), primary_key=True),
+            sa.Column("ioDate", sa.Date(), nullable=False),
+            sa.Column("SupplierID", sa.Integer(), sa.ForeignKey("supplier.SupplierID"), nullable=False),
+            sa.Column("StaffID", sa.Integer(), sa.ForeignKey("staff.StaffID"), nullable=False),
+            sa.Column("Status", sa.String(), nullable=False, server_default="Completed"),
+        )
+    if "inbounddetail" not in existing:
+        op.create_table(
+            "inbounddetail",
+            sa.Column("InboundID", sa.Integer(), sa.ForeignKey("inboundorder.InboundID"), primary_key=True),
+            sa.Column("ProductID", sa.Integer(), sa.ForeignKey("product.ProductID"), primary_key=True),
+            sa.Column("idQuantity", sa.Integer(), nullable=False),
+            sa.Column("WarehouseID", sa.Integer(), sa.ForeignKey("warehouse.WarehouseID"), nullable=False),
+        )
+    if "requisition" not in existing:
+        op.create_table(
+            "requisition",
+            sa.Column("ReqID", sa.Integer(), primary_key=True),
+            sa.Column("reDate", sa.Date(), nullable=False),
+            sa.Column("reReason", sa.String(), nullable=False),
+            sa.Column("StaffID", sa.Integer(), sa.ForeignKey("staff.StaffID"), nullable=False),
+            sa.Column("Status", sa.String(), nullable=False, server_default="Completed"),
+        )
+    if "reqdetail" not in existing:
+        op.create_table(
+            "reqdetail",
+            sa.Column("ReqID", sa.Integer(), sa.ForeignKey("requisition.ReqID"), primary_key=True),
+            sa.Column("ProductID", sa.Integer(), sa.ForeignKey("product.ProductID"), primary_key=True),
+            sa.Column("rdQuantity", sa.Integer(), nullable=False),
+            sa.Column("WarehouseID", sa.Integer(), sa.ForeignKey("warehouse.WarehouseID"), nullable=False),
+        )
+    if "stocklevel" not in existing:
+        op.create_table(
+            "stocklevel",
+            sa.Column("ProductID", sa.Integer(), sa.ForeignKey("product.ProductID"), primary_key=True),
+            sa.Column("WarehouseID", sa.Integer(), sa.ForeignKey("warehouse.WarehouseID"), primary_key=True),
+            sa.Column("slQuantity", sa.Integer(), nullable=False, server_default="0"),
+        )
+        # 舊資料庫已有單據時，由 Completed 明細加總出目前庫存
+        op.get_bind().execute(stock_level_backfill_statement())
+
+
+def _add_missing_columns(existing: set):
+    """舊資料庫補欄位 (原 scripts/migrate_v3.py / migrate_v4.py 的內容)"""
+    inspector = sa.inspect(op.get_bind())
+
+    def columns(table):
+        return {c["name"] for c in inspector.get_columns(table)} if table in existing else set()
+
+    staff_columns = columns("staff")
+    if staff_columns and "username" not in staff_columns:
+        with op.batch_alter_table("staff") as batch:
+            batch.add_column(sa.Column("username", sa.String(), nullable=True))
+            batch.add_column(sa.Column("password", sa.String(), nullable=True))
+            batch.add_column(sa.Column("is_manager", sa.Boolean(), nullable=False, server_default=sa.false()))
+        # 既有員工以姓名作為帳號，預設密碼 0000
+        op.execute('UPDATE staff SET username = "stName", password = \'0000\'')
+        op.create_index("idx_staff_username", "staff", ["username"], unique=True)
+
+    for table in ("inboundorder", "requisition"):
+        table_columns = columns(table)
+        if table_columns and "Status" not in table_columns:
+            with op.batch_alter_table(table) as batch:
+                batch.add_column(sa.Column("Status", sa.String(), nullable=False, server_default="Completed"))
+
+    product_columns = columns("product")
+    if product_columns and "prReorderLevel" not in product_columns:
+        with op.batch_alter_table("product") as batch:
+            batch.add_column(sa.Column("prReorderLevel", sa.Integer(), nullable=False, server_default="10"))
+
+
+def upgrade() -> None:
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+    _add_missing_columns(existing)
+    _create_tables(existing)
+
+
+def downgrade() -> None:
+    for table in ("stocklevel", "reqdetail", "requisition", "inbounddetail", "inboundorder",
+                  "warehouse", "product", "supplier", "staff"):
+        op.drop_table(table)
@@ -0,0 +1,48 @@
+"""hot query indexes
+
+庫存查詢、單據列表 / Keyset 分頁、儀表板統計使用的索引 (與 app/models 中的 __table_args__ 一致)。
+PostgreSQL (以及 SQLite) 上 Status 索引為只包含 Completed 單據的部分索引。
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COMPLETED = sa.text("\"Status\" = 'Completed'")
+
+# (索引名稱, 資料表, 欄位, 是否只含 Completed)
+INDEXES = [
+    ("ix_inbounddetail_product_warehouse", "inbounddetail", ["ProductID", "WarehouseID"], False),
+    ("ix_reqdetail_product_warehouse", "reqdetail", ["ProductID", "WarehouseID"], False),
+    ("ix_inboundorder_date_id", "inboundorder", ["ioDate", "InboundID"], False),
+    ("ix_requisition_date_id", "requisition", ["reDate", "ReqID"], False),
+    ("ix_inboundorder_completed", "inboundorder", ["InboundID"], True),
+    ("ix_requisition_completed", "requisition", ["ReqID"], True),
+    ("ix_inboundorder_supplier", "inboundorder", ["SupplierID"], False),
+    ("ix_inboundorder_staff", "inboundorder", ["StaffID"], False),
+    ("ix_requisition_staff", "requisition", ["StaffID"], False),
+    ("ix_stocklevel_warehouse", "stocklevel", ["WarehouseID"], False),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns, completed_only in INDEXES:
+        where = {"postgresql_where": COMPLETED, "sqlite_where": COMPLETED} if completed_only else {}
+        # if_not_exists: 由 create_all 建立的開發資料庫可能已經有這些索引
+        op.create_index(name, table, columns, if_not_exists=True, **where)
+
+
+def downgrade() -> None:
+    for name, table, _, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,33 @@
+"""app metadata
+
+系統資訊 key / value 表，記錄初始資料 (seed) 版本等資訊。
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if "appmetadata" in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        "appmetadata",
+        sa.Column("key", sa.String(), primary_key=True),
+        sa.Column("value", sa.String(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("appmetadata")
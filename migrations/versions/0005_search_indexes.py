@@ -0,0 +1,29 @@
+"""search indexes
+
+主檔搜尋索引: PostgreSQL 使用 pg_trgm GIN 索引，SQLite 使用 FTS5 trigram 影子表與同步 trigger。
+定義見 app/core/search.py。
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from app.core.search import install_search, uninstall_search
+
+
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    install_search(op.get_bind())
+
+
+def downgrade() -> None:
+    uninstall_search(op.get_bind())
@@ -0,0 +1,38 @@
+"""ai query cache
+
+AI 查詢的問題 → SQL 快取，重啟後仍可使用。
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if "aiquerycache" in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        "aiquerycache",
+        sa.Column("question_key", sa.String(), primary_key=True),
+        sa.Column("question", sa.String(), nullable=False),
+        sa.Column("sql", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("last_used_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index("ix_aiquerycache_last_used_at", "aiquerycache", ["last_used_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_aiquerycache_last_used_at", table_name="aiquerycache")
+    op.drop_table("aiquerycache")
@@ -0,0 +1,51 @@
+"""stock movements
+
+只新增的庫存異動帳 (含每個商品 × 倉庫的結餘)，並由既有的 Completed 單據產生初始紀錄。
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+
+"""
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.services.stock_service import ledger_backfill_statement
+
+
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if "stockmovement" in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        "stockmovement",
+        sa.Column("MovementID", sa.Integer(), primary_key=True),
+        sa.Column("ProductID", sa.Integer(), nullable=False),
+        sa.Column("WarehouseID", sa.Integer(), nullable=False),
+        sa.Column("smDate", sa.Date(), nullable=False),
+        sa.Column("smQuantity", sa.Integer(), nullable=False),
+        sa.Column("smBalance", sa.Integer(), nullable=False),
+        sa.Column("smSource", sa.String(), nullable=False),
+        sa.Column("smSourceID", sa.Integer(), nullable=True),
+        sa.Column("smCreatedAt", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index("ix_stockmovement_location", "stockmovement", ["ProductID", "WarehouseID", "MovementID"])
+    op.create_index("ix_stockmovement_date", "stockmovement", ["smDate"])
+    op.create_index("ix_stockmovement_source", "stockmovement", ["smSource", "smSourceID"])
+
+    op.get_bind().execute(ledger_backfill_statement(datetime.now(timezone.utc)))
+
+
+def downgrade() -> None:
+    op.drop_index("ix_stockmovement_source", table_name="stockmovement")
+    op.drop_index("ix_stockmovement_date", table_name="stockmovement")
+    op.drop_index("ix_stockmovement_location", table_name="stockmovement")
+    op.drop_table("stockmovement")
@@ -0,0 +1,43 @@
+"""stock snapshots
+
+每個期末各商品 × 倉庫的庫存結存，查詢歷史庫存時不必加總所有異動。
+快照由 scripts/stock_snapshots.py 建立 (升級後執行一次即補齊過去的期末)。
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0008"
+down_revision: Union[str, None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if "stocksnapshot" in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        "stocksnapshot",
+        sa.Column("ssDate", sa.Date(), primary_key=True),
+        sa.Column("ProductID", sa.Integer(), primary_key=True),
+        sa.Column("WarehouseID", sa.Integer(), primary_key=True),
+        sa.Column("ssQuantity", sa.Integer(), nullable=False),
+    )
+    op.create_table(
+        "stocksnapshotrun",
+        sa.Column("ssDate", sa.Date(), primary_key=True),
+        sa.Column("ssPeriod", sa.String(), nullable=False),
+        sa.Column("ssCreatedAt", sa.DateTime(timezone=True), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("stocksnapshotrun")
+    op.drop_table("stocksnapshot")
@@ -0,0 +1,44 @@
+"""movement rollups
+
+每日進出量彙總 (商品 × 倉庫 × 方向)，並由既有的異動帳產生初始資料。
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.services.movement_rollups import rollup_backfill_statement
+
+
+revision: str = "0009"
+down_revision: Union[str, None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if "movementrollup" in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        "movementrollup",
+        sa.Column("mrDate", sa.Date(), primary_key=True),
+        sa.Column("ProductID", sa.Integer(), primary_key=True),
+        sa.Column("WarehouseID", sa.Integer(), primary_key=True),
+        sa.Column("mrDirection", sa.String(), primary_key=True),
+        sa.Column("mrQuantity", sa.Integer(), nullable=False),
+    )
+    op.create_index("ix_movementrollup_product_date", "movementrollup", ["ProductID", "mrDate"])
+    op.create_index("ix_movementrollup_warehouse_date", "movementrollup", ["WarehouseID", "mrDate"])
+
+    op.get_bind().execute(rollup_backfill_statement())
+
+
+def downgrade() -> None:
+    op.drop_index("ix_movementrollup_warehouse_date", table_name="movementrollup")
+    op.drop_index("ix_movementrollup_product_date", table_name="movementrollup")
+    op.drop_table("movementrollup")
@@ -0,0 +1,261 @@
+"""
+熱門 API 效能量測 (in-process，透過 httpx ASGITransport 直接呼叫 FastAPI app，不經過網路)
+
+用法:
+    uv run python scripts/benchmark.py                                  # small 資料量
+    uv run python scripts/benchmark.py --sizes small,medium --requests 300
+    uv run python scripts/benchmark.py --save-baseline bench.json       # 存成基準
+    uv run python scripts/benchmark.py --baseline bench.json            # 與基準比較，退步超過門檻時 exit 1
+    uv run python scripts/benchmark.py --json orjson --accept-encoding br   # 比較序列化方式與壓縮
+
+每個資料量使用獨立的 SQLite 檔 (預設放在 .benchmark/，第一次執行時以 app/services/synthetic_data.py 產生並重複使用)。
+每個情境回報 p50 / p95 / p99 延遲、每秒請求數、每個請求執行的 SQL 數與實際傳輸的 bytes (壓縮後)。
+Dashboard 量測時關閉快取 (DASHBOARD_CACHE_TTL=0)，量的是實際計算成本。
+需要 httpx (`uv add --dev httpx`)。
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 讓腳本可以直接從專案根目錄執行
+sys.path.insert(0, PROJECT_ROOT)
+
+DEFAULT_DATA_DIR = os.path.join(PROJECT_ROOT, ".benchmark")
+SCENARIOS = ("get_products", "get_dashboard_stats", "get_inbound_orders", "get_requisitions", "create_inbound_order")
+
+# 與基準比較時的容許範圍
+DEFAULT_MAX_REGRESSION = 0.25   # p95 變慢超過 25% 視為退步
+MIN_REGRESSION_MS = 1.0         # 差距小於 1ms 不計 (避免極快的請求因誤差誤判)
+
+
+def _percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+# --- 量測 (在子行程中執行，每個資料量各自一個資料庫設定) ---
+
+async def _prepare_database(size: str, seed: int):
+    from app.core.database import init_db, get_db_session_context
+    from app.core.seed import get_seed_version, seed_database
+    from app.services.synthetic_data import PRESETS, generate_dataset, config_summary
+    from dataclasses import replace
+
+    await init_db()
+    async with get_db_session_context() as session:
+        if await get_seed_version(session) is not None:
+            return
+        await seed_database(session)
+        config = replace(PRESETS[size], seed=seed)
+        print(f"Generating {size} dataset ({config_summary(config)})...", file=sys.stderr)
+        stats = await generate_dataset(session, config)
+        print(f"  {stats}", file=sys.stderr)
+
+
+async def _load_ids(column):
+    from sqlmodel import select
+    from app.core.database import get_db_session_context
+    async with get_db_session_context() as session:
+        return list((await session.exec(select(column))).all())
+
+
+async def _measure(client, counter, name: str, make_request, requests: int, warmup: int, concurrency: int) -> dict:
+    for _ in range(warmup):
+        response = await make_request(client)
+        response.raise_for_status()
+
+    latencies = []
+    wire_bytes = []
+    statements_before = counter["statements"]
+    queue = iter(range(requests))
+
+    async def worker():
+        for _ in queue:
+            start = time.perf_counter()
+            response = await make_request(client)
+            latencies.append((time.perf_counter() - start) * 1000)
+            wire_bytes.append(response.num_bytes_downloaded)
+            if response.status_code >= 400:
+                raise RuntimeError(f"{name}: HTTP {response.status_code} {response.text[:200]}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "requests": requests,
+        "p50_ms": round(_percentile(latencies, 50), 3),
+        "p95_ms": round(_percentile(latencies, 95), 3),
+        "p99_ms": round(_percentile(latencies, 99), 3),
+        "mean_ms": round(statistics.fmean(latencies), 3),
+        "rps": round(requests / elapsed, 1),
+        "sql_per_request": round((counter["statements"] - statements_before) / requests, 2),
+        "bytes_per_response": round(statistics.fmean(wire_bytes)),
+    }
+
+
+async def run_size(size: str, scenarios, requests: int, warmup: int, concurrency: int, seed: int, accept_encoding: str) -> dict:
+    import httpx
+    from sqlalchemy import event
+    from app.core.database import engine
+    from app.models.product import Product
+    from app.models.warehouse import Warehouse
+    from app.models.supplier import Supplier
+    from app.models.staff import Staff
+    from app.main import app
+
+    await _prepare_database(size, seed)
+
+    counter = {"statements": 0}
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        counter["statements"] += 1
+
+    rng = random.Random(seed)
+    product_ids = await _load_ids(Product.ProductID)
+    warehouse_ids = await _load_ids(Warehouse.WarehouseID)
+    supplier_ids = await _load_ids(Supplier.SupplierID)
+    staff_ids = await _load_ids(Staff.StaffID)
+
+    def new_inbound_order():
+        return {
+            "ioDate": "2025-12-31",
+            "SupplierID": rng.choice(supplier_ids),
+            "StaffID": rng.choice(staff_ids),
+            "details": [
+                {"ProductID": pid, "idQuantity": rng.randint(1, 100), "WarehouseID": rng.choice(warehouse_ids)}
+                for pid in rng.sample(product_ids, min(5, len(product_ids)))
+            ],
+        }
+
+    requests_by_scenario = {
+        "get_products": lambda c: c.get("/api/v1/products/", params={"limit": 50}),
+        "get_dashboard_stats": lambda c: c.get("/api/v1/dashboard/"),
+        "get_inbound_orders": lambda c: c.get("/api/v1/inbound/", params={"limit": 50}),
+        "get_requisitions": lambda c: c.get("/api/v1/requisitions/", params={"limit": 50}),
+        "create_inbound_order": lambda c: c.post("/api/v1/inbound/", json=new_inbound_order()),
+    }
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    headers = {"Accept-Encoding": accept_encoding}
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", headers=headers) as client:
+        for name in scenarios:
+            results[name] = await _measure(client, counter, name, requests_by_scenario[name], requests, warmup, concurrency)
+            print(f"  {size:<8} {name:<22} {_format(results[name])}", file=sys.stderr)
+
+    await engine.dispose()
+    return results
+
+
+# --- 主程式: 每個資料量開一個子行程，彙整結果 ---
+
+def _format(result: dict) -> str:
+    return (f"p50={result['p50_ms']:.2f}ms p95={result['p95_ms']:.2f}ms p99={result['p99_ms']:.2f}ms "
+            f"rps={result['rps']:.0f} sql/req={result['sql_per_request']} bytes={result.get('bytes_per_response', 0)}")
+
+
+def _run_child(size: str, args) -> dict:
+    os.makedirs(args.data_dir, exist_ok=True)
+    db_path = os.path.join(args.data_dir, f"{size}-{args.seed}.db")
+    env = {
+        **os.environ,
+        "APP_ENV": "development",
+        "SQLITE_URL": f"sqlite+aiosqlite:///{db_path}",
+        "DASHBOARD_CACHE_TTL": "0",
+        "DB_ECHO": "false",
+        "JSON_RESPONSE_CLASS": args.json,
+    }
+    command = [
+        sys.executable, os.path.abspath(__file__), "--child", size,
+        "--scenarios", ",".join(args.scenarios), "--requests", str(args.requests),
+        "--warmup", str(args.warmup), "--concurrency", str(args.concurrency), "--seed", str(args.seed),
+        "--accept-encoding", args.accept_encoding,
+    ]
+    output = subprocess.run(command, env=env, cwd=PROJECT_ROOT, stdout=subprocess.PIPE, check=True).stdout
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def compare(results: dict, baseline: dict, max_regression: float) -> list:
+    """回傳退步項目說明 (p95 變慢或 SQL 數增加)"""
+    regressions = []
+    for size, scenarios in results.items():
+        for name, current in scenarios.items():
+            previous = baseline.get(size, {}).get(name)
+            if not previous:
+                continue
+            slower = current["p95_ms"] - previous["p95_ms"]
+            if slower > MIN_REGRESSION_MS and current["p95_ms"] > previous["p95_ms"] * (1 + max_regression):
+                regressions.append(f"{size}/{name}: p95 {previous['p95_ms']:.2f}ms -> {current['p95_ms']:.2f}ms")
+            if current["sql_per_request"] > previous["sql_per_request"]:
+                regressions.append(
+                    f"{size}/{name}: SQL per request {previous['sql_per_request']} -> {current['sql_per_request']}"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hot API endpoints in-process.")
+    parser.add_argument("--sizes", default="small", help="以逗號分隔: small,medium,large")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR)
+    parser.add_argument("--json", choices=["default", "orjson"], default="default", help="JSON_RESPONSE_CLASS")
+    parser.add_argument("--accept-encoding", default="identity", help="例如 gzip、br")
+    parser.add_argument("--output", help="結果寫入 JSON 檔")
+    parser.add_argument("--save-baseline", help="結果存成基準 JSON 檔")
+    parser.add_argument("--baseline", help="與基準 JSON 檔比較")
+    parser.add_argument("--max-regression", type=float, default=DEFAULT_MAX_REGRESSION)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    args.scenarios = [s for s in args.scenarios.split(",") if s]
+
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    if args.child:
+        result = asyncio.run(run_size(
+            args.child, args.scenarios, args.requests, args.warmup, args.concurrency, args.seed, args.accept_encoding,
+        ))
+        print(json.dumps(result))
+        return
+
+    results = {size: _run_child(size, args) for size in args.sizes.split(",") if size}
+
+    print(f"{'size':<8} {'scenario':<22} result")
+    for size, scenarios in results.items():
+        for name, result in scenarios.items():
+            print(f"{size:<8} {name:<22} {_format(result)}")
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=2)
+            print(f"Results written to {path}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.max_regression)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
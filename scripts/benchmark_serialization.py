@@ -0,0 +1,109 @@
+"""
+比較列表回應的序列化時間與壓縮後大小 (進貨單、領料單列表)
+
+用法:
+    uv run python scripts/benchmark.py --scenarios get_products         # 先產生 .benchmark/ 測試資料庫
+    SQLITE_URL=sqlite+aiosqlite:///./.benchmark/small-42.db uv run python scripts/benchmark_serialization.py --limit 100
+
+序列化方式:
+    pydantic  - FastAPI 預設 (有 response_model 時直接由 Pydantic 輸出 JSON bytes)
+    orjson    - JSON_RESPONSE_CLASS=orjson (Pydantic 轉成 dict 後交給 orjson)
+    json      - 標準函式庫 json (舊版 FastAPI / jsonable_encoder 的做法)
+壓縮: identity / gzip (GZIP_LEVEL) / br (BROTLI_QUALITY，需安裝 brotli)
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import sys
+import time
+from typing import List
+
+# 讓腳本可以直接從專案根目錄執行
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydantic import TypeAdapter
+from sqlmodel import select
+from sqlalchemy.orm import selectinload
+
+from app.core.config import GZIP_LEVEL, BROTLI_QUALITY
+from app.core.database import get_db_session_context
+from app.models.inbound_order import InboundOrder, InboundDetail
+from app.models.requisition import Requisition, ReqDetail
+from app.schemas.inboundorder import InboundOrderRead
+from app.schemas.requisition import RequisitionRead
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+async def load_rows(limit: int):
+    async with get_db_session_context() as db:
+        inbound = (await db.exec(
+            select(InboundOrder).options(
+                selectinload(InboundOrder.details).options(selectinload(InboundDetail.product), selectinload(InboundDetail.warehouse)),
+                selectinload(InboundOrder.supplier), selectinload(InboundOrder.staff),
+            ).order_by(InboundOrder.ioDate.desc(), InboundOrder.InboundID.desc()).limit(limit)
+        )).all()
+        requisitions = (await db.exec(
+            select(Requisition).options(
+                selectinload(Requisition.details).options(selectinload(ReqDetail.product), selectinload(ReqDetail.warehouse)),
+                selectinload(Requisition.staff),
+            ).order_by(Requisition.reDate.desc(), Requisition.ReqID.desc()).limit(limit)
+        )).all()
+    return {"inbound": (InboundOrderRead, inbound), "requisitions": (RequisitionRead, requisitions)}
+
+
+def timed(fn, repeat: int) -> tuple:
+    result = fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return result, (time.perf_counter() - start) / repeat * 1000
+
+
+def run(limit: int, repeat: int):
+    listings = asyncio.run(load_rows(limit))
+    for name, (schema, rows) in listings.items():
+        adapter = TypeAdapter(List[schema])
+        validated = adapter.validate_python(rows, from_attributes=True)
+
+        serializers = {
+            "pydantic": lambda: adapter.dump_json(validated),
+            "json": lambda: json.dumps(adapter.dump_python(validated, mode="json"), ensure_ascii=False,
+                                       separators=(",", ":")).encode(),
+        }
+        if orjson is not None:
+            serializers["orjson"] = lambda: orjson.dumps(adapter.dump_python(validated, mode="json"))
+
+        print(f"\n{name}: {len(rows)} orders")
+        body = None
+        for label, fn in serializers.items():
+            body, ms = timed(fn, repeat)
+            print(f"  serialize {label:<9} {ms:8.3f} ms  {len(body):>9} bytes")
+
+        encoders = {"gzip": lambda: gzip.compress(body, compresslevel=GZIP_LEVEL)}
+        if brotli is not None:
+            encoders["br"] = lambda: brotli.compress(body, quality=BROTLI_QUALITY)
+        for label, fn in encoders.items():
+            compressed, ms = timed(fn, repeat)
+            print(f"  compress  {label:<9} {ms:8.3f} ms  {len(compressed):>9} bytes ({len(compressed) / len(body):.1%})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare JSON serialization and compression of order listings.")
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    run(args.limit, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+檢查熱門查詢的執行計畫是否有用到預期的索引 (索引由 Alembic migrations 建立)
+
+用法:
+    uv run alembic upgrade head
+    uv run python scripts/check_query_plans.py
+
+任何一個查詢沒有用到預期索引時以 exit code 1 結束，可放在 CI 或部署前檢查。
+"""
+import asyncio
+import json
+import os
+import sys
+
+# 讓腳本可以直接從專案根目錄執行
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import date, datetime, timezone
+
+from sqlalchemy import text
+from sqlmodel import select
+
+from app.core.database import engine
+from app.core.pagination import encode_cursor
+from app.core.search import apply_search
+from app.models.product import Product
+from app.models.staff import Staff
+from app.api.products import stock_totals_statement, distribution_statement
+from app.api.inboundorders import inbound_orders_statement
+from app.api.requisitions import requisitions_statement
+from app.api.dashboard import monthly_inbound_statement, monthly_requisition_statement
+from app.services.stock_service import history_totals_statements, ledger_backfill_statement
+
+# 查詢直接使用 API / service 產生的 SQLAlchemy 語句 (以目前的 dialect 編譯)，程式修改後檢查結果跟著變
+# (說明, dialect 名稱 -> 語句, 預期索引名稱 {dialect: 可接受的索引名稱})
+CURSOR = encode_cursor([date(2025, 12, 1), 100])
+MONTH_START = date(2025, 12, 1)
+
+HOT_QUERIES = [
+    (
+        "get_products: 依 ProductID 查目前庫存",
+        lambda dialect: stock_totals_statement([1, 2, 3]),
+        {"sqlite": ["sqlite_autoindex_stocklevel_1"], "postgresql": ["stocklevel_pkey"]},
+    ),
+    (
+        "get_product_distribution: 單一商品各倉庫存",
+        lambda dialect: distribution_statement(1),
+        {"sqlite": ["sqlite_autoindex_stocklevel_1"], "postgresql": ["stocklevel_pkey"]},
+    ),
+    (
+        "庫存重建 / 驗證: 依商品 × 倉庫加總進貨明細",
+        lambda dialect: history_totals_statements()[0],
+        {"sqlite": ["ix_inbounddetail_product_warehouse"], "postgresql": ["ix_inbounddetail_product_warehouse", "ix_inboundorder_completed"]},
+    ),
+    (
+        "庫存重建 / 驗證: 依商品 × 倉庫加總領料明細",
+        lambda dialect: history_totals_statements()[1],
+        {"sqlite": ["ix_reqdetail_product_warehouse"], "postgresql": ["ix_reqdetail_product_warehouse", "ix_requisition_completed"]},
+    ),
+    (
+        "異動帳重建: 只讀 Completed 進貨單 (部分索引)",
+        lambda dialect: ledger_backfill_statement(datetime.now(timezone.utc)).select,
+        {"sqlite": ["ix_inboundorder_completed"], "postgresql": ["ix_inboundorder_completed"]},
+    ),
+    (
+        "異動帳重建: 只讀 Completed 領料單 (部分索引)",
+        lambda dialect: ledger_backfill_statement(datetime.now(timezone.utc)).select,
+        {"sqlite": ["ix_requisition_completed"], "postgresql": ["ix_requisition_completed"]},
+    ),
+    (
+        "get_inbound_orders: Keyset 分頁",
+        lambda dialect: inbound_orders_statement(None, CURSOR, 0, 10),
+        {"sqlite": ["ix_inboundorder_date_id"], "postgresql": ["ix_inboundorder_date_id"]},
+    ),
+    (
+        "get_requisitions: Keyset 分頁",
+        lambda dialect: requisitions_statement(None, None, CURSOR, 0, 10),
+        {"sqlite": ["ix_requisition_date_id"], "postgresql": ["ix_requisition_date_id"]},
+    ),
+    (
+        "get_dashboard_stats: 本月進貨單數",
+        lambda dialect: monthly_inbound_statement(MONTH_START),
+        {"sqlite": ["ix_inboundorder_date_id"], "postgresql": ["ix_inboundorder_date_id"]},
+    ),
+    (
+        "get_dashboard_stats: 本月領料單數",
+        lambda dialect: monthly_requisition_statement(MONTH_START),
+        {"sqlite": ["ix_requisition_date_id"], "postgresql": ["ix_requisition_date_id"]},
+    ),
+    (
+        "get_products?q=: 商品名稱搜尋",
+        lambda dialect: apply_search(select(Product), Product, "鍵盤組", 0, 10, dialect),
+        {"sqlite": ["product_fts"], "postgresql": ["ix_product_prname_trgm"]},
+    ),
+    (
+        "get_all_staff?q=: 員工姓名搜尋",
+        lambda dialect: apply_search(select(Staff), Staff, "倉管員", 0, 10, dialect),
+        {"sqlite": ["staff_fts"], "postgresql": ["ix_staff_stname_trgm"]},
+    ),
+]
+
+
+def compile_sql(statement, dialect) -> str:
+    """以連線的 dialect 編譯成 SQL 字串 (參數直接代入，EXPLAIN 不需另外綁定)"""
+    return str(statement.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+
+
+def _collect_pg_indexes(plan: dict, found: set):
+    if "Index Name" in plan:
+        found.add(plan["Index Name"])
+    for child in plan.get("Plans", []):
+        _collect_pg_indexes(child, found)
+
+
+async def explain(conn, sql: str) -> tuple:
+    """回傳 (計畫文字, 用到的索引名稱文字)"""
+    if conn.dialect.name == "postgresql":
+        rows = (await conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))).scalar()
+        plan = rows if isinstance(rows, list) else json.loads(rows)
+        found = set()
+        _collect_pg_indexes(plan[0]["Plan"], found)
+        return json.dumps(plan, indent=1), " ".join(sorted(found))
+
+    rows = (await conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"))).all()
+    detail = "\n".join(str(row[-1]) for row in rows)
+    return detail, detail
+
+
+async def run() -> int:
+    failures = 0
+    async with engine.connect() as conn:
+        dialect = conn.dialect.name
+        if dialect == "postgresql":
+            # 測試資料量很小時 PostgreSQL 會偏好循序掃描，關掉以確認索引「可以」被使用
+            await conn.execute(text("SET enable_seqscan = off"))
+
+        for title, build, expected in HOT_QUERIES:
+            names = expected.get(dialect, [])
+            plan, used = await explain(conn, compile_sql(build(dialect), conn.dialect))
+            ok = any(name in used for name in names)
+            failures += 0 if ok else 1
+            print(f"[{'OK' if ok else 'FAIL'}] {title} (expect: {', '.join(names)})")
+            if not ok:
+                print("       " + plan.replace("\n", "\n       "))
+
+    await engine.dispose()
+    print(f"{len(HOT_QUERIES) - failures}/{len(HOT_QUERIES)} hot queries use their index.")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(run()))
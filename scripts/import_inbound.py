@@ -0,0 +1,57 @@
+"""
+進貨單大量匯入 (CSV / NDJSON)
+
+用法:
+    uv run python scripts/import_inbound.py orders.csv
+    uv run python scripts/import_inbound.py orders.ndjson --chunk-size 1000
+
+檔案格式見 app/services/inbound_import.py
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+# 讓腳本可以直接從專案根目錄執行
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import init_db, get_db_session_context
+from app.services.inbound_import import import_inbound_orders, DEFAULT_CHUNK_SIZE
+
+READ_SIZE = 64 * 1024
+
+
+async def read_file(path: str):
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(READ_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+
+async def run(path: str, fmt: str, chunk_size: int) -> int:
+    await init_db()
+    async with get_db_session_context() as session:
+        result = await import_inbound_orders(session, read_file(path), fmt=fmt, chunk_size=chunk_size)
+
+    print(f"Imported {result.orders_created} orders ({result.lines_created} lines).")
+    for e in result.errors:
+        ref = f" [ref {e.ref}]" if e.ref else ""
+        print(f"  line {e.line}{ref}: {e.error}")
+    return 1 if result.errors else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import inbound orders from CSV or NDJSON.")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="預設依副檔名判斷")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    fmt = args.format or ("ndjson" if args.path.endswith((".ndjson", ".jsonl", ".json")) else "csv")
+    sys.exit(asyncio.run(run(args.path, fmt, args.chunk_size)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+寫入初始資料 (員工、供應商、商品、倉庫與範例單據)
+
+用法:
+    uv run alembic upgrade head
+    uv run python scripts/seed.py            # 已是目前版本時略過
+    uv run python scripts/seed.py --force    # 強制重新檢查並補齊初始資料
+
+DB_STARTUP_MODE=migrations 時 API 啟動不會自動 seed，需手動執行一次。
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+# 讓腳本可以直接從專案根目錄執行
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import get_db_session_context
+from app.core.seed import seed_database, SEED_VERSION
+
+
+async def run(force: bool) -> int:
+    async with get_db_session_context() as session:
+        done = await seed_database(session, force=force)
+    if not done:
+        print(f"Seed version {SEED_VERSION} already applied. Use --force to re-run.")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed initial data and record the seed version.")
+    parser.add_argument("--force", action="store_true")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args.force)))
+
+
+if __name__ == "__main__":
+    main()
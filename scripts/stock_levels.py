@@ -0,0 +1,73 @@
+"""
+StockLevel 維護工具
+
+用法:
+    uv run python scripts/stock_levels.py verify          # 比對 StockLevel 與歷史明細、異動帳結餘
+    uv run python scripts/stock_levels.py rebuild         # 由歷史明細重建 StockLevel
+    uv run python scripts/stock_levels.py rebuild-ledger  # 由歷史明細重建 StockMovement (會清除補償分錄)
+    uv run python scripts/stock_levels.py rebuild-rollups # 由 StockMovement 重建每日進出量彙總
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+# 讓腳本可以直接從專案根目錄執行
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import init_db, get_db_session_context
+from app.services.stock_service import rebuild_stock_levels, verify_stock_levels, rebuild_stock_ledger, verify_stock_ledger
+from app.services.movement_rollups import rebuild_movement_rollups, verify_movement_rollups
+
+
+async def run(command: str) -> int:
+    await init_db()
+    async with get_db_session_context() as session:
+        if command == "rebuild":
+            count = await rebuild_stock_levels(session)
+            print(f"StockLevel rebuilt: {count} rows.")
+            return 0
+        if command == "rebuild-ledger":
+            count = await rebuild_stock_ledger(session)
+            print(f"StockMovement rebuilt: {count} rows.")
+            return 0
+        if command == "rebuild-rollups":
+            count = await rebuild_movement_rollups(session)
+            await session.commit()
+            print(f"MovementRollup rebuilt: {count} rows.")
+            return 0
+
+        exit_code = 0
+        for name, verify in (("order history", verify_stock_levels), ("StockMovement balances", verify_stock_ledger)):
+            mismatches = await verify(session)
+            if not mismatches:
+                print(f"StockLevel is consistent with {name}.")
+                continue
+
+            exit_code = 1
+            print(f"Found {len(mismatches)} StockLevel rows that differ from {name}:")
+            for m in mismatches:
+                print(f"  Product {m['ProductID']} @ Warehouse {m['WarehouseID']}: "
+                      f"expected {m['expected']}, actual {m['actual']}")
+
+        mismatches = await verify_movement_rollups(session)
+        if mismatches:
+            exit_code = 1
+            print(f"Found {len(mismatches)} MovementRollup rows that differ from StockMovement:")
+            for m in mismatches:
+                print(f"  {m['date']} Product {m['ProductID']} @ Warehouse {m['WarehouseID']} ({m['direction']}): "
+                      f"expected {m['expected']}, actual {m['actual']}")
+        else:
+            print("MovementRollup is consistent with StockMovement.")
+        return exit_code
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild or verify the StockLevel table, StockMovement ledger and MovementRollup table.")
+    parser.add_argument("command", choices=["rebuild", "rebuild-ledger", "rebuild-rollups", "verify"])
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args.command)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+庫存快照排程
+
+用法:
+    uv run python scripts/stock_snapshots.py                    # 補齊到上一個期末 (排程每天執行一次)
+    uv run python scripts/stock_snapshots.py --period daily     # 覆寫 STOCK_SNAPSHOT_PERIOD
+    uv run python scripts/stock_snapshots.py --rebuild          # 刪除所有快照後由異動帳重新建立
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+# 讓腳本可以直接從專案根目錄執行
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import STOCK_SNAPSHOT_PERIOD
+from app.core.database import init_db, get_db_session_context
+from app.services.stock_snapshots import SNAPSHOT_PERIODS, clear_snapshots, take_due_snapshots
+
+
+async def run(period: str, rebuild: bool) -> int:
+    await init_db()
+    async with get_db_session_context() as session:
+        if rebuild:
+            await clear_snapshots(session)
+            await session.commit()
+            print("Stock snapshots cleared.")
+
+        taken = await take_due_snapshots(session, period)
+    if taken:
+        print(f"Took {len(taken)} {period} snapshots: {taken[0]} ~ {taken[-1]}")
+    else:
+        print("Stock snapshots are up to date.")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Take stock snapshots up to the last completed period.")
+    parser.add_argument("--period", choices=SNAPSHOT_PERIODS, default=STOCK_SNAPSHOT_PERIOD)
+    parser.add_argument("--rebuild", action="store_true", help="drop all snapshots and rebuild them from StockMovement")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args.period, args.rebuild)))
+
+
+if __name__ == "__main__":
+    main()